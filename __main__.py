@@ -22,4 +22,5 @@ from breakout import *
 
 # Application code
 if __name__ == '__main__':
+    set_validation(VALIDATE_FULL if VALIDATE else VALIDATE_NONE)
     Breakout(width=GAME_WIDTH,height=GAME_HEIGHT).run()
@@ -0,0 +1,375 @@
+# benchmark.py
+# Rui Chen rc687 and Tian Tan tt474
+# 10/19/2026
+"""Benchmark suite for the Breakout hot paths
+
+This module times the code that runs every animation frame: the ball physics in
+Play, the collision methods of the models, the GObject setters, label creation,
+polygon containment, complete frames of the Breakout state machine and the
+learning environments.  The games run headless (see `GameApp.headless`), so no
+window is opened.
+
+Every benchmark is run for a number of rounds.  Each round starts from a fresh,
+seeded setup, so the results are reproducible from one run to the next.  The
+statistics are stored as JSON so that runs can be compared between commits:
+
+    python benchmark.py --save before.json
+    ... change the code ...
+    python benchmark.py --compare before.json --threshold 0.1
+
+The comparison exits with status 1 if the median time of any benchmark grew by
+more than the threshold (a fraction; 0.1 is 10%)."""
+import argparse
+import json
+import platform
+import random
+import sys
+from timeit import default_timer as _clock
+
+import numpy as np
+from constants import *
+from game2d import *
+from models import *
+from play import *
+from breakout import *
+from environment import *
+
+
+#: the seed used for every round (offset by the round number)
+SEED = 1234
+
+#: the default regression threshold for --compare
+THRESHOLD = 0.10
+
+# The registered benchmarks, in order: (name, group, rounds, iterations, setup)
+_BENCHMARKS = []
+
+
+def bench(group, rounds=20, iterations=100):
+    """Returns: A decorator registering a benchmark setup function.
+
+    The decorated function is called (untimed) at the start of every round. It must
+    return a function of no arguments, which is then called `iterations` times under
+    the clock.
+
+    Parameter group: the group to report the benchmark in
+    Precondition: group is a string
+
+    Parameter rounds: the number of rounds to run
+    Precondition: rounds is an int > 0
+
+    Parameter iterations: the number of timed calls in each round
+    Precondition: iterations is an int > 0"""
+    def decorate(setup):
+        _BENCHMARKS.append((setup.__name__[6:],group,rounds,iterations,setup))
+        return setup
+    return decorate
+
+
+def run(name, rounds, iterations, setup):
+    """Returns: A dictionary of statistics for the given benchmark.
+
+    The times reported are per call, in seconds.
+
+    Parameter name: the benchmark name
+    Precondition: name is a string
+
+    Parameter rounds: the number of rounds to run
+    Precondition: rounds is an int > 0
+
+    Parameter iterations: the number of timed calls in each round
+    Precondition: iterations is an int > 0
+
+    Parameter setup: the function creating the timed function for each round
+    Precondition: setup is a function of no arguments
+    
+    Every round starts with full validation.  A setup may turn it off for its round."""
+    times = []
+    for ii in range(rounds):
+        random.seed(SEED+ii)
+        np.random.seed(SEED+ii)
+        set_validation(VALIDATE_FULL)
+        target = setup()
+        start = _clock()
+        for jj in xrange(iterations):
+            target()
+        times.append((_clock()-start)/iterations)
+    set_validation(VALIDATE_FULL)
+
+    data = np.array(times)
+    return {'name':name, 'rounds':rounds, 'iterations':iterations,
+            'min':float(data.min()), 'max':float(data.max()),
+            'mean':float(data.mean()), 'stddev':float(data.std()),
+            'median':float(np.median(data)), 'ops':float(1.0/data.mean())}
+
+
+def compare(results, baseline, threshold):
+    """Returns: The list of benchmark names that regressed against the baseline.
+
+    A benchmark regresses if its median grew by more than threshold (as a fraction
+    of the baseline median).  Benchmarks missing from either run are ignored.
+
+    Parameter results: the current results
+    Precondition: results is a dictionary as created by main
+
+    Parameter baseline: the results to compare against
+    Precondition: baseline is a dictionary as created by main
+
+    Parameter threshold: the allowed slowdown
+    Precondition: threshold is a float >= 0"""
+    old = dict((b['name'],b) for b in baseline['benchmarks'])
+    failed = []
+    for b in results['benchmarks']:
+        if b['name'] in old:
+            change = b['median']/old[b['name']]['median']-1.0
+            flag = ''
+            if change > threshold:
+                failed.append(b['name'])
+                flag = '  REGRESSION'
+            print('%-32s %10.2f us -> %10.2f us  %+7.1f%%%s' %
+                  (b['name'],old[b['name']]['median']*1e6,b['median']*1e6,change*100,flag))
+    return failed
+
+
+######### HELPERS #########
+
+def _press(app, key):
+    """Holds down the given key in a headless game.
+
+    Parameter app: the game
+    Precondition: app is a headless GameApp
+
+    Parameter key: the key name
+    Precondition: key is a string"""
+    app.input._capture_key(None,(0,key),'',[])
+
+
+def _serve(rows, columns):
+    """Returns: A new game with the given board and the ball in play.
+
+    Parameter rows: the number of rows of bricks
+    Precondition: rows is an int > 0
+
+    Parameter columns: the number of bricks in a row
+    Precondition: columns is an int > 0"""
+    game = Play(rows,columns)
+    game.serveBall()
+    return game
+
+
+######### PLAY #########
+
+@bench('play')
+def bench_updateBall_small():
+    return _serve(3,3).updateBall
+
+@bench('play')
+def bench_updateBall_default():
+    return _serve(BRICK_ROWS,BRICKS_IN_ROW).updateBall
+
+@bench('play',rounds=5,iterations=20)
+def bench_updateBall_huge():
+    return _serve(40,40).updateBall
+
+@bench('play')
+def bench_updateBall_unchecked():
+    set_validation(VALIDATE_NONE)
+    return _serve(BRICK_ROWS,BRICKS_IN_ROW).updateBall
+
+
+######### MODELS #########
+
+@bench('models',iterations=1000)
+def bench_Brick_collides():
+    brick = Brick(100,100,BRICK_WIDTH,BRICK_HEIGHT,colormodel.RED,colormodel.RED)
+    ball = Ball(100+random.uniform(-40,40),100+random.uniform(-10,10),BALL_DIAMETER,colormodel.BLUE)
+    return lambda : brick.collides(ball)
+
+@bench('models',iterations=1000)
+def bench_Paddle_collides():
+    paddle = Paddle(GAME_WIDTH/2.0,PADDLE_OFFSET,PADDLE_WIDTH,PADDLE_HEIGHT,
+                    colormodel.BLACK,colormodel.BLACK)
+    ball = Ball(GAME_WIDTH/2.0+random.uniform(-40,40),PADDLE_OFFSET+random.uniform(0,15),
+                BALL_DIAMETER,colormodel.BLUE)
+    return lambda : paddle.collides(ball)
+
+
+@bench('models',rounds=10,iterations=100)
+def bench_SweepAndPrune_update():
+    sap = SweepAndPrune()
+    balls = [Ball(random.uniform(0,GAME_WIDTH),random.uniform(0,GAME_HEIGHT),
+                  BALL_DIAMETER,colormodel.BLUE) for ii in range(200)]
+    for ball in balls:
+        sap.add(ball)
+    def target():
+        for ball in balls:
+            ball.x = ball.x+ball.getVx()
+            ball.y = ball.y+ball.getVy()
+        sap.update()
+    return target
+
+
+@bench('models',rounds=10,iterations=200)
+def bench_ParticleSystem_update():
+    particles = ParticleSystem()
+    for ii in range(PARTICLE_CAPACITY/PARTICLE_BURST):
+        particles.emit(random.uniform(0,GAME_WIDTH),random.uniform(0,GAME_HEIGHT),
+                       PARTICLE_BURST,(1.0,0.0,0.0,1.0))
+    return particles.update
+
+######### GAME2D #########
+
+@bench('game2d',iterations=1000)
+def bench_GObject_setxy():
+    rect = GRectangle(x=0,y=0,width=10,height=10)
+    def target():
+        rect.x = rect.x+1
+        rect.y = rect.y+1
+    return target
+
+@bench('game2d',iterations=1000)
+def bench_GObject_matrix():
+    rect = GRectangle(x=0,y=0,width=10,height=10,angle=30)
+    def target():
+        rect.x = rect.x+1
+        rect.matrix
+    return target
+
+@bench('game2d',iterations=20)
+def bench_GLabel_create():
+    return lambda : GLabel(text='Remaining Bricks 100',x=GAME_WIDTH/2.0,y=GAME_HEIGHT/2.0)
+
+@bench('game2d',rounds=10,iterations=50)
+def bench_GPolygon_contains():
+    angles = np.linspace(0,2*np.pi,256,endpoint=False)
+    points = []
+    for a in angles:
+        points += [float(100*np.cos(a)),float(100*np.sin(a))]
+    poly = GPolygon(points=points)
+    x = random.uniform(-100,100)
+    y = random.uniform(-100,100)
+    return lambda : poly.contains(x,y)
+
+@bench('game2d',rounds=10,iterations=1000)
+def bench_GScene_query():
+    groups = []
+    for ii in range(BRICK_ROWS):
+        bricks = [GRectangle(x=jj*(BRICK_WIDTH+BRICK_SEP_H),y=0,
+                             width=BRICK_WIDTH,height=BRICK_HEIGHT) for jj in range(BRICKS_IN_ROW)]
+        groups.append(GScene(x=BRICK_WIDTH/2.0,y=GAME_HEIGHT-ii*(BRICK_HEIGHT+BRICK_SEP_V),
+                             children=bricks))
+    scene = GScene(children=groups)
+    x = random.uniform(0,GAME_WIDTH)
+    y = random.uniform(0,GAME_HEIGHT)
+    return lambda : scene.query(x,y,x+BALL_DIAMETER,y+BALL_DIAMETER)
+
+@bench('game2d',rounds=10,iterations=1000)
+def bench_GScene_add_remove():
+    scene = GScene(children=[GEllipse(x=random.uniform(0,GAME_WIDTH),y=random.uniform(0,GAME_HEIGHT),
+                                      width=4,height=4) for ii in range(2000)])
+    bullet = GRectangle(x=GAME_WIDTH/2.0,y=GAME_HEIGHT/2.0,width=2,height=6)
+    def target():
+        scene.add_child(bullet)
+        scene.remove_child(bullet)
+    return target
+
+@bench('game2d',rounds=10,iterations=20)
+def bench_GPath_points_tuple():
+    path = GPath(points=[0,0,10,10])
+    points = tuple(float(v) for v in np.random.uniform(-100,100,200000))
+    def target():
+        path.points = points
+    return target
+
+@bench('game2d',rounds=10,iterations=20)
+def bench_GPath_points_array():
+    path = GPath(points=[0,0,10,10])
+    points = np.random.uniform(-100,100,200000)
+    def target():
+        path.points = points
+    return target
+
+
+######### BREAKOUT #########
+
+@bench('breakout',rounds=5,iterations=200)
+def bench_Breakout_frame():
+    app = Breakout(width=GAME_WIDTH,height=GAME_HEIGHT)
+    app.headless()
+    _press(app,'spacebar')
+    # Skip the welcome screen and the countdown
+    for ii in range(182):
+        app.step(1/60.0)
+    return lambda : app.step(1/60.0)
+
+
+######### ENVIRONMENT #########
+
+@bench('environment',rounds=5,iterations=1000)
+def bench_BreakoutEnv_step():
+    env = BreakoutEnv()
+    env.reset()
+    return lambda : env.step(random.randrange(ACTION_COUNT))
+
+@bench('environment',rounds=5,iterations=100)
+def bench_VectorBreakoutEnv_step():
+    env = VectorBreakoutEnv(16)
+    env.reset()
+    actions = [ACTION_STAY]*16
+    return lambda : env.step(actions)
+
+@bench('environment',rounds=5,iterations=1000)
+def bench_BreakoutEnv_pixels():
+    env = BreakoutEnv(pixels=(84,84,1))
+    env.reset()
+    return lambda : env.step(random.randrange(ACTION_COUNT))
+
+
+######### APPLICATION CODE #########
+
+def main():
+    """Runs the benchmarks given on the command line.
+
+    Returns: the exit status (1 if there was a regression, 0 otherwise)"""
+    parser = argparse.ArgumentParser(description='Benchmarks for Breakout')
+    parser.add_argument('-k','--filter',default='',help='only run benchmarks containing this text')
+    parser.add_argument('--save',help='write the results to this JSON file')
+    parser.add_argument('--compare',help='compare the results against this JSON file')
+    parser.add_argument('--threshold',type=float,default=THRESHOLD,
+                        help='the allowed slowdown of the median (default %.2f)' % THRESHOLD)
+    args = parser.parse_args()
+
+    results = {'machine':{'python':platform.python_version(),'platform':platform.platform(),
+                          'numpy':np.__version__},
+               'seed':SEED, 'benchmarks':[]}
+
+    group = None
+    for (name, grp, rounds, iterations, setup) in _BENCHMARKS:
+        if not args.filter in name:
+            continue
+        if grp != group:
+            group = grp
+            print('---- %s ----' % group)
+        stats = run(name,rounds,iterations,setup)
+        stats['group'] = grp
+        results['benchmarks'].append(stats)
+        print('%-32s %10.2f us  (stddev %.2f us, %d x %d)' %
+              (name,stats['median']*1e6,stats['stddev']*1e6,rounds,iterations))
+
+    if args.save:
+        with open(args.save,'w') as file:
+            json.dump(results,file,indent=1,sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        print('---- compared to %s ----' % args.compare)
+        failed = compare(results,baseline,args.threshold)
+        if failed:
+            print('%d benchmark(s) regressed by more than %.0f%%' % (len(failed),args.threshold*100))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -11,6 +11,8 @@ post a question on Piazza."""
 from constants import *
 from game2d import *
 from play import *
+from network import *
+from simulation import *
 
 
 # PRIMARY RULE: Breakout can only access attributes in play.py via getters/setters
@@ -49,8 +51,9 @@ class Breakout(GameApp):
                 the user input, used to control the paddle and change state
         _state  [one of STATE_INACTIVE, STATE_COUNTDOWN, STATE_PAUSED, STATE_ACTIVE]:
                 the current state of the game represented a value from constants.py
-        _game   [Play, or None if there is no game currently active]: 
+        _game   [Play or ThreadedPlay, or None if there is no game currently active]: 
                 the controller for a single game, which manages the paddle, ball, and bricks
+                (a ThreadedPlay if SIM_THREADED, see simulation.py)
         _mssg   [GLabel, or None if there is no message to display]
                 the currently active message
     
@@ -70,18 +73,31 @@ class Breakout(GameApp):
          _frames  [integer>=0]:
                   the number of frames that have elapsed since the state was switched
                   to STATE_COUNTDOWN
-        last_key  [integer>=0]:
-                  the number of keys detected at the last frame.
         _mssg2    [GLabel, or None if there is no message to dispay]
                   the current score that the play hit
         _mssg3    [GLabel,or None if there is no message to display]
+        _hudcount [int >= 0, or None if there is no game]
+                  the number of remaining bricks shown in _mssg2
         _music1   [Sound, or None if there is no music to display]
                   the sound was played when hit the paddle
         _music2   [Sound, or None if there is no music to display]
                   the sound was played when hit the bricks
+        _level    [array of brick records, or None to play the brick grid]
+                  the level loaded from LEVEL_FILE (None if it is a level pack)
+        _pack     [LevelPack, or None if LEVEL_FILE is not a level pack]
+                  the levels to cycle through, one per game
+        _levelnum [int >= 0]:
+                  the number of games started from the level pack
+        _events   [EventQueue]
+                  the ball events of every game, drained once per frame
+        _remote   [GameClient, or None if the game is played locally]
+                  the connection to the server of a networked game (see network.py)
+        _remotetext [str, or None if there is no message]
+                  the text of _mssg in STATE_REMOTE, so it is only rebuilt on a change
     Additional INVARIANTS:
         _mssg2 is only None if _state is STATE_INACTIVE
         _mssg3 is only not None if _state is STATE_COMPLETE
+        _remote is only not None if _state is STATE_REMOTE
     
     """
     
@@ -105,11 +121,25 @@ class Breakout(GameApp):
         self._mssg=GLabel(text='Welcome and Press Any Key to Play',
                           x=GAME_WIDTH/2.0, y=GAME_HEIGHT/2.0,font_name='Zapfino.ttf')
         self._frames=0
-        self.last_key=0
         self._mssg2=None
         self._mssg3=None
+        self._hudcount=None
         self._music1=Sound('bounce.wav')
         self._music2=Sound('cup1.wav')
+        self._level=None
+        self._pack=None
+        self._levelnum=0
+        self._events=EventQueue()
+        self._events.listen(EVENT_BRICK,self._onBrick)
+        self._events.listen(EVENT_PADDLE,self._onPaddle)
+        if LEVEL_FILE is not None and is_level_pack(LEVEL_FILE):
+            self._pack=LevelPack(LEVEL_FILE)
+        elif LEVEL_FILE is not None:
+            self._level=load_level(LEVEL_FILE)
+        self._remote=None
+        self._remotetext=None
+        if NET_CONNECT is not None:
+            self._connect(NET_CONNECT)
         
     def update(self,dt):
         """Animates a single frame in the game.
@@ -167,6 +197,18 @@ class Breakout(GameApp):
         You are allowed to add more states if you wish. Should you do so, you should 
         describe them here.
         
+        STATE_COMPLETE: The application switches to this state if the state was
+        STATE_ACTIVE in the previous frame and the game is over.  If LEVEL_FILE is a
+        level pack, a key press switches to STATE_NEWGAME to play the next level in the
+        pack; otherwise the game stays over, as before level packs.
+        
+        STATE_REMOTE: The application starts in this state if NET_CONNECT is the address
+        of a game server (see network.py).  The game is played on the server: every frame
+        sends the arrow keys (or the mouse) to it and shows the state it sent back.  On 
+        the spectator port of a server, the game is only watched.  When the game ends or
+        the server goes away, the application switches to STATE_INACTIVE, and a key press
+        starts a local game.
+        
         Parameter dt: The time in seconds since last update
         Precondition: dt is a number (int or float)
         """
@@ -177,7 +219,13 @@ class Breakout(GameApp):
             if self._state==STATE_NEWGAME:
                self.draw()
         elif self._state==STATE_NEWGAME:
-            self._game=Play()
+            self._events.clear()
+            if SIM_THREADED:
+                self._game=ThreadedPlay(level=self._nextLevel(),events=self._events,
+                                        pointer=PADDLE_POINTER)
+            else:
+                self._game=Play(level=self._nextLevel(),events=self._events,
+                                pointer=PADDLE_POINTER)
             self.messagePlay()
             self._state=STATE_COUNTDOWN
         elif self._state==STATE_COUNTDOWN:
@@ -191,12 +239,10 @@ class Breakout(GameApp):
             self._game.updatePaddle(self.input)
             self.messagePlay()
             old_tries=self._game.getTries()
-            state = self._game.updateBall()
-            if state == "brick":
-                self._music2.play()
-            if state == "paddle":
-                self._music1.play()
-            if len(self._game.getBricks())==0:
+            with profile_scope('updateBall'):
+                self._game.updateBall()
+            self._events.drain()
+            if self._game.getRemaining()==0:
                 self._state=STATE_COMPLETE
             elif old_tries!=self._game.getTries():
                 self._state=(STATE_PAUSED if self._game.getTries()>0 else STATE_COMPLETE)
@@ -204,15 +250,19 @@ class Breakout(GameApp):
             self.messagePlay()
             self._determineState()
         elif self._state==STATE_COMPLETE:
-            if len(self._game.getBricks())==0:
+            if self._game.getRemaining()==0:
                self._mssg=GLabel(text='LOL YOU WIN',x=GAME_WIDTH/2.0,
                                  y=GAME_HEIGHT/2.0,font_name='Zapfino.ttf')
                self._mssg2=None
             else:
-               self._mssg=GLabel(text='Game Over '+'YOU HAVE '+str(len
-                                (self._game.getBricks()))+' BRICKS REMAINING'
+               self._mssg=GLabel(text='Game Over '+'YOU HAVE '+str(self._game.getRemaining())
+                                 +' BRICKS REMAINING'
                                  ,x=GAME_WIDTH/2.0, y=GAME_HEIGHT/2.0)
             self.messagePlay()
+            if not self._pack is None:
+                self._determineState()
+        elif self._state==STATE_REMOTE:
+            self._updateRemote()
             
         # Process the states.  Send to helper methods
         
@@ -233,6 +283,8 @@ class Breakout(GameApp):
             self._game.draw(self.view)
         if self._state==STATE_ACTIVE:    
             self._game.drawBall(self.view)
+        if self._state==STATE_REMOTE:
+            self._remote.draw(self.view)
         if self._mssg2 is not None:
             self._mssg2.draw(self.view)
         if self._mssg3 is not None:
@@ -246,18 +298,121 @@ class Breakout(GameApp):
         This method checks for a key press, and if there is one, changes the state 
         to the next value.  A key press is when a key is pressed for the FIRST TIME.
         We do not want the state to continue to change as we hold down the key.  The
-        user must release the key and press it again to change the state."""
-        curr_keys = self.input.key_count
-        # Only change if we have just pressed the keys this animation frame
-        change=curr_keys >0 and self.last_keys==0
+        user must release the key and press it again to change the state.
+        
+        The presses come from the input events of the last frame, so a press that is
+        released before the frame ends still counts."""
+        # Only change if we have just pressed a key this animation frame
+        change=self.input.press_count>0
         if change:
             # Click happened.  Change the state
             if self._state==STATE_INACTIVE:
                 self._state = STATE_NEWGAME
             if self._state==STATE_PAUSED:
                 self._state=STATE_COUNTDOWN
+            if self._state==STATE_COMPLETE:
+                self._state=STATE_NEWGAME
+                self._mssg3=None
             self._mssg= None
-        self.last_keys=curr_keys
+        
+    def _nextLevel(self):
+        """Returns: the records of the level for a new game, or None for the brick grid
+        
+        If LEVEL_FILE is a level pack, this returns the next level in the pack (going
+        back to the first level after the last one).  Viewing a level in the pack takes
+        the same time no matter how large the pack is."""
+        if self._pack is None:
+            return self._level
+        level=self._pack[self._levelnum%len(self._pack)]
+        self._levelnum+=1
+        return level
+        
+    def _connect(self,address):
+        """Joins the game on a server, switching to STATE_REMOTE
+        
+        If the server cannot be reached, the application stays in STATE_INACTIVE with a
+        message saying so.
+        
+        parameter address: the (host, port) of the server
+        precondition: address is a pair of a str and an int"""
+        try:
+            self._remote=GameClient(address)
+        except socket.error:
+            self._mssg=GLabel(text='Cannot reach the server, press any key to play here',
+                              x=GAME_WIDTH/2.0, y=GAME_HEIGHT/2.0)
+            return
+        self._state=STATE_REMOTE
+        self._mssg=None
+        self._showRemote('Connecting')
+        
+    def _updateRemote(self):
+        """Sends the input to the server and reads its state (STATE_REMOTE)
+        
+        The input is the arrow keys, or the mouse while it is pressed (in pointer mode). 
+        When the game is over or the server hangs up, the connection is closed and the
+        application switches to STATE_INACTIVE."""
+        remote=self._remote
+        move=self.input.held_fraction('right')-self.input.held_fraction('left')
+        pointer=self.input.touch_x if PADDLE_POINTER and self.input.is_touch_down() else None
+        remote.sendInput(move,pointer)
+        remote.poll()
+        if remote.getResult() is not None or not remote.isConnected():
+            if remote.getResult() is True:
+                text='LOL YOU WIN'
+            elif remote.getResult() is False:
+                text='Game Over '+'YOU HAVE '+str(remote.getRemaining())+' BRICKS REMAINING'
+            elif remote.isFull():
+                text='The game is full, press any key to play here'
+            else:
+                text='Lost the server, press any key to play here'
+            remote.close()
+            self._remote=None
+            self._remotetext=None
+            self._mssg2=None
+            self._hudcount=None
+            self._state=STATE_INACTIVE
+            self._mssg=GLabel(text=text,x=GAME_WIDTH/2.0, y=GAME_HEIGHT/2.0)
+            return
+        if not remote.isReady():
+            self._showRemote('Connecting')
+        elif not remote.isServed():
+            self._showRemote(('Watching, ' if remote.isSpectator() else
+                              'Player '+str(remote.getPlayer()+1)+', get ready! ')+
+                             str(remote.getTries())+' chance')
+        else:
+            self._showRemote(None)
+        if remote.isReady() and self._hudcount!=remote.getRemaining():
+            self._hudcount=remote.getRemaining()
+            self._mssg2=GLabel(text='Remaining Bricks '+str(self._hudcount), x=GAME_WIDTH/2.0,
+                               y=GAME_HEIGHT-BRICK_Y_OFFSET/2.0,font_name='Zapfino.ttf')
+        
+    def _showRemote(self,text):
+        """Shows a message in STATE_REMOTE, making a new label only if the text changed
+        
+        parameter text: the message, or None for no message
+        precondition: text is a str or None"""
+        if text!=self._remotetext:
+            self._remotetext=text
+            self._mssg=None if text is None else GLabel(text=text,x=GAME_WIDTH/2.0,
+                                                        y=GAME_HEIGHT/2.0)
+        
+    def _onBrick(self,index,hp):
+        """Plays the brick sound (listener for EVENT_BRICK)
+        
+        parameter index: the brick hit
+        precondition: index is an int
+        parameter hp: the hit points the brick has left
+        precondition: hp is an int"""
+        self._music2.play()
+    
+    def _onPaddle(self,index,offset):
+        """Plays the paddle sound (listener for EVENT_PADDLE)
+        
+        parameter index: the player whose paddle was hit
+        precondition: index is an int
+        parameter offset: the ball x minus the paddle x
+        precondition: offset is a float"""
+        self._music1.play()
         
     def messagePlay(self):
         """ play the message that is wanted on the screen
@@ -266,17 +421,16 @@ class Breakout(GameApp):
         as message changes by time.
         For example. When the state switch to STATE_NEWGAME,
         the we want' Remaining Bricks (number) 'to display
+        
+        The remaining bricks label is only rebuilt when the count changes.
         """
-        if self._state==STATE_NEWGAME:
-            self._mssg2=GLabel(text='Remaining Bricks '+str
-                               (len(self._game.getBricks())), x=GAME_WIDTH/2.0,
-                y=GAME_HEIGHT-BRICK_Y_OFFSET/2.0,font_name='Zapfino.ttf')
+        if self._state==STATE_NEWGAME or (self._state==STATE_ACTIVE and
+                                          self._hudcount!=self._game.getRemaining()):
+            self._hudcount=self._game.getRemaining()
+            self._mssg2=GLabel(text='Remaining Bricks '+str(self._hudcount), x=GAME_WIDTH/2.0,
+                               y=GAME_HEIGHT-BRICK_Y_OFFSET/2.0,font_name='Zapfino.ttf')
         if self._state==STATE_COUNTDOWN:
             self._mssg==None
-        if self._state==STATE_ACTIVE:
-            self._mssg2=GLabel(text='Remaining Bricks '+str
-                               (len(self._game.getBricks())), x=GAME_WIDTH/2.0,
-                               y=GAME_HEIGHT-BRICK_Y_OFFSET/2.0,font_name='Zapfino.ttf')   
         if self._state==STATE_PAUSED:
             self._mssg=GLabel(text='Press Any Key to get a new ball, you have '+
                               str(self._game.getTries())+' chance'
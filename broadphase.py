@@ -0,0 +1,141 @@
+# broadphase.py
+# Rui Chen rc687 and Tian Tan tt474
+# 10/19/2026
+"""Broad phase collision detection for Breakout
+
+The bricks never move, so they are kept in the uniform grid of a BrickField.
+Everything else (the paddle, the balls and any other moving models) is kept in a
+SweepAndPrune, which finds the pairs of objects whose bounding boxes overlap.  Only
+those pairs are passed to the exact tests, such as Paddle.collides.
+
+Sweep and prune sorts the left and right edges of every box along the x axis.  A
+sweep over the sorted edges finds the boxes that overlap in x, and those are then
+tested in y.  The edges stay in the order of the last frame, and objects only move
+a little from one frame to the next, so an insertion sort puts them back in order in
+close to linear time."""
+from constants import *
+
+
+class SweepAndPrune(object):
+    """An instance finds the overlapping bounding boxes of a set of GObjects.
+
+    Objects are added with add, which returns a handle for removing them later.  Call
+    update once per frame, after the objects have moved, to get the overlapping pairs.
+    Boxes that only touch count as overlapping.
+
+    INSTANCE ATTRIBUTES:
+        _objects [list of GObject, or None for free handles]: the objects by handle
+        _free    [list of int]: the free handles, reused by add
+        _boxes   [list of 4-element lists of float]: the box of each handle as
+                 [left, bottom, right, top], refreshed by update
+        _keys    [list of float]: the x coordinate of every box edge, sorted
+        _ends    [list of int]: the edge at each position of _keys, as 2*handle for
+                 a left edge and 2*handle+1 for a right edge
+        _active  [list of int]: the handles open during a sweep (always empty between)
+        _pairs   [list of pairs of GObject]: the pairs found by the last update
+    """
+
+    # GETTERS AND SETTERS
+    def getPairs(self):
+        """Return: the pairs of objects that overlapped at the last update
+
+        This list is reused by every update.  Do not modify it."""
+        return self._pairs
+
+    def __len__(self):
+        """Return: the number of objects"""
+        return len(self._ends)/2
+
+    # INITIALIZER
+    def __init__(self):
+        """Initializer: creates an empty broad phase"""
+        self._objects=[]
+        self._free=[]
+        self._boxes=[]
+        self._keys=[]
+        self._ends=[]
+        self._active=[]
+        self._pairs=[]
+
+    # OBJECT METHODS
+    def add(self,obj):
+        """Adds an object and returns its handle
+
+        The new edges go at the end of the lists; the next update sorts them in.
+
+        parameter obj: the object to add
+        precondition: obj is a GObject not already added"""
+        if self._free:
+            handle=self._free.pop()
+            self._objects[handle]=obj
+        else:
+            handle=len(self._objects)
+            self._objects.append(obj)
+            self._boxes.append([0.0,0.0,0.0,0.0])
+        self._keys.append(obj.left)
+        self._ends.append(2*handle)
+        self._keys.append(obj.right)
+        self._ends.append(2*handle+1)
+        return handle
+
+    def remove(self,handle):
+        """Removes the object with the given handle
+
+        parameter handle: the handle returned by add
+        precondition: handle is the handle of an object in this broad phase"""
+        assert self._objects[handle] is not None, 'handle %s is not in use' % `handle`
+        ends=self._ends
+        for code in (2*handle+1,2*handle):
+            pos=ends.index(code)
+            del ends[pos]
+            del self._keys[pos]
+        self._objects[handle]=None
+        self._free.append(handle)
+
+    def update(self):
+        """Return: the pairs of objects whose bounding boxes overlap now
+
+        This method reads the boxes of all the objects, sorts their edges again and
+        sweeps them.  The list returned is reused by the next update."""
+        objects=self._objects
+        boxes=self._boxes
+        keys=self._keys
+        ends=self._ends
+        for handle in xrange(len(objects)):
+            obj=objects[handle]
+            if obj is not None:
+                box=boxes[handle]
+                box[0]=obj.left
+                box[1]=obj.bottom
+                box[2]=obj.right
+                box[3]=obj.top
+
+        # Insertion sort, starting from the order of the last frame.
+        # At equal keys, left edges go first so that touching boxes overlap.
+        for ii in xrange(len(ends)):
+            code=ends[ii]
+            key=boxes[code>>1][2*(code&1)]
+            jj=ii-1
+            while jj>=0 and (keys[jj]>key or (keys[jj]==key and ends[jj]&1>code&1)):
+                keys[jj+1]=keys[jj]
+                ends[jj+1]=ends[jj]
+                jj-=1
+            keys[jj+1]=key
+            ends[jj+1]=code
+
+        # Sweep: every box open at a left edge overlaps it in x
+        active=self._active
+        pairs=self._pairs
+        del pairs[:]
+        for code in ends:
+            handle=code>>1
+            if code&1:
+                active.remove(handle)
+                continue
+            box=boxes[handle]
+            for other in active:
+                obox=boxes[other]
+                if obox[1]<=box[3] and box[1]<=obox[3]:
+                    pairs.append((objects[other],objects[handle]))
+            active.append(handle)
+        return pairs
@@ -8,6 +8,7 @@ need to be used in the model, the view, and the controller. As these
 are spread across multiple modules, we separate the constants into
 their own module. This allows all modules to access them."""
 import colormodel
+import os
 import sys
 
 
@@ -29,6 +30,20 @@ PADDLE_HEIGHT = 11
 PADDLE_OFFSET = 30
 #: the move of the paddle in every key input
 PADDLE_V=5
+#: the most paddles in a game (one per player, see network.py)
+PADDLE_MAX_PLAYERS = 4
+#: the color of the paddle of each player
+PADDLE_COLORS = [colormodel.BLACK, colormodel.RED, colormodel.BLUE, colormodel.GREEN]
+#: whether the paddle follows the mouse while it is pressed (the keys always work)
+PADDLE_POINTER = False
+#: the fraction of the distance to the mouse that the paddle covers in a frame (0..1]
+PADDLE_FOLLOW  = 0.5
+#: the largest move of the paddle in a frame when it follows the mouse
+PADDLE_MAX_V   = 24.0
+#: the largest bounce angle off the paddle, in degrees from straight up (at the edges)
+BOUNCE_MAX_ANGLE = 60
+#: the number of bounce angles across the paddle (odd, so the center goes straight up)
+BOUNCE_STEPS = 33
 
 
 ######### BRICK CONSTANTS #########
@@ -50,6 +65,10 @@ BRICK_WIDTH    = GAME_WIDTH / BRICKS_IN_ROW - BRICK_SEP_H
 #: the color of a brick
 BRICK_COLOR =[colormodel.RED, colormodel.RED, colormodel.ORANGE, colormodel.ORANGE, colormodel.YELLOW, colormodel.YELLOW,
               colormodel.GREEN,colormodel.GREEN,colormodel.CYAN,colormodel.CYAN]
+#: the hit points of a brick that cannot be broken (any value <= 0 works)
+BRICK_UNBREAKABLE = -1
+#: the color a multi-hit brick fades to as it is damaged
+BRICK_DAMAGE_COLOR = colormodel.GRAY
 
 
 ######### BALL CONSTANTS #########
@@ -74,6 +93,45 @@ STATE_PAUSED    = 3
 STATE_ACTIVE    = 4
 #: state when the game is over( winning or losing)
 STATE_COMPLETE  = 5
+#: state when the game runs on a server and is only drawn here (see network.py)
+STATE_REMOTE    = 6
+
+#: the level file to play (None to play the classic brick grid)
+LEVEL_FILE = None
+
+
+######### NETWORK CONSTANTS (see network.py) #########
+
+#: the address a server listens on by default (loopback; use '' for the whole LAN)
+NET_HOST    = '127.0.0.1'
+#: the TCP port of the game server
+NET_PORT    = 5555
+#: the seconds between two steps of the game on the server
+NET_TICK    = 1.0/60
+#: the number of players a server waits for by default
+NET_PLAYERS = 2
+#: the number of steps the server waits before serving a ball
+NET_SERVE_TICKS = 180
+#: the TCP port spectators watch a server on
+NET_SPECTATOR_PORT = 5556
+#: the number of steps between two keyframes (full states) for spectators
+NET_KEYFRAME = 60
+#: the most bytes waiting for a spectator before it skips to the next keyframe
+NET_SPECTATOR_BACKLOG = 65536
+#: the number of spectators the load generator opens by default
+NET_LOAD_SPECTATORS = 256
+#: the (host, port) of the server to play on, or None to play locally
+NET_CONNECT = None
+
+
+######### SIMULATION CONSTANTS (see simulation.py) #########
+
+#: whether a local game runs on its own thread, apart from the drawing
+SIM_THREADED = False
+#: the seconds between two steps of a threaded game
+SIM_TICK = 1.0/60
+#: the seconds an input lasts in a threaded game if it is not sent again
+SIM_INPUT_TIMEOUT = 0.1
 
 ######### COMMAND LINE ARGUMENTS TO CHANGE NUMBER OF BRICKS IN ROW #########
 """sys.argv is a list of the command line arguments when you run
@@ -84,9 +142,27 @@ if you start the game typing
     
 Python puts ['breakout.py', '3', '4'] into sys.argv. Below, we 
 take advantage of this fact to change the constants BRICKS_IN_ROW
-and BRICK_ROWS"""
+and BRICK_ROWS.  If you start the game with the name of a level file
+(see levels.py), as in
+
+    python breakout.py level.txt
+
+the game plays that level instead of the grid.  To join a game on a server (see 
+network.py) instead, start it with the address of the server (or of its spectator
+port, to watch), as in
+
+    python breakout.py --connect 127.0.0.1:5555"""
 
 try:
+   if (not sys.argv is None and len(sys.argv) == 3 and sys.argv[1] == '--connect'):
+        net_host, net_port = sys.argv[2].rsplit(':',1)
+        NET_CONNECT = (net_host, int(net_port))
+except: # Play locally
+    pass
+
+try:
+   if (not sys.argv is None and len(sys.argv) == 2 and os.path.isfile(sys.argv[1])):
+        LEVEL_FILE = sys.argv[1]
    if (not sys.argv is None and len(sys.argv) == 3):
         bs_in_row  = int(sys.argv[1])
         brick_rows = int(sys.argv[2])
@@ -99,4 +175,88 @@ except: # Leave the contants alone
     pass
 
 
-######### ADD MORE CONSTANTS (PROPERLY COMMENTED) AS NECESSARY #########
\ No newline at end of file
+######### ADD MORE CONSTANTS (PROPERLY COMMENTED) AS NECESSARY #########
+#: whether the game checks every property set and collision call (False for production;
+#: see models.set_validation)
+VALIDATE = True
+
+######### EVENT CONSTANTS (see events.py) #########
+
+#: event when the ball hits a brick (index: the brick, value: its hit points left)
+EVENT_BRICK  = 0
+#: event when the ball hits a paddle (index: the player, value: ball x minus paddle x, in pixels)
+EVENT_PADDLE = 1
+#: event when the ball hits a wall (index: one of the WALL constants)
+EVENT_WALL   = 2
+#: event when the ball falls below the paddle (index: the tries left)
+EVENT_LOST   = 3
+#: event when the paddle catches a power-up (index: the POWERUP kind)
+EVENT_POWERUP = 4
+#: the number of event types
+EVENT_TYPES  = 5
+
+#: the left wall
+WALL_LEFT  = 0
+#: the right wall
+WALL_RIGHT = 1
+#: the top wall
+WALL_TOP   = 2
+
+#: the number of events a queue holds before the oldest are overwritten
+EVENT_CAPACITY = 256
+
+
+######### POWER-UP CONSTANTS (see PowerUpPool in models.py) #########
+
+#: power-up that widens the paddle
+POWERUP_WIDE  = 0
+#: power-up that adds two more balls
+POWERUP_MULTI = 1
+#: power-up that slows the balls down
+POWERUP_SLOW  = 2
+#: power-up that fires a laser at the bricks above the paddle
+POWERUP_LASER = 3
+#: the number of power-up kinds
+POWERUP_KINDS = 4
+#: the color of each power-up kind
+POWERUP_COLORS = [colormodel.MAGENTA, colormodel.BLUE, colormodel.GREEN, colormodel.RED]
+#: the chance that a destroyed brick drops a power-up
+POWERUP_CHANCE = 0.15
+#: the width of a falling power-up
+POWERUP_WIDTH  = 24
+#: the height of a falling power-up
+POWERUP_HEIGHT = 10
+#: the distance a power-up falls every frame
+POWERUP_SPEED  = 2.0
+#: the number of power-ups of each kind that can fall at once
+POWERUP_POOL   = 16
+#: the number of frames a power-up lasts once caught
+POWERUP_FRAMES = 600
+#: the paddle width multiplier of POWERUP_WIDE
+POWERUP_WIDE_SCALE = 1.5
+#: the ball speed multiplier of POWERUP_SLOW
+POWERUP_SLOW_SCALE = 0.6
+#: the number of frames between laser shots of POWERUP_LASER
+POWERUP_LASER_PERIOD = 30
+#: the most balls that can be in play at once with POWERUP_MULTI
+POWERUP_MAX_BALLS = 9
+
+
+######### PARTICLE CONSTANTS (see ParticleSystem in models.py) #########
+
+#: the most particles alive at once
+PARTICLE_CAPACITY = 2048
+#: the number of particles from a destroyed brick
+PARTICLE_BURST    = 12
+#: the number of frames a particle lives
+PARTICLE_LIFE     = 40
+#: the width and height of a particle
+PARTICLE_SIZE     = 3
+#: the largest starting speed of a particle
+PARTICLE_SPEED    = 3.0
+#: the change in the vertical velocity of a particle every frame
+PARTICLE_GRAVITY  = -0.15
+#: the number of particle colors (the width of the palette texture)
+PARTICLE_PALETTE  = 64
+#: the number of fade steps over the life of a particle (the palette texture height)
+PARTICLE_FADE     = 8
@@ -0,0 +1,345 @@
+# environment.py
+# Rui Chen rc687 and Tian Tan tt474
+# 10/19/2026
+"""Reinforcement learning environments for Breakout
+
+This module wraps a single game (an instance of Play) in the reset()/step(action)
+interface used by Gym.  The game runs headless: there is no window, no countdown and
+no pause between tries.  Each step moves the paddle according to the action, exactly
+as Play.updatePaddle does for the arrow keys, and then calls Play.updateBall.
+
+An observation is a float32 NumPy array.  The first five values are the paddle x
+coordinate, the ball position (x,y) and the ball velocity (vx,vy), in pixels.  The
+rest is the brick mask: 1 for every brick still on the board and 0 for every brick
+that is gone, in the order of the level records.
+
+The reward of a step is REWARD_BRICK for every brick destroyed and REWARD_LOST for
+every try lost.  The episode is done when all of the breakable bricks are gone or
+there are no tries left.
+
+With the pixels option, an observation is instead a uint8 image of the game, drawn
+on the CPU by a SoftwareRenderer (see renderer.py).
+
+The ball events of the game (see events.py) are drained at the end of every step,
+so listeners added to env.game.getEvents() are called once per step.
+
+For speed, the observation arrays are allocated once and overwritten by every call
+to reset or step.  Copy an observation if you need to keep it."""
+import random
+import numpy as np
+from constants import *
+from play import *
+from renderer import *
+
+
+#: the action that leaves the paddle where it is
+ACTION_STAY  = 0
+#: the action that moves the paddle left (like the left arrow key)
+ACTION_LEFT  = 1
+#: the action that moves the paddle right (like the right arrow key)
+ACTION_RIGHT = 2
+#: the number of actions
+ACTION_COUNT = 3
+
+#: the reward for every brick destroyed
+REWARD_BRICK = 1.0
+#: the reward for every try lost
+REWARD_LOST  = -1.0
+
+#: the number of values in an observation before the brick mask
+OBSERVATION_HEADER = 5
+
+
+class ActionInput(object):
+    """An instance replaces the GInput of a game with an agent action.
+
+    Play.updatePaddle only ever asks about the 'left' and 'right' keys.  This class
+    answers from the current action instead of the keyboard.  An action lasts for
+    the whole frame.
+
+    INSTANCE ATTRIBUTES:
+        action [one of ACTION_STAY, ACTION_LEFT, ACTION_RIGHT]: the current action
+    """
+
+    def __init__(self):
+        """**Constructor**: creates an input with the action ACTION_STAY"""
+        self.action = ACTION_STAY
+
+    def is_key_down(self, key):
+        """Returns: True if the action holds down the given arrow key
+
+        Parameter key: the key to test
+        Precondition: key is a string"""
+        if key == 'left':
+            return self.action == ACTION_LEFT
+        if key == 'right':
+            return self.action == ACTION_RIGHT
+        return False
+    
+    def held_fraction(self, key):
+        """Returns: 1.0 if the action holds down the given arrow key, 0.0 otherwise
+        
+        Parameter key: the key to test
+        Precondition: key is a string"""
+        return 1.0 if self.is_key_down(key) else 0.0
+
+
+class BreakoutEnv(object):
+    """An instance is a headless game of Breakout for training an agent.
+
+    The game is a new Play for every episode.  Every step repeats the action for
+    `frameskip` frames and returns the summed reward.  When a try is lost and there
+    are tries left, the ball is served again at once.
+
+    INSTANCE ATTRIBUTES:
+        _level     [array of brick records, or None for the brick grid]: the level
+        _frameskip [int > 0]: the number of frames in a step
+        _maxframes [int > 0, or None]: the frames after which an episode is cut off
+        _game      [Play, or None before the first reset]: the current game
+        _input     [ActionInput]: the input given to the game
+        _obs       [float32 array]: the observation buffer
+        _frames    [int >= 0]: the number of frames in the current episode
+        _info      [dict]: the info returned by step
+        _renderer  [SoftwareRenderer, or None]: the renderer for pixel observations
+    """
+
+    # IMMUTABLE PROPERTIES
+    @property
+    def observation_size(self):
+        """The number of values in an observation.
+
+        **Invariant**: Must be an int > 0."""
+        return self._obs.size
+
+    @property
+    def observation_shape(self):
+        """The shape of an observation.
+
+        **Invariant**: Must be a tuple of ints: (observation_size,) for state
+        observations, or (height, width, channels) for pixel observations."""
+        return self._obs.shape
+
+    @property
+    def action_count(self):
+        """The number of possible actions.
+
+        **Invariant**: Must be ACTION_COUNT."""
+        return ACTION_COUNT
+
+    @property
+    def game(self):
+        """The current game.
+
+        **Invariant**: Must be a Play, or None before the first reset."""
+        return self._game
+
+
+    # BUILT-IN METHODS
+    def __init__(self, level=None, frameskip=1, maxframes=None, pixels=None):
+        """**Constructor**: creates a new environment (call reset to start it).
+
+            :param level: the level to play, or None for the brick grid
+            **Precondition**: None or a NumPy array of BRICK_DTYPE (see levels.py)
+
+            :param frameskip: the number of frames in a step
+            **Precondition**: an int > 0
+
+            :param maxframes: the number of frames after which an episode is done
+            **Precondition**: an int > 0, or None for no limit
+
+            :param pixels: the image size for pixel observations, or None for state
+            **Precondition**: None or a tuple (width, height, channels) of arguments
+            to SoftwareRenderer
+        """
+        assert type(frameskip) == int and frameskip > 0, 'frameskip %s is not valid' % `frameskip`
+        assert maxframes is None or (type(maxframes) == int and maxframes > 0), \
+                'maxframes %s is not valid' % `maxframes`
+        self._level = grid_level() if level is None else level
+        self._frameskip = frameskip
+        self._maxframes = maxframes
+        self._game = None
+        self._input = ActionInput()
+        if pixels is None:
+            self._renderer = None
+            self._obs = np.zeros(OBSERVATION_HEADER+len(self._level),dtype=np.float32)
+        else:
+            self._renderer = SoftwareRenderer(*pixels)
+            self._obs = self._renderer.image
+        self._frames = 0
+        self._info = {'bricks':0, 'lost':0, 'tries':0, 'frames':0}
+
+
+    # PUBLIC METHODS
+    def reset(self, seed=None):
+        """**Returns**: The first observation of a new episode.
+
+            :param seed: the seed for the ball velocity, or None to leave it alone
+            **Precondition**: an int or None
+
+        The ball velocity comes from the random module, so the seed is shared with
+        everything else that uses that module."""
+        if not seed is None:
+            random.seed(seed)
+        self._game = Play(level=self._level)
+        self._game.serveBall()
+        self._frames = 0
+        return self._observe(self._obs)
+
+    def step(self, action):
+        """**Returns**: The tuple (observation, reward, done, info) for one step.
+
+            :param action: the action to take
+            **Precondition**: one of ACTION_STAY, ACTION_LEFT or ACTION_RIGHT
+
+        The info dictionary has the number of bricks destroyed ('bricks') and tries
+        lost ('lost') in this step, the tries left ('tries') and the frames played
+        in the episode ('frames').  The dictionary is reused by every step."""
+        reward, done = self._advance(action)
+        return (self._observe(self._obs), reward, done, self._info)
+
+    def render(self):
+        """**Returns**: An image of the current game, as a uint8 NumPy array.
+
+        With the pixels option this is the current observation.  Otherwise a renderer
+        with the default size is created the first time this method is called."""
+        if self._renderer is None:
+            self._renderer = SoftwareRenderer()
+        return self._renderer.render(self._game)
+
+
+    # HIDDEN METHODS
+    def _advance(self, action):
+        """**Returns**: The pair (reward, done) after playing one step.
+
+            :param action: the action to take
+            **Precondition**: one of ACTION_STAY, ACTION_LEFT or ACTION_RIGHT
+        """
+        assert 0 <= action < ACTION_COUNT, 'action %s is not valid' % `action`
+        game = self._game
+        self._input.action = action
+        remaining = game.getRemaining()
+        tries = game.getTries()
+        lost = 0
+        done = False
+        for ii in xrange(self._frameskip):
+            game.updatePaddle(self._input)
+            game.updateBall()
+            self._frames += 1
+            if game.getTries() != tries:
+                lost += tries-game.getTries()
+                tries = game.getTries()
+                if tries > 0:
+                    game.serveBall()
+            if tries <= 0 or game.getRemaining() == 0:
+                done = True
+                break
+        if not self._maxframes is None and self._frames >= self._maxframes:
+            done = True
+
+        game.getEvents().drain()
+
+        bricks = remaining-game.getRemaining()
+        info = self._info
+        info['bricks'] = bricks
+        info['lost'] = lost
+        info['tries'] = tries
+        info['frames'] = self._frames
+        return (bricks*REWARD_BRICK+lost*REWARD_LOST, done)
+
+    def _observe(self, out):
+        """**Returns**: The given array, filled with the current observation.
+
+            :param out: the array to fill
+            **Precondition**: an array of shape observation_shape, with the dtype
+            of the observations
+        """
+        if self._obs.dtype == np.uint8:
+            image = self._renderer.render(self._game)
+            if not out is image:
+                out[...] = image
+            return out
+        ball = self._game.getBall()
+        out[0] = self._game.getPaddle().x
+        out[1] = ball.x
+        out[2] = ball.y
+        out[3] = ball.getVx()
+        out[4] = ball.getVy()
+        out[OBSERVATION_HEADER:] = self._game.getBricks().getAlive()
+        return out
+
+
+class VectorBreakoutEnv(object):
+    """An instance steps several Breakout environments with one call.
+
+    All of the environments play the same level, so their observations have the same
+    shape and are stacked into one (K,)+observation_shape array.  An environment that is
+    done is reset at once, and the observation returned for it is the first one of its
+    new episode.
+
+    The Play objects are still stepped one after another; what this class saves is
+    the per-call overhead, and every result array is preallocated.
+
+    INSTANCE ATTRIBUTES:
+        _envs    [list of BreakoutEnv]: the environments
+        _obs     [array of shape (K,)+observation_shape]: the observations
+        _rewards [float64 array of length K]: the rewards of the last step
+        _dones   [bool array of length K]: whether each episode ended in the last step
+    """
+
+    # IMMUTABLE PROPERTIES
+    @property
+    def count(self):
+        """The number of environments.
+
+        **Invariant**: Must be an int > 0."""
+        return len(self._envs)
+
+
+    # BUILT-IN METHODS
+    def __init__(self, count, level=None, frameskip=1, maxframes=None, pixels=None):
+        """**Constructor**: creates count environments (call reset to start them).
+
+            :param count: the number of environments
+            **Precondition**: an int > 0
+
+        The other parameters are the same as for BreakoutEnv."""
+        assert type(count) == int and count > 0, 'count %s is not valid' % `count`
+        level = grid_level() if level is None else level
+        self._envs = [BreakoutEnv(level,frameskip,maxframes,pixels) for ii in range(count)]
+        first = self._envs[0]._obs
+        self._obs = np.zeros((count,)+first.shape,dtype=first.dtype)
+        self._rewards = np.zeros(count,dtype=np.float64)
+        self._dones = np.zeros(count,dtype=bool)
+
+
+    # PUBLIC METHODS
+    def reset(self, seed=None):
+        """**Returns**: The first observations of new episodes in every environment.
+
+            :param seed: the seed for the ball velocities, or None to leave it alone
+            **Precondition**: an int or None
+        """
+        if not seed is None:
+            random.seed(seed)
+        for ii in xrange(len(self._envs)):
+            self._envs[ii].reset()
+            self._envs[ii]._observe(self._obs[ii])
+        return self._obs
+
+    def step(self, actions):
+        """**Returns**: The tuple (observations, rewards, dones) for one step.
+
+            :param actions: the action for each environment
+            **Precondition**: a sequence of K actions
+
+        The arrays returned are reused by every step."""
+        assert len(actions) == len(self._envs), 'actions %s do not match the environments' % `actions`
+        for ii in xrange(len(self._envs)):
+            env = self._envs[ii]
+            reward, done = env._advance(actions[ii])
+            self._rewards[ii] = reward
+            self._dones[ii] = done
+            if done:
+                env.reset()
+            env._observe(self._obs[ii])
+        return (self._obs, self._rewards, self._dones)
@@ -0,0 +1,128 @@
+# events.py
+# Rui Chen rc687 and Tian Tan tt474
+# 10/19/2026
+"""Event queue for Breakout
+
+Play reports everything that happens to the ball (bricks, paddle, walls and lost
+tries) as events in an EventQueue.  Any number of listeners (sounds, the score,
+particles, analytics) subscribe to the event types they care about, and the owner of
+the queue drains it once per frame, calling the listeners in the order the events
+happened.
+
+An event is a type (one of the EVENT constants), an int index and a float value.
+The meaning of index and value depends on the type; see constants.py.
+
+The queue is a ring buffer that is allocated once.  Pushing an event writes three
+list slots, and draining it calls each listener with plain arguments, so no object is
+created per event.  If more than EVENT_CAPACITY events are pushed between drains,
+the oldest are overwritten and counted as dropped."""
+from constants import *
+
+
+class EventQueue(object):
+    """An instance is a ring buffer of game events with typed listeners.
+    
+    INSTANCE ATTRIBUTES:
+        _kinds     [list of int]: the type of each event slot
+        _indices   [list of int]: the index of each event slot
+        _values    [list of float]: the value of each event slot
+        _head      [int >= 0]: the total number of events drained or dropped
+        _tail      [int >= _head]: the total number of events pushed
+        _dropped   [int >= 0]: the number of events overwritten before a drain
+        _listeners [list of lists of callables]: the listeners for each event type
+    """
+    
+    # GETTERS AND SETTERS
+    def getCapacity(self):
+        """Return: the number of events the queue holds"""
+        return len(self._kinds)
+    
+    def getDropped(self):
+        """Return: the number of events overwritten before they were drained"""
+        return self._dropped
+    
+    def __len__(self):
+        """Return: the number of events waiting to be drained"""
+        return self._tail-self._head
+    
+    # INITIALIZER
+    def __init__(self,capacity=EVENT_CAPACITY):
+        """Initializer: creates an empty queue with no listeners
+        
+        parameter capacity: the number of events the queue holds
+        precondition: capacity is an int > 0"""
+        assert type(capacity)==int and capacity>0, 'capacity %s is not valid' % `capacity`
+        self._kinds=[0]*capacity
+        self._indices=[0]*capacity
+        self._values=[0.0]*capacity
+        self._head=0
+        self._tail=0
+        self._dropped=0
+        self._listeners=[[] for ii in range(EVENT_TYPES)]
+    
+    # LISTENER METHODS
+    def listen(self,kind,listener):
+        """Subscribes a listener to an event type
+        
+        The listener is called as listener(index,value) for every event of that type
+        when the queue is drained.
+        
+        parameter kind: the event type
+        precondition: kind is one of the EVENT constants
+        parameter listener: the function to call
+        precondition: listener is a callable taking two arguments"""
+        assert 0<=kind<EVENT_TYPES, 'kind %s is not an event type' % `kind`
+        self._listeners[kind].append(listener)
+    
+    def unlisten(self,kind,listener):
+        """Unsubscribes a listener from an event type (if it was subscribed)
+        
+        parameter kind: the event type
+        precondition: kind is one of the EVENT constants
+        parameter listener: the function to remove
+        precondition: listener is a callable"""
+        if listener in self._listeners[kind]:
+            self._listeners[kind].remove(listener)
+    
+    # QUEUE METHODS
+    def push(self,kind,index=0,value=0.0):
+        """Adds an event to the queue, overwriting the oldest if it is full
+        
+        parameter kind: the event type
+        precondition: kind is one of the EVENT constants
+        parameter index: the event index
+        precondition: index is an int
+        parameter value: the event value
+        precondition: value is an int or float"""
+        slot=self._tail%len(self._kinds)
+        self._kinds[slot]=kind
+        self._indices[slot]=index
+        self._values[slot]=value
+        self._tail+=1
+        if self._tail-self._head>len(self._kinds):
+            self._head+=1
+            self._dropped+=1
+    
+    def drain(self):
+        """Calls the listeners for every waiting event, oldest first, and empties the queue
+        
+        Events pushed by a listener are drained in the same call.
+        
+        Return: the number of events drained"""
+        kinds=self._kinds
+        indices=self._indices
+        values=self._values
+        listeners=self._listeners
+        size=len(kinds)
+        count=0
+        while self._head<self._tail:
+            slot=self._head%size
+            self._head+=1
+            count+=1
+            for listener in listeners[kinds[slot]]:
+                listener(indices[slot],values[slot])
+        return count
+    
+    def clear(self):
+        """Empties the queue without calling any listeners"""
+        self._head=self._tail
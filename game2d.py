@@ -26,6 +26,10 @@ from kivy.uix.image import Image
 
 # Additional miscellaneous modules
 import os, sys, os.path
+import csv, json
+import struct, zlib
+import threading, Queue
+from timeit import default_timer as _clock
 import numpy as np
 import colormodel
 
@@ -79,6 +83,35 @@ def _in_triangle(p, t):
             _same_side(p, t[4:6], t[0:2], t[2:4]))
 
 
+def _map_box(m, box):
+    """Returns: the bounding box of the given box transformed by m
+    
+    Parameter m: The transform
+    Precondition: m is a GMatrix
+    
+    Parameter box: The box to transform
+    Precondition: box is a tuple (left,bottom,right,top) of numbers
+    """
+    p0 = m._transform(box[0],box[1])
+    p1 = m._transform(box[2],box[1])
+    p2 = m._transform(box[2],box[3])
+    p3 = m._transform(box[0],box[3])
+    return (min(p0[0],p1[0],p2[0],p3[0]),min(p0[1],p1[1],p2[1],p3[1]),
+            max(p0[0],p1[0],p2[0],p3[0]),max(p0[1],p1[1],p2[1],p3[1]))
+
+
+def _overlaps(a, b):
+    """Returns: True if the boxes a and b overlap (touching counts)
+    
+    Parameter a: A box
+    Precondition: a is a tuple (left,bottom,right,top) of numbers
+    
+    Parameter b: A box
+    Precondition: b is a tuple (left,bottom,right,top) of numbers
+    """
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
 def _is_num(x):
     """Returns: True if x is an int or float; False otherwise.
     
@@ -99,8 +132,7 @@ def _is_num_tuple(t,size):
     Precondition: size is an int >= 0
     """
     try:
-        return len(t) == size and reduce(lambda x, y: x and y, map(lambda z: type(z) in [int, float], t))
-
+        return len(t) == size and all(type(z) in [int, float] for z in t)
     except:
         return False
 
@@ -117,12 +149,66 @@ def _is_point_tuple(t,msize):
     Precondition: msize is an int >= 0
     """
     try:
-        return len(t) % 2 == 0 and len(t) > msize and \
-            reduce(lambda x, y: x and y, map(lambda z: type(z) in [int, float], t))
+        return len(t) % 2 == 0 and len(t) > msize and all(type(z) in [int, float] for z in t)
     except:
         return False
 
 
+def _is_num_array(t,size):
+    """Returns: True if t is a NumPy array of the given number of finite floats
+    
+    The array must be one-dimensional with a float dtype.  The test is a single 
+    dtype, shape and isfinite check, not a loop over the elements.
+    
+    Parameter t: The value to test
+    Precondition: NONE
+    
+    Parameter size: The size of the array
+    Precondition: size is an int >= 0
+    """
+    return (type(t) == np.ndarray and t.dtype.kind == 'f' and t.shape == (size,) and
+            bool(np.isfinite(t).all()))
+
+
+def _is_point_array(t,msize):
+    """Returns: True if t is a NumPy point array (i.e. an even array of finite floats)
+    
+    The array must be one-dimensional with a float dtype, and its size must be 
+    greater than msize, or the function returns False.  The test is a single dtype,
+    shape and isfinite check, not a loop over the elements.
+    
+    Parameter t: The value to test
+    Precondition: NONE
+    
+    Parameter msize: The minimum size of the array
+    Precondition: msize is an int >= 0
+    """
+    return (type(t) == np.ndarray and t.dtype.kind == 'f' and t.ndim == 1 and 
+            t.size % 2 == 0 and t.size > msize and bool(np.isfinite(t).all()))
+
+
+def _as_points(t):
+    """Returns: the points t as a tuple (converting them if they are an array)
+    
+    Parameter t: The points to convert
+    Precondition: t is a tuple of numbers or a NumPy array of floats
+    """
+    return t if type(t) == tuple else tuple(t.tolist())
+
+
+def _extent(t):
+    """Returns: twice the largest absolute value in t (or 0 if they are all 0)
+    
+    This is the size of the smallest box centered on the origin that contains t.
+    
+    Parameter t: The coordinates to measure
+    Precondition: t is a tuple of numbers or a NumPy array of floats
+    """
+    if type(t) == np.ndarray:
+        return 2*max(float(t.max()),-float(t.min()),0)
+    return 2*max(max(t),-min(t),0)
+
+
 def _is_gobject_list(g):
     """Returns: True if g is a sequence of GObjects
     
@@ -130,7 +216,7 @@ def _is_gobject_list(g):
     Precondition: NONE
     """
     try:
-        return len(g) >= 0 and reduce(lambda x, y: x and y, map(lambda z: isinstance(z,GObject), g))
+        return len(g) >= 0 and all(isinstance(z,GObject) for z in g)
     except:
         return False
 
@@ -187,6 +273,177 @@ def _is_sound_file(name):
     return os.path.exists(SOUND_PATH+'/'+name)
 
 
+################# VALIDATION #################
+pass
+# #mark VALIDATION
+
+#: check the values given to every property and method (the default)
+VALIDATE_FULL = 1
+#: skip the checks on the properties set every frame (for production)
+VALIDATE_NONE = 0
+
+# Whether the hot properties are checked (see _set_checked)
+_CHECKED = True
+
+
+def _set_checked(level):
+    """Sets how much the values given to GObjects are checked.
+    
+        :param level: the validation level
+        **Precondition**: one of VALIDATE_FULL or VALIDATE_NONE
+    
+    With VALIDATE_FULL, every property set is checked by an assert.  With
+    VALIDATE_NONE, the properties set every frame (the position, size, angle, scale,
+    line width and points of a GObject) are not checked at all, so a bad value is
+    only caught, if at all, by Kivy.  Colors are only checked the first time they
+    are seen either way.
+    
+    This is hidden, as the level of the models must change with it: call 
+    `models.set_validation` instead, once at startup, before the game starts.
+    Running Python with -O removes all of the checks, no matter the level."""
+    global _CHECKED
+    assert level in (VALIDATE_FULL, VALIDATE_NONE), 'level %s is not valid' % `level`
+    _CHECKED = level == VALIDATE_FULL
+
+
+def get_validation():
+    """**Returns**: The current validation level (VALIDATE_FULL or VALIDATE_NONE)"""
+    return VALIDATE_FULL if _CHECKED else VALIDATE_NONE
+
+
+################# COLOR CACHE #################
+pass
+# #mark COLOR CACHE
+
+# The number of entries in each color cache before it is pruned
+_COLOR_LIMIT = 4096
+
+# The shared Color instructions, by RGBA tuple
+_COLORS = {}
+
+# The number of objects using each shared Color instruction, by id of the instruction
+_USES = {}
+
+# The size of _COLORS that triggers the next prune (see _prune_colors)
+_prune_at = _COLOR_LIMIT
+
+# The RGBA tuples of the tuple, list and string colors already converted
+_RGBA = {}
+
+
+def _to_rgba(c):
+    """Returns: the color c as a tuple of 4 floats
+    
+    Tuples, lists and strings are checked and converted only the first time they
+    are seen.  After that the result comes from a cache.
+    
+    Parameter c: The color to convert
+    Precondition: c satisfies `_is_color`"""
+    if type(c) in [colormodel.RGB, colormodel.HSV]:
+        return tuple(c.glColor())
+    
+    key = tuple(c) if type(c) == list else c
+    if key in _RGBA:
+        return _RGBA[key]
+    
+    assert _is_color(c), 'value %s is not a valid color' % `c`
+    if type(c) == str:
+        if c[0] == '#':
+            rgba = tuple(colormodel.RGB.CreateWebColor(c).glColor())
+        else:
+            rgba = tuple(colormodel.RGB.CreateName(c).glColor())
+    elif len(c) == 3:
+        rgba = (float(c[0]),float(c[1]),float(c[2]),1.0)
+    else:
+        rgba = (float(c[0]),float(c[1]),float(c[2]),float(c[3]))
+    
+    if len(_RGBA) >= _COLOR_LIMIT:
+        _RGBA.clear()
+    _RGBA[key] = rgba
+    return rgba
+
+
+def _intern_color(rgba):
+    """Returns: the shared Color instruction for the given color
+    
+    Every GObject of the same color uses the same Color instruction.  These
+    instructions must never be changed, except by `recolor`.  An object that keeps
+    the instruction must count itself with `_use_color`.
+    
+    Parameter rgba: The color
+    Precondition: rgba is a tuple of 4 floats between 0 and 1"""
+    color = _COLORS.get(rgba)
+    if color is None:
+        if len(_COLORS) >= _prune_at:
+            _prune_colors()
+        color = Color(rgba[0],rgba[1],rgba[2],rgba[3])
+        _COLORS[rgba] = color
+        _USES[id(color)] = 0
+    return color
+
+
+def _use_color(new, old):
+    """Moves one use of a shared Color instruction from old to new
+    
+    The uses are only counted when an object changes color.  An object that is 
+    thrown away still counts as a use of its colors, so those instructions are kept
+    a little longer than needed, but never dropped while they are used.
+    
+    Parameter new: The instruction now used
+    Precondition: new is a shared Color (see `_intern_color`)
+    
+    Parameter old: The instruction no longer used, or None
+    Precondition: old is None or a shared Color"""
+    key = id(new)
+    _USES[key] = _USES.get(key,0)+1
+    if not old is None:
+        key = id(old)
+        if key in _USES:
+            _USES[key] -= 1
+            # An instruction that recolor took out of the cache is forgotten once unused
+            if _USES[key] == 0 and not _COLORS.get(tuple(old.rgba)) is old:
+                del _USES[key]
+
+
+def _prune_colors():
+    """Drops the shared Color instructions that no object uses any more
+    
+    An instruction still used by an object is kept, so that `recolor` still finds 
+    it and new objects of that color still share it.  If most instructions are in 
+    use, the cache grows past _COLOR_LIMIT, and the next prune waits until it has 
+    doubled, so that a new color does not rescan the whole cache every time."""
+    global _prune_at
+    unused = [rgba for (rgba, color) in _COLORS.iteritems() if _USES.get(id(color),0) == 0]
+    for rgba in unused:
+        _USES.pop(id(_COLORS.pop(rgba)),None)
+    _prune_at = max(_COLOR_LIMIT,2*len(_COLORS))
+
+
+def recolor(old, new):
+    """Changes every object drawn in the color old to the color new.
+    
+        :param old: the color to replace
+        **Precondition**: a valid color (see `GObject.fillcolor`)
+        
+        :param new: the replacement color
+        **Precondition**: a valid color (see `GObject.fillcolor`)
+    
+    Objects of the same color share one Color instruction, so this is a single
+    update no matter how many objects there are.  Both fill and line colors change.
+    The text of a `GLabel` keeps its color until the label is laid out again.
+    
+    If some objects already had the color new, they keep their own instruction.  A
+    later call to recolor them will only change one of the two groups."""
+    old = _to_rgba(old)
+    new = _to_rgba(new)
+    if old == new or not old in _COLORS:
+        return
+    color = _COLORS.pop(old)
+    color.rgba = new
+    if not new in _COLORS:
+        _COLORS[new] = color
+
+
 ################# GEOMETRY PRIMITIVES #################
 pass
 # #mark GEOMETRY PRIMITIVES
@@ -525,6 +782,10 @@ class GMatrix(object):
 pass 
 # #mark RECTANGULAR PRIMITIVES
 
+# The number of instructions GObject._reset puts at the start of every drawing cache
+_HEADER_SIZE = 4
+
+
 class GObject(object):
     """Instances provide basic geometry information for drawing to a `GView`
     
@@ -532,6 +793,19 @@ class GObject(object):
     of the subclasses: `GRectangle`, `GEllipse`, `GImage`, `GLabel`, `GTriangle`,
     `GPolygon`, or `GPath`."""
     
+    # The GScene containing this object (a class attribute, as some subclasses set
+    # their properties before calling the GObject constructor)
+    _parent = None
+    
+    # The shared Color instructions of the fill and the border (None until set)
+    _fillcolor = None
+    _linecolor = None
+    
+    # Whether the drawing cache has the fill color right after the header, and whether
+    # it always has the border color before the border (see _patch_fill)
+    _fillslot = True
+    _linealways = False
+    
     # MUTABLE PROPERTIES 
     @property
     def x(self):
@@ -542,9 +816,11 @@ class GObject(object):
     
     @x.setter
     def x(self,value):
-        assert _is_num(value), 'value %s is not a number' % `value`
+        assert not _CHECKED or _is_num(value), 'value %s is not a number' % `value`
         self._trans.x = float(value)
         self._mtrue = False
+        if not self._parent is None:
+            self._moved()
     
     @property
     def y(self):
@@ -555,9 +831,11 @@ class GObject(object):
     
     @y.setter
     def y(self,value):
-        assert _is_num(value), 'value %s is not a number' % `value`
+        assert not _CHECKED or _is_num(value), 'value %s is not a number' % `value`
         self._trans.y = float(value)
         self._mtrue = False
+        if not self._parent is None:
+            self._moved()
     
     @property
     def width(self):
@@ -570,11 +848,13 @@ class GObject(object):
     
     @width.setter
     def width(self,value):
-        assert _is_num(value), 'value %s is not a number' % `value`
+        assert not _CHECKED or _is_num(value), 'value %s is not a number' % `value`
         assert value > 0, 'value %s is not positive' % `value`
         self._width = float(value)
+        if not self._parent is None:
+            self._moved()
         if self._defined:
-            self._reset()
+            self._resize()
     
     @property
     def height(self):
@@ -587,11 +867,13 @@ class GObject(object):
     
     @height.setter
     def height(self,value):
-        assert _is_num(value), 'value %s is not a number' % `value`
+        assert not _CHECKED or _is_num(value), 'value %s is not a number' % `value`
         assert value > 0, 'value %s is not positive' % `value`
         self._height = float(value)
+        if not self._parent is None:
+            self._moved()
         if self._defined:
-            self._reset()
+            self._resize()
     
     @property
     def scale(self):
@@ -611,7 +893,7 @@ class GObject(object):
     @scale.setter
     def scale(self,value):
         # Do some checking here
-        assert _is_num(value) or _is_num_tuple(value,2), \
+        assert not _CHECKED or _is_num(value) or _is_num_tuple(value,2), \
                 'value %s is not a valid scaling factor' % `value`
         if _is_num(value):
             self._scale.x = float(value)
@@ -620,6 +902,8 @@ class GObject(object):
             self._scale.x = float(value[0])
             self._scale.y = float(value[1])
         self._mtrue = False
+        if not self._parent is None:
+            self._moved()
     
     @property
     def angle(self):
@@ -632,11 +916,13 @@ class GObject(object):
     
     @angle.setter
     def angle(self,value):
-        assert _is_num(value), 'value %s is not a number' % `value`
+        assert not _CHECKED or _is_num(value), 'value %s is not a number' % `value`
         diff = np.allclose([self._rotate.angle],[value])
         self._rotate.angle = float(value)
         if not diff:
             self._mtrue = False
+        if not self._parent is None:
+            self._moved()
     
     @property
     def fillcolor(self):
@@ -657,20 +943,14 @@ class GObject(object):
     
     @fillcolor.setter
     def fillcolor(self,value):
-        assert _is_color(value), 'value %s is not a valid color' % `value`
-        if type(value) in [tuple, list] and len(value) == 3:
-            value = list(value)+[1.0]
-        elif type(value) in [colormodel.RGB, colormodel.HSV]:
-            value = value.glColor()
-        elif type(value) == str:
-            if value[0] == '#':
-                value = RGB.CreateWebColor(c).glColor()
-            else:
-                value = RGB.CreateName(c).glColor()
-        
-        self._fillcolor = Color(value[0],value[1],value[2],value[3])
+        color = _intern_color(_to_rgba(value))
+        old = self._fillcolor
+        if color is old:
+            return
+        self._fillcolor = color
+        _use_color(color,old)
         if self._defined:
-            self._reset()
+            self._patch_fill(old)
     
     @property
     def linecolor(self):
@@ -688,20 +968,14 @@ class GObject(object):
     
     @linecolor.setter
     def linecolor(self,value):
-        assert _is_color(value), 'value %s is not a valid color' % `value`
-        if type(value) in [tuple, list] and len(value) == 3:
-            value = list(value)+[1.0]
-        elif type(value) in [colormodel.RGB, colormodel.HSV]:
-            value = value.glColor()
-        elif type(value) == str:
-            if value[0] == '#':
-                value = RGB.CreateWebColor(c).glColor()
-            else:
-                value = RGB.CreateName(c).glColor()
-        
-        self._linecolor = Color(value[0],value[1],value[2],value[3])
+        color = _intern_color(_to_rgba(value))
+        old = self._linecolor
+        if color is old:
+            return
+        self._linecolor = color
+        _use_color(color,old)
         if self._defined:
-            self._reset()
+            self._patch_line(old)
     
     @property
     def name(self):
@@ -745,7 +1019,7 @@ class GObject(object):
     
     @left.setter
     def left(self,value):
-        assert _is_num(value), 'value %s is not a number' % `value`
+        assert not _CHECKED or _is_num(value), 'value %s is not a number' % `value`
         diff = value-self.left
         self.x += diff
     
@@ -774,7 +1048,7 @@ class GObject(object):
     
     @right.setter
     def right(self,value):
-        assert _is_num(value), 'value %s is not a number' % `value`
+        assert not _CHECKED or _is_num(value), 'value %s is not a number' % `value`
         diff = value-self.right
         self.x += diff
     
@@ -803,7 +1077,7 @@ class GObject(object):
     
     @top.setter
     def top(self,value):
-        assert _is_num(value), 'value %s is not a number' % `value`
+        assert not _CHECKED or _is_num(value), 'value %s is not a number' % `value`
         diff = value-self.top
         self.y += diff
     
@@ -834,7 +1108,7 @@ class GObject(object):
     
     @bottom.setter
     def bottom(self,value):
-        assert _is_num(value), 'value %s is not a number' % `value`
+        assert not _CHECKED or _is_num(value), 'value %s is not a number' % `value`
         diff = value-self.bottom
         self.y += diff
     
@@ -902,6 +1176,8 @@ class GObject(object):
         more information."""
         # Set the properties.
         self._defined = False
+        self._cache = None
+        self._dirty = False
         
         # Create the Kivy transforms for position and size
         self._trans  = Translate(0,0,0)
@@ -1005,13 +1281,128 @@ class GObject(object):
             :param view: view to draw to
             **Precondition**: an *instance of* `GView`
         
-        Ideally, the view should be the one provided by `GameApp`."""
+        Ideally, the view should be the one provided by `GameApp`.
+        
+        If a change since the last draw needs the drawing cache to be rebuilt, it is
+        rebuilt now, once, no matter how many changes there were."""
+        self._refresh()
         view.draw(self._cache)
     
     # HIDDEN METHODS
+    def _moved(self):
+        """Invalidates the cached bounds of every scene containing this object"""
+        node = self._parent
+        while not node is None and not node._bounds is None:
+            node._bounds = None
+            node = node._parent
+    
+    def _box(self):
+        """Returns: the bounding box (left,bottom,right,top) of this object, or None
+        
+        The box is in the coordinates of the parent (the coordinates of x and y)."""
+        return self._transform_box((-self.width/2.0,-self.height/2.0,
+                                    self.width/2.0,self.height/2.0))
+    
+    def _transform_box(self,box):
+        """Returns: the bounding box of the given box under the transform of this object
+        
+            :param box: a box in the coordinates of this object
+            **Precondition**: a tuple (left,bottom,right,top) of numbers
+        """
+        if self._rotate.angle == 0.0 and self._scale.x == 1.0 and self._scale.y == 1.0:
+            x = self._trans.x
+            y = self._trans.y
+            return (box[0]+x,box[1]+y,box[2]+x,box[3]+y)
+        return _map_box(self.matrix,box)
+    
+    def _untransform_box(self,box):
+        """Returns: the bounding box of the given box in the coordinates of this object
+        
+            :param box: a box in the coordinates of the parent
+            **Precondition**: a tuple (left,bottom,right,top) of numbers
+        """
+        if self._rotate.angle == 0.0 and self._scale.x == 1.0 and self._scale.y == 1.0:
+            x = self._trans.x
+            y = self._trans.y
+            return (box[0]-x,box[1]-y,box[2]-x,box[3]-y)
+        return _map_box(self.inverse,box)
+    
+    def _refresh(self):
+        """Rebuilds the drawing cache if it has been invalidated"""
+        if self._dirty:
+            self._reset()
+    
+    def _invalidate(self):
+        """Marks the drawing cache for a rebuild at the next draw.
+        
+        This is for structural changes, which add or remove instructions.  Changes to
+        position, rotation and scale only touch the transforms, and changes to size 
+        patch the existing instructions (see `_resize`).  A change of color swaps one
+        shared `Color` for another in place (see `_patch_fill`)."""
+        self._dirty = True
+    
+    def _resize(self):
+        """Updates the drawing cache after a change in width or height.
+        
+        By default this rebuilds the cache at the next draw.  Subclasses patch their
+        instructions in place instead."""
+        self._invalidate()
+    
+    def _patch_fill(self, old):
+        """Swaps the fill `Color` of the drawing cache in place.
+        
+            :param old: the previous fill color
+            **Precondition**: a shared `Color` (see `_intern_color`)
+        
+        The fill color is the first instruction after the header (if `_fillslot`).  The
+        border color comes right before `_line`, and is left out when it is the same
+        instruction as the fill color (unless `_linealways`).  So the border color is
+        added or removed here when the fill color starts or stops being the same."""
+        group = self._cache
+        if not self._fillslot or group is None or self._dirty:
+            return
+        line = getattr(self,'_line',None)
+        if not line is None and not self._linealways:
+            if self._linecolor is self._fillcolor:
+                # The border color is now the fill color; the first match is the border
+                group.remove(self._linecolor)
+            elif self._linecolor is old:
+                group.insert(group.indexof(line),self._linecolor)
+        group.remove(old)
+        group.insert(_HEADER_SIZE,self._fillcolor)
+    
+    def _patch_line(self, old):
+        """Swaps the border `Color` of the drawing cache in place.
+        
+            :param old: the previous border color
+            **Precondition**: a shared `Color` (see `_intern_color`)
+        
+        See `_patch_fill` for where the colors are in the cache."""
+        group = self._cache
+        line = getattr(self,'_line',None)
+        if line is None or group is None or self._dirty:
+            return
+        if self._linealways or not old is self._fillcolor:
+            if self._fillslot and old is self._fillcolor:
+                # The first match is the fill color; take both out and put the fill back
+                group.remove(old)
+                group.remove(old)
+                group.insert(_HEADER_SIZE,old)
+            else:
+                group.remove(old)
+        if self._linealways or not self._linecolor is self._fillcolor:
+            group.insert(group.indexof(line),self._linecolor)
+    
     def _reset(self):
-        """Resets the drawing cache"""
-        self._cache = InstructionGroup()
+        """Resets the drawing cache
+        
+        The cache keeps the same `InstructionGroup`, so any group it has been added 
+        to (such as a `GScene`) stays valid."""
+        if self._cache is None:
+            self._cache = InstructionGroup()
+        else:
+            self._cache.clear()
+        self._dirty = False
         self._cache.add(PushMatrix())
         self._cache.add(self._trans)
         self._cache.add(self._rotate)
@@ -1043,11 +1434,14 @@ class GRectangle(GObject):
     
     @linewidth.setter
     def linewidth(self,value):
-        assert _is_num(value), 'value %s is not a number' % `value`
+        assert not _CHECKED or _is_num(value), 'value %s is not a number' % `value`
         assert value >= 0, 'value %s is negative' % `value`
         self._linewidth = value
         if self._defined:
-            self._reset()
+            if value > 0 and not self._line is None:
+                self._line.width = value
+            else:
+                self._invalidate()
     
     
     # BUILT-IN METHODS
@@ -1080,17 +1474,30 @@ class GRectangle(GObject):
         x = -self.width/2.0
         y = -self.height/2.0
         
-        fill = Rectangle(pos=(x,y), size=(self.width, self.height))
+        self._fill = Rectangle(pos=(x,y), size=(self.width, self.height))
         self._cache.add(self._fillcolor)
-        self._cache.add(fill)
+        self._cache.add(self._fill)
         
+        self._line = None
         if self.linewidth > 0:
-            line = Line(rectangle=(x,y,self.width,self.height),joint='miter',
-                        close=True,width=self.linewidth)
-            self._cache.add(self._linecolor)
-            self._cache.add(line)
+            self._line = Line(rectangle=(x,y,self.width,self.height),joint='miter',
+                              close=True,width=self.linewidth)
+            if not self._linecolor is self._fillcolor:
+                self._cache.add(self._linecolor)
+            self._cache.add(self._line)
         
         self._cache.add(PopMatrix())
+    
+    def _resize(self):
+        """Patches the fill and border to the new width and height"""
+        if self._dirty or self._cache is None:
+            return
+        x = -self.width/2.0
+        y = -self.height/2.0
+        self._fill.pos  = (x,y)
+        self._fill.size = (self.width,self.height)
+        if not self._line is None:
+            self._line.rectangle = (x,y,self.width,self.height)
 
 
 class GEllipse(GRectangle):
@@ -1157,16 +1564,29 @@ class GEllipse(GRectangle):
         x = -self.width/2.0
         y = -self.height/2.0
         
-        fill = Ellipse(pos=(x,y), size=(self.width,self.height))
+        self._fill = Ellipse(pos=(x,y), size=(self.width,self.height))
         self._cache.add(self._fillcolor)
-        self._cache.add(fill)
+        self._cache.add(self._fill)
         
+        self._line = None
         if self._linewidth > 0:
-            line = Line(ellipse=(x,y,self.width,self.height),close=True,width=self.linewidth)
-            self._cache.add(self._linecolor)
-            self._cache.add(line)
+            self._line = Line(ellipse=(x,y,self.width,self.height),close=True,width=self.linewidth)
+            if not self._linecolor is self._fillcolor:
+                self._cache.add(self._linecolor)
+            self._cache.add(self._line)
         
         self._cache.add(PopMatrix())
+    
+    def _resize(self):
+        """Patches the fill and border to the new width and height"""
+        if self._dirty or self._cache is None:
+            return
+        x = -self.width/2.0
+        y = -self.height/2.0
+        self._fill.pos  = (x,y)
+        self._fill.size = (self.width,self.height)
+        if not self._line is None:
+            self._line.ellipse = (x,y,self.width,self.height)
 
 
 class GImage(GRectangle):
@@ -1202,7 +1622,9 @@ class GImage(GRectangle):
         assert value is None or _is_image_file(value), 'value %s is not an image file' % `value`
         self._source = value
         if self._defined:
-            self._reset()
+            if self._dirty:
+                return
+            self._fill.source = value
     
     
     # BUILT-IN METHODS
@@ -1234,14 +1656,16 @@ class GImage(GRectangle):
         x = -self.width/2.0
         y = -self.height/2.0
         
-        fill = Rectangle(pos=(x,y), size=(self.width, self.height),source=self.source)
+        self._fill = Rectangle(pos=(x,y), size=(self.width, self.height),source=self.source)
         self._cache.add(self._fillcolor)
-        self._cache.add(fill)
+        self._cache.add(self._fill)
         
+        self._line = None
         if self.linewidth > 0:
-            line = Line(rectangle=(x,y,self.width,self.height),joint='miter',close=True,width=self.linewidth)
-            self._cache.add(self._linecolor)
-            self._cache.add(line)
+            self._line = Line(rectangle=(x,y,self.width,self.height),joint='miter',close=True,width=self.linewidth)
+            if not self._linecolor is self._fillcolor:
+                self._cache.add(self._linecolor)
+            self._cache.add(self._line)
         
         self._cache.add(PopMatrix())
 
@@ -1269,6 +1693,9 @@ class GLabel(GRectangle):
     other fonts you will need the .ttf file for the bold version of that font.  See the
     provided `ComicSans.ttf` and `ComicSansBold.ttf` for an example."""
     
+    # The label canvas sets its own color, so the border color is always in the cache
+    _linealways = True
+
     # MUTABLE PROPERTIES
     @property
     def font_size(self):
@@ -1279,7 +1706,7 @@ class GLabel(GRectangle):
     
     @font_size.setter
     def font_size(self,value):
-        assert _is_num(value), 'value %s is not a number' % `value`
+        assert not _CHECKED or _is_num(value), 'value %s is not a number' % `value`
         self._fsize = value
         self._label.font_size = value
         self._label.texture_update()
@@ -1349,7 +1776,7 @@ class GLabel(GRectangle):
         self._halign = value
         self._label.halign = value
         if self._defined:
-            self._reset()
+            self._layout()
     
     @property
     def valign(self):
@@ -1369,7 +1796,7 @@ class GLabel(GRectangle):
         self._valign = value
         self._label.valign = value
         if self._defined:
-            self._reset()
+            self._layout()
     
     
     # REDEFINED PROPERTIES
@@ -1382,9 +1809,11 @@ class GLabel(GRectangle):
     
     @x.setter
     def x(self,value):
-        assert _is_num(value), 'value %s is not a number' % `value`
+        assert not _CHECKED or _is_num(value), 'value %s is not a number' % `value`
         self._trans.x = float(value)
         self._mtrue = False
+        if not self._parent is None:
+            self._moved()
         self._hanchor = 'center'
         self._ha = value
     
@@ -1397,9 +1826,11 @@ class GLabel(GRectangle):
     
     @y.setter
     def y(self,value):
-        assert _is_num(value), 'value %s is not a number' % `value`
+        assert not _CHECKED or _is_num(value), 'value %s is not a number' % `value`
         self._trans.y = float(value)
         self._mtrue = False
+        if not self._parent is None:
+            self._moved()
         self._vanchor = 'center'
         self._hv = value
     
@@ -1428,7 +1859,7 @@ class GLabel(GRectangle):
     
     @left.setter
     def left(self,value):
-        assert _is_num(value), 'value %s is not a number' % `value`
+        assert not _CHECKED or _is_num(value), 'value %s is not a number' % `value`
         diff = value-self.left
         self.x += diff
         self._hanchor = 'left'
@@ -1459,7 +1890,7 @@ class GLabel(GRectangle):
     
     @right.setter
     def right(self,value):
-        assert _is_num(value), 'value %s is not a number' % `value`
+        assert not _CHECKED or _is_num(value), 'value %s is not a number' % `value`
         diff = value-self.right
         self.x += diff
         self._hanchor = 'right'
@@ -1490,7 +1921,7 @@ class GLabel(GRectangle):
     
     @top.setter
     def top(self,value):
-        assert _is_num(value), 'value %s is not a number' % `value`
+        assert not _CHECKED or _is_num(value), 'value %s is not a number' % `value`
         diff = value-self.top
         self.y += diff
         self._vanchor = 'top'
@@ -1523,7 +1954,7 @@ class GLabel(GRectangle):
     
     @bottom.setter
     def bottom(self,value):
-        assert _is_num(value), 'value %s is not a number' % `value`
+        assert not _CHECKED or _is_num(value), 'value %s is not a number' % `value`
         diff = value-self.bottom
         self.y += diff
         self._vanchor = 'bottom'
@@ -1574,10 +2005,20 @@ class GLabel(GRectangle):
     def _callback(self,instance=None,value=None):
         """Workaround to deal with parameter requirements for callbacks"""
         if self._defined:
-            self._reset()
+            self._resize()
     
-    def _reset(self):
-        """Resets the drawing cache"""
+    def _resize(self):
+        """Lays out the text again and patches the fill and border to the new size"""
+        self._layout()
+        GRectangle._resize(self)
+    
+    def _patch_line(self, old):
+        """Swaps the border `Color` in place and gives the text the new color"""
+        self._label.color = self.linecolor
+        GRectangle._patch_line(self,old)
+    
+    def _layout(self):
+        """Sizes and anchors the label around its text"""
         # Set up the label at the center.
         self._label.size = self._label.texture_size
         self._label.center = (0,0)
@@ -1612,20 +2053,25 @@ class GLabel(GRectangle):
             self._label.top = self.height/2.0
         elif self.valign == 'bottom':
             self._label.bottom = -self.height/2.0
-        
+    
+    def _reset(self):
+        """Resets the drawing cache"""
+        self._layout()
         GObject._reset(self)
         x = -self.width/2.0
         y = -self.height/2.0
         
-        fill = Rectangle(pos=(x,y), size=(self.width,self.height))
+        self._fill = Rectangle(pos=(x,y), size=(self.width,self.height))
         self._cache.add(self._fillcolor)
-        self._cache.add(fill)
+        self._cache.add(self._fill)
         self._cache.add(self._label.canvas)
         
+        # The label canvas sets its own color, so the line color is always needed
+        self._line = None
         if self._linewidth > 0:
-            line = Line(rectangle=(x,y,self.width,self.height),joint='miter',close=True,width=self.linewidth)
+            self._line = Line(rectangle=(x,y,self.width,self.height),joint='miter',close=True,width=self.linewidth)
             self._cache.add(self._linecolor)
-            self._cache.add(line)
+            self._cache.add(self._line)
         
         self._cache.add(PopMatrix())
 
@@ -1654,21 +2100,36 @@ class GPath(GObject):
     in the path, shifting the path accordingly.
     """
     
+    # A path has no fill, and its border color is always in the cache
+    _fillslot = False
+    _linealways = True
+
     # MUTABLE PROPERTIES
     @property
     def points(self):
         """The sequence of points that make up this line.
         
-        **Invariant**: Must be a sequence (list or tuple) of int or float. 
-        The length of this sequence must be even with length at least 4."""
+        A NumPy array of floats is kept as it is, without copying it into a tuple, 
+        and handed directly to Kivy.  This is much faster for long paths.  As the
+        array is not copied, assign it again after changing it in place.
+        
+        **Invariant**: Must be a sequence (list or tuple) of int or float, or a
+        one-dimensional NumPy array of finite floats. The length of this sequence 
+        must be even with length at least 4."""
         return self._points
     
     @points.setter
     def points(self,value):
-        assert _is_point_tuple(value,2),'value %s is not a valid list of points' %  `value`
-        self._points = tuple(value)
+        if type(value) == np.ndarray:
+            assert not _CHECKED or _is_point_array(value,2),'value %s is not a valid array of points' %  `value`
+            self._points = value
+        else:
+            assert not _CHECKED or _is_point_tuple(value,2),'value %s is not a valid list of points' %  `value`
+            self._points = tuple(value)
+        if not self._parent is None:
+            self._moved()
         if self._defined:
-            self._reset()
+            self._invalidate()
     
     @property
     def linewidth(self):
@@ -1681,11 +2142,14 @@ class GPath(GObject):
     
     @linewidth.setter
     def linewidth(self,value):
-        assert _is_num(value), 'value %s is not a number' % `value`
+        assert not _CHECKED or _is_num(value), 'value %s is not a number' % `value`
         assert value >= 0, 'value %s is negative' % `value`
         self._linewidth = value
         if self._defined:
-            self._reset()
+            if value > 0 and not self._line is None:
+                self._line.width = value
+            else:
+                self._invalidate()
     
     
     # IMMUTABLE PROPERTIES
@@ -1697,8 +2161,7 @@ class GPath(GObject):
         points in the line AND the origin (0,0).
         
         **Invariant**: Must be an int or float > 0.""" 
-        px = self.points[::2]+(0,0)
-        return 2*max(max(px),-min(px))
+        return _extent(self.points[::2])
     
     @property
     def height(self):
@@ -1708,8 +2171,7 @@ class GPath(GObject):
         points in the line AND the origin (0,0).
         
         **Invariant**: Must be an int or float > 0.""" 
-        py = self.points[1::2]+(0,0)
-        return 2*max(max(py),-min(py))
+        return _extent(self.points[1::2])
     
     
     # BUILT-IN METHODS
@@ -1760,11 +2222,12 @@ class GPath(GObject):
         
         To determine if (x,y) is near the path, we compute the minimum distances
         from (x,y) to the path.  If this distance is less than e-6, we return True."""
-        size = len(self.points)/2
+        points = _as_points(self.points)
+        size = len(points)/2
         epsilon = 1e-6
         for ii in range(size-1):
-            p = self.points[2*ii  :2*ii+2]
-            q = self.points[2*ii+2:2*ii+4]
+            p = points[2*ii  :2*ii+2]
+            q = points[2*ii+2:2*ii+4]
             if p == q:
                 test = np.sqrt((q[0]-x)*(q[0]-x)+(q[1]-y)*(q[1]-y)) < epsilon
             else:
@@ -1782,8 +2245,8 @@ class GPath(GObject):
         """Resets the drawing cache"""
         GObject._reset(self)
         self._cache.add(self._linecolor)
-        line = Line(points=self.points,cap='round',joint='round',width=self.linewidth)
-        self._cache.add(line)
+        self._line = Line(points=self.points,cap='round',joint='round',width=self.linewidth)
+        self._cache.add(self._line)
         self._cache.add(PopMatrix())
 
 
@@ -1803,21 +2266,31 @@ class GTriangle(GPath):
     will add them to the triangle vertices.  Similarly, the attributes `width` and 
     `height` are immutable, and are computed directly from the points"""
     
+    # The fill color is in the cache, as for a GRectangle
+    _fillslot = True
+    _linealways = False
+
     # MUTABLE PROPERTIES
     @property
     def points(self):
         """The sequence of vertices that make up this trianle.
         
-        **Invariant**: Must be a sequence (list or tuple) of int or float. 
-        The length of this sequence must be exactly 6."""
+        **Invariant**: Must be a sequence (list or tuple) of int or float, or a
+        NumPy array of finite floats. The length of this sequence must be exactly 6."""
         return self._points
     
     @points.setter
     def points(self,value):
-        assert _is_num_tuple(value,6),'value %s is not a valid list of points' %  `value`
-        self._points = tuple(value)
+        if type(value) == np.ndarray:
+            assert not _CHECKED or _is_num_array(value,6),'value %s is not a valid array of points' %  `value`
+            self._points = value
+        else:
+            assert not _CHECKED or _is_num_tuple(value,6),'value %s is not a valid list of points' %  `value`
+            self._points = tuple(value)
+        if not self._parent is None:
+            self._moved()
         if self._defined:
-            self._reset()
+            self._invalidate()
     
     
     # BUILT-IN METHODS
@@ -1862,18 +2335,19 @@ class GTriangle(GPath):
         """Resets the drawing cache"""
         GObject._reset(self)
         
-        vertices = ()
-        for x in range(3):
-            # Need to tack on degenerate texture coords
-            vertices += self.points[2*x:2*x+2]+(0,0)
-        mesh = Mesh(vertices=vertices, indices=range(3), mode='triangle_strip')
+        # Need to tack on degenerate texture coords
+        vertices = np.zeros((3,4),dtype=np.float32)
+        vertices[:,:2] = np.reshape(self.points,(3,2))
+        mesh = Mesh(vertices=vertices.ravel(), indices=range(3), mode='triangle_strip')
         self._cache.add(self._fillcolor)
         self._cache.add(mesh)
         
+        self._line = None
         if self.linewidth > 0:
-            line = Line(points=self.points,joint='miter',close=True,width=self.linewidth)
-            self._cache.add(self._linecolor)
-            self._cache.add(line)
+            self._line = Line(points=self.points,joint='miter',close=True,width=self.linewidth)
+            if not self._linecolor is self._fillcolor:
+                self._cache.add(self._linecolor)
+            self._cache.add(self._line)
         
         self._cache.add(PopMatrix())
 
@@ -1902,21 +2376,34 @@ class GPolygon(GPath):
     As with `GPath`, the attributes `width` and `height` are immutable, and are computed 
     directly from the points"""
     
+    # The fill color is in the cache, as for a GRectangle
+    _fillslot = True
+    _linealways = False
+
     # MUTABLE PROPERTIES
     @property
     def points(self):
         """The sequence of points that make up this polygon.
         
-        **Invariant**: Must be a sequence (list or tuple) of int or float. 
-        The length of this sequence must be even with length at least 6."""
+        A NumPy array of floats is kept as it is, as for `GPath`.
+        
+        **Invariant**: Must be a sequence (list or tuple) of int or float, or a
+        one-dimensional NumPy array of finite floats. The length of this sequence 
+        must be even with length at least 6."""
         return self._points
     
     @points.setter
     def points(self,value):
-        assert _is_point_tuple(value,4),'value %s is not a valid list of points' % `value`
-        self._points = tuple(value)
+        if type(value) == np.ndarray:
+            assert not _CHECKED or _is_point_array(value,4),'value %s is not a valid array of points' % `value`
+            self._points = value
+        else:
+            assert not _CHECKED or _is_point_tuple(value,4),'value %s is not a valid list of points' % `value`
+            self._points = tuple(value)
+        if not self._parent is None:
+            self._moved()
         if self._defined:
-            self._reset()
+            self._invalidate()
     
     @property
     def source(self):
@@ -1930,7 +2417,7 @@ class GPolygon(GPath):
         assert value is None or _is_image_file(value), 'value %s is not an image file' % `value`
         self._source = value
         if self._defined:
-            self._reset()
+            self._invalidate()
     
     @property
     def source_width(self):
@@ -1953,7 +2440,7 @@ class GPolygon(GPath):
         assert value is None or _is_num(value), 'value %s is not a valid width' % `value`
         self._source_width = None
         if self._defined:
-            self._reset()
+            self._invalidate()
     
     @property
     def source_height(self):
@@ -1976,7 +2463,7 @@ class GPolygon(GPath):
         assert value is None or _is_num(value), 'value %s is not a valid width' % `value`
         self._source_height = None
         if self._defined:
-            self._reset()
+            self._invalidate()
     
     
     # BUILT-IN METHODS
@@ -2017,9 +2504,10 @@ class GPolygon(GPath):
         
         This method cycles through each triangle in the triangle fan and tests each 
         triangle for inclusion."""
+        points = _as_points(self._points)
         found = False
-        for i in xrange(4,len(self._points),2):
-            t = (0,0)+self.points[i-4:i]
+        for i in xrange(4,len(points),2):
+            t = (0,0)+points[i-4:i]
             found = found or _in_triangle((x,y),t)
         
         return found
@@ -2029,31 +2517,25 @@ class GPolygon(GPath):
     def _make_mesh(self):
         """Creates the mesh for this polygon"""
         size = len(self.points)/2
+        
+        # The fan: the centroid at 0, every point, and back to the first point
+        verts = np.zeros((size+2,4),dtype=np.float32)
+        verts[1:-1,:2] = np.reshape(self.points,(size,2))
+        verts[-1,:2] = verts[1,:2]
         try:
             texture = Image(source=self.source).texture
             texture.wrap = 'repeat'
             tw = float(texture.width)  if self.source_width is None else self.source_width
             th = float(texture.height) if self.source_height is None else self.source_height
             
-            # Centroid at 0, with texture centered
-            verts = (0,0,0.5,0.5) 
-            
-            # Create the fan.
-            for x in range(size):
-                pt = self.points[2*x:2*x+2]
-                self._verts += pt+(pt[0]/tw+0.5,pt[1]/th+0.5)
-            
-            # Come back to the beginning
-            pt = self.points[0:2]
-            verts += pt+(pt[0]/tw+0.5,pt[1]/th+0.5)
-            self._mesh = Mesh(vertices=verts, indices=range(size+2), mode='triangle_fan', texture=texture)
+            # Texture centered on the centroid
+            verts[:,2] = verts[:,0]/tw+0.5
+            verts[:,3] = verts[:,1]/th+0.5
+            self._mesh = Mesh(vertices=verts.ravel(), indices=range(size+2), mode='triangle_fan', texture=texture)
         except BaseException as e:
             # Make all texture coordinates degnerate
-            verts = (0,0,0,0) 
-            for x in range(size):
-                verts += self.points[2*x:2*x+2]+(0,0)
-            verts += self.points[0:2]+(0,0)
-            self._mesh = Mesh(vertices=verts, indices=range(size+2), mode='triangle_fan')
+            verts[:,2:] = 0
+            self._mesh = Mesh(vertices=verts.ravel(), indices=range(size+2), mode='triangle_fan')
     
     def _reset(self):
         """Resets the drawing cache"""
@@ -2063,10 +2545,12 @@ class GPolygon(GPath):
         self._cache.add(self._fillcolor)
         self._cache.add(self._mesh)
         
+        self._line = None
         if self.linewidth > 0:
-            line = Line(points=self.points,joint='miter',close=True,width=self.linewidth)
-            self._cache.add(self._linecolor)
-            self._cache.add(line)
+            self._line = Line(points=self.points,joint='miter',close=True,width=self.linewidth)
+            if not self._linecolor is self._fillcolor:
+                self._cache.add(self._linecolor)
+            self._cache.add(self._line)
         
         self._cache.add(PopMatrix())
 
@@ -2090,8 +2574,23 @@ class GScene(GObject):
     read-only.  These values are computed from the list of GObjects stored in the scene.
     
     All GObjects stored in a GScene are drawn as if the point (x,y) is the origin.
+    
+    Every scene caches the bounding box of its children.  Moving, rotating, scaling or
+    resizing a child invalidates the boxes of the scenes above it, and nothing else.
+    The boxes are used by `width`, `height`, `contains`, `hit` and `query`, which skip
+    every group of children whose box is out of the way.  A scene of groups (of groups)
+    is therefore searched in time close to logarithmic in the number of objects.  An
+    object may only be in one scene at a time.
+    
+    Children may be added and removed one at a time with `add_child`, `insert_child`
+    and `remove_child`.  These patch the drawing cache in place instead of rebuilding
+    it.  To make many changes at once, make them inside a `batch`; the cache is then
+    rebuilt once, the next time the scene is drawn.
     """
     
+    # A scene has no colors of its own in its cache
+    _fillslot = False
+
     # MUTABLE PROPERTIES
     @property
     def children(self):
@@ -2100,15 +2599,27 @@ class GScene(GObject):
         The objects are drawn as if (x,y) is the origin.  Therefore, changing the 
         attributes `x` and `y` will shift all of the children on the screen.
         
+        The tuple returned is cached until the children change.
+        
         **Invariant**: Must be a list or tuple of GObjects (possibly empty)"""
-        return tuple(self._children)
+        if self._tuple is None:
+            self._tuple = tuple(self._children)
+        return self._tuple
     
     @children.setter
     def children(self,value):
         assert _is_gobject_list(value), 'value %s is not a list of GObjects' % `value`
+        for x in self._children:
+            if x._parent is self:
+                x._parent = None
         self._children = list(value)
+        for x in self._children:
+            x._parent = self
+        self._tuple = None
+        self._bounds = None
+        self._moved()
         if self._defined:
-            self._reset()
+            self._invalidate()
     
     
     # IMMUTABLE PROPERTIES
@@ -2120,12 +2631,10 @@ class GScene(GObject):
         objects in this scene (and the center)
         
         **Invariant**: Must be an int or float > 0.""" 
-        max = 0
-        for x in self.children:
-            w = x.x+x.width/2.0
-            if w > max:
-                max = w
-        return max*2
+        box = self._local()
+        if box is None:
+            return 0
+        return 2*max(box[2],-box[0],0)
     
     @property
     def height(self):
@@ -2135,12 +2644,10 @@ class GScene(GObject):
         objects in this scene (and the center)
         
         **Invariant**: Must be an int or float > 0.""" 
-        max = 0
-        for x in self.children:
-            h = x.y+x.height/2.0
-            if h > max:
-                max = h
-        return max*2
+        box = self._local()
+        if box is None:
+            return 0
+        return 2*max(box[3],-box[1],0)
     
     
     # BUILT-IN METHODS
@@ -2159,20 +2666,264 @@ class GScene(GObject):
         This class supports the same keywords as `GObject`, though some of them are 
         unused, as the `width` and `height` attributes are now immutable."""
         self._defined = False
+        self._children = []
+        self._tuple = None
+        self._bounds = None
+        self._boxes = []
+        self._batch = 0
+        self._first = 0
         self.children = keywords['children'] if 'children' in keywords else []
         GObject.__init__(self,**keywords)
         self._reset()
         self._defined = True
     
     
+    # PUBLIC METHODS
+    def add_child(self,obj):
+        """Adds an object to the end of this scene (so it is drawn on top)
+        
+            :param obj: the object to add
+            **Precondition**: a GObject that is not in a scene
+        """
+        self.insert_child(len(self._children),obj)
+    
+    def insert_child(self,index,obj):
+        """Inserts an object into this scene at the given position
+        
+            :param index: the position of the object in `children`
+            **Precondition**: an int in 0..len(children)
+            
+            :param obj: the object to add
+            **Precondition**: a GObject that is not in a scene
+        
+        Objects later in `children` are drawn on top of earlier ones."""
+        assert isinstance(obj,GObject), 'value %s is not a GObject' % `obj`
+        assert obj._parent is None and not obj is self, 'value %s is already in a scene' % `obj`
+        assert 0 <= index <= len(self._children), 'index %s is out of range' % `index`
+        self._children.insert(index,obj)
+        obj._parent = self
+        self._tuple = None
+        
+        # Grow the cached bounds, if they are still valid
+        if not self._bounds is None:
+            box = obj._box()
+            self._boxes.insert(index,box)
+            if not box is None:
+                old = self._bounds
+                if old:
+                    box = (min(old[0],box[0]),min(old[1],box[1]),
+                           max(old[2],box[2]),max(old[3],box[3]))
+                if box != old:
+                    self._bounds = box
+                    self._moved()
+        
+        if self._batch or self._dirty or not self._defined:
+            self._invalidate()
+        else:
+            self._cache.insert(self._first+index,obj._cache)
+    
+    def remove_child(self,obj):
+        """Removes an object from this scene
+        
+            :param obj: the object to remove
+            **Precondition**: a GObject in `children`
+        """
+        assert obj._parent is self, 'value %s is not in this scene' % `obj`
+        index = self._children.index(obj)
+        del self._children[index]
+        obj._parent = None
+        self._tuple = None
+        
+        # The bounds only shrink if the box touched them
+        if not self._bounds is None:
+            box = self._boxes.pop(index)
+            old = self._bounds
+            if not box is None and (box[0] <= old[0] or box[1] <= old[1] or 
+                                    box[2] >= old[2] or box[3] >= old[3]):
+                self._bounds = None
+                self._moved()
+        
+        if self._batch or self._dirty or not self._defined:
+            self._invalidate()
+        else:
+            self._cache.remove(obj._cache)
+    
+    def batch(self):
+        """**Returns**: A context manager that coalesces changes to the children.
+        
+        Use it in a `with` statement, as follows:
+        
+            with scene.batch():
+                for bullet in bullets:
+                    scene.add_child(bullet)
+        
+        Inside the batch, `add_child`, `insert_child` and `remove_child` do not touch
+        the drawing cache.  It is rebuilt once, the next time the scene is drawn.
+        Batches may be nested."""
+        return _GSceneBatch(self)
+    
+    def contains(self,x,y):
+        """**Returns**: True if some object in this scene contains the point (x,y)
+        
+            :param x: x coordinate of point to check
+            **Precondition**: an int or float
+            
+            :param y: y coordinate of point to check
+            **Precondition**: an int or float
+        
+        The point is in the coordinates of the parent of this scene, like `x` and `y`.
+        Groups of children whose bounding box does not contain the point are skipped."""
+        return not self.hit(x,y) is None
+    
+    def hit(self,x,y):
+        """**Returns**: The top-most object in this scene containing the point (x,y)
+        
+            :param x: x coordinate of point to check
+            **Precondition**: an int or float
+            
+            :param y: y coordinate of point to check
+            **Precondition**: an int or float
+        
+        The point is in the coordinates of the parent of this scene, like `x` and `y`.
+        The object returned is never a `GScene`; nested scenes are searched for the 
+        object inside them.  Objects drawn later are on top.  If no object contains 
+        the point, this method returns None.
+        
+        Groups of children whose bounding box does not contain the point are skipped."""
+        box = self._local()
+        if box is None:
+            return None
+        point = self._untransform_box((x,y,x,y))
+        if not _overlaps(box,point):
+            return None
+        px = point[0]
+        py = point[1]
+        for ii in xrange(len(self._children)-1,-1,-1):
+            child = self._children[ii]
+            if self._boxes[ii] is None or not _overlaps(self._boxes[ii],point):
+                continue
+            if isinstance(child,GScene):
+                found = child.hit(px,py)
+                if not found is None:
+                    return found
+            elif child.contains(px,py):
+                return child
+        return None
+    
+    def query(self,left,bottom,right,top):
+        """**Returns**: The list of objects in this scene whose bounding box overlaps a box
+        
+            :param left: the left edge of the box
+            **Precondition**: an int or float
+            
+            :param bottom: the bottom edge of the box
+            **Precondition**: an int or float <= top
+            
+            :param right: the right edge of the box
+            **Precondition**: an int or float >= left
+            
+            :param top: the top edge of the box
+            **Precondition**: an int or float
+        
+        The box is in the coordinates of the parent of this scene, like `x` and `y`.
+        The objects returned are never a `GScene`; nested scenes are searched for the 
+        objects inside them.  They are in drawing order.  Boxes that only touch count
+        as overlapping.
+        
+        Use this to cull a scene to the visible area, or as the broad phase of a 
+        collision test.  Groups of children whose bounding box does not overlap the 
+        box are skipped."""
+        result = []
+        self._query((left,bottom,right,top),result)
+        return result
+    
+    
     # HIDDEN METHODS
+    def _local(self):
+        """Returns: the bounding box of the children (or None if there are none)
+        
+        The box is (left,bottom,right,top) in the coordinates of this scene, and it is
+        cached until a child changes.  The box of each child is cached in `_boxes`."""
+        if self._bounds is None:
+            boxes = [x._box() for x in self._children]
+            self._boxes = boxes
+            found = [b for b in boxes if not b is None]
+            if found:
+                self._bounds = (min(b[0] for b in found),min(b[1] for b in found),
+                                max(b[2] for b in found),max(b[3] for b in found))
+            else:
+                self._bounds = ()
+        return self._bounds if self._bounds else None
+    
+    def _box(self):
+        """Returns: the bounding box (left,bottom,right,top) of this scene, or None
+        
+        The box is in the coordinates of the parent.  It is None if the scene is empty."""
+        box = self._local()
+        if box is None:
+            return None
+        return self._transform_box(box)
+    
+    def _query(self,box,result):
+        """Appends the objects whose bounding box overlaps the given box to result
+        
+            :param box: the box to test, in the coordinates of the parent
+            **Precondition**: a tuple (left,bottom,right,top) of numbers
+            
+            :param result: the list to add to
+            **Precondition**: a list
+        """
+        local = self._local()
+        if local is None:
+            return
+        box = self._untransform_box(box)
+        if not _overlaps(local,box):
+            return
+        for ii in xrange(len(self._children)):
+            child = self._children[ii]
+            if self._boxes[ii] is None or not _overlaps(self._boxes[ii],box):
+                continue
+            if isinstance(child,GScene):
+                child._query(box,result)
+            else:
+                result.append(child)
+    
+    def _refresh(self):
+        """Rebuilds the drawing caches of the children, and then this one, if invalid"""
+        for x in self._children:
+            x._refresh()
+        GObject._refresh(self)
+    
     def _reset(self):
         """Resets the drawing cache"""
         GObject._reset(self)
-        for x in self.children:
+        self._first = len(self._cache.children)
+        for x in self._children:
             self._cache.add(x._cache)
         self._cache.add(PopMatrix())
 
+
+class _GSceneBatch(object):
+    """A context manager for a batch of changes to the children of a `GScene`.
+    
+    See `GScene.batch`."""
+    
+    def __init__(self, scene):
+        """**Constructor**: Creates a batch for the given scene.
+        
+            :param scene: the scene to change
+            **Precondition**: a GScene
+        """
+        self._scene = scene
+    
+    def __enter__(self):
+        self._scene._batch += 1
+        return self._scene
+    
+    def __exit__(self, type, value, traceback):
+        self._scene._batch -= 1
+        return False
+
 ################# SOUND CLASSES #################
 pass 
 # #mark SOUND CLASSES
@@ -2304,6 +3055,41 @@ class SoundLibrary(object):
 pass 
 # #mark VIEW CLASSES
 
+#: input event: a key was pressed (the key is its name)
+INPUT_KEY_DOWN   = 0
+#: input event: a key was released (the key is its name)
+INPUT_KEY_UP     = 1
+#: input event: the mouse was pressed (x and y are its position)
+INPUT_TOUCH_DOWN = 2
+#: input event: the mouse moved while pressed (x and y are its position)
+INPUT_TOUCH_MOVE = 3
+#: input event: the mouse was released (x and y are its position)
+INPUT_TOUCH_UP   = 4
+
+#: the number of input events a GInput holds in one frame
+INPUT_CAPACITY = 256
+
+# The bit of every key name seen so far (see key_mask)
+_KEY_BITS = {}
+
+
+def key_mask(key):
+    """**Returns**: The bit of the given key in `GInput.key_bits`
+    
+        :param key: the key name
+        **Precondition**: Must be a string.
+    
+    Every key name gets its own bit the first time it is asked for (or pressed).  The
+    bit never changes, so it can be looked up once and then passed to `is_key_down`
+    instead of the name.  Masks may be or-ed together to test several keys at once."""
+    assert type(key) == str, 'value %s is not a string' % `key`
+    mask = _KEY_BITS.get(key)
+    if mask is None:
+        mask = 1 << len(_KEY_BITS)
+        _KEY_BITS[key] = mask
+    return mask
+
+
 class GInput(object):
     """Instances represent an input handler
     
@@ -2311,6 +3097,14 @@ class GInput(object):
     to the user.  To access mouse information, simply access the attribute `touch`.
     To access keyboard information, use the method `is_key_down`.
     
+    Besides this polled state, the handler records every key press and release and
+    every mouse press, move and release as an event with a high resolution timestamp.
+    The events since the last frame can be read in `update` with `pop_event`.  This
+    catches presses shorter than a frame, which polling misses.  Events that are not
+    read by the end of `update` are discarded.  The method `held_fraction` uses the 
+    timestamps to say how much of the last frame a key was held down, so that motion
+    can start and stop at the true time of the press within the frame.
+    
     **You should never construct an object of this class**.  Creating a new instance
     of this class will not properly hook it up to the keyboard and mouse.  Instead, 
     you should only use the one provided in the `input` attribute of `GameApp`. See the 
@@ -2375,7 +3169,31 @@ class GInput(object):
         if self._touch is None:
             return None
         
-        return GPoint(self._touch.x/dp(1),self._touch.y/dp(1))
+        return GPoint(self._touchx,self._touchy)
+    
+    @property
+    def touch_x(self):
+        """The x coordinate of the mouse, if pressed.
+        
+        Unlike `touch`, this does not create an object.  It is a plain float, updated
+        as the mouse moves.  The value is only meaningful while `is_touch_down` is True.
+        
+        **Immutable**: This value cannot be altered.
+        
+        **Invariant**: Must be a float."""
+        return self._touchx
+    
+    @property
+    def touch_y(self):
+        """The y coordinate of the mouse, if pressed.
+        
+        Unlike `touch`, this does not create an object.  It is a plain float, updated
+        as the mouse moves.  The value is only meaningful while `is_touch_down` is True.
+        
+        **Immutable**: This value cannot be altered.
+        
+        **Invariant**: Must be a float."""
+        return self._touchy
     
     @property
     def key_count(self):
@@ -2399,7 +3217,48 @@ class GInput(object):
         **Immutable**: This value cannot be altered.
         
         **Invariant**: Must be a list of strings (possibly empty)"""
-        return tuple(k for (k,v) in self._keystate.iteritems() if v)
+        return tuple(k for (k,bit) in _KEY_BITS.iteritems() if self._keybits & bit)
+    
+    @property
+    def key_bits(self):
+        """The keys that are currently held down, as a bitmask.
+        
+        The bit of each key is given by the function `key_mask`.
+        
+        **Immutable**: This value cannot be altered.
+        
+        **Invariant**: Must be an int >= 0."""
+        return self._keybits
+    
+    @property
+    def press_count(self):
+        """The number of key presses since the last frame.
+        
+        Unlike `key_count`, this counts keys that were pressed and released again 
+        within the frame.  A key held down is only counted in the frame it was pressed.
+        
+        **Immutable**: This value cannot be altered.
+        
+        **Invariant**: Must be an int >= 0."""
+        return self._presscount
+    
+    @property
+    def event_count(self):
+        """The number of events waiting to be read with `pop_event`.
+        
+        **Immutable**: This value cannot be altered.
+        
+        **Invariant**: Must be an int >= 0."""
+        return self._tail-self._head
+    
+    @property
+    def events_dropped(self):
+        """The number of events lost because a frame had more than INPUT_CAPACITY.
+        
+        **Immutable**: This value cannot be altered.
+        
+        **Invariant**: Must be an int >= 0."""
+        return self._dropped
     
     
     # BUILT-IN METHODS
@@ -2413,12 +3272,34 @@ class GInput(object):
         self._view  = None
         self._touch = None
         self._keyboard = None
+        self._touchx = 0.0
+        self._touchy = 0.0
+        self._density = float(dp(1))
         
         self._touch_enabled = True
         self._keyboard_enabled = True
         
-        self._keystate = {}
+        self._keybits = 0
         self._keycount = 0
+        self._presscount = 0
+        self._presses = 0
+        
+        # The event ring buffer
+        self._kinds = [0]*INPUT_CAPACITY
+        self._keys  = [None]*INPUT_CAPACITY
+        self._xs    = [0.0]*INPUT_CAPACITY
+        self._ys    = [0.0]*INPUT_CAPACITY
+        self._times = [0.0]*INPUT_CAPACITY
+        self._head = 0
+        self._tail = 0
+        self._dropped = 0
+        
+        # The press time of every key down, and the time each key was held
+        self._since = {}
+        self._held = {}
+        self._lastheld = {}
+        self._framestart = _clock()
+        self._frametime = 0.0
     
     
     # PUBLIC METHODS
@@ -2435,8 +3316,43 @@ class GInput(object):
         
         For a complete list of key names, see the 
         `Kivy documentation <http://kivy.org/docs/_modules/kivy/core/window.html>`_.
+        
+        The key may also be a mask from `key_mask`, which is a single bit test.  A
+        mask of several keys tests whether any of them is down.
         """
-        return key in self._keystate and self._keystate[key]
+        if type(key) == str:
+            key = _KEY_BITS.get(key,0)
+        return self._keybits & key != 0
+    
+    def held_fraction(self,key):
+        """**Returns**: The fraction of the last frame that the key was held down.
+        
+            :param key: the key to test
+            **Precondition**: Must be a string.
+        
+        The value is between 0 and 1.  It is 1 for a key held down through the whole
+        frame, and in between for a key pressed or released during it, including a key
+        pressed and released within the frame.  Multiply a speed by this value to 
+        move by the time the key was actually down."""
+        if self._frametime <= 0:
+            return 1.0 if self.is_key_down(key) else 0.0
+        return min(self._lastheld.get(key,0.0)/self._frametime,1.0)
+    
+    def pop_event(self):
+        """**Returns**: The oldest unread input event, or None if there are none.
+        
+        An event is a tuple (kind, key, x, y, time).  The kind is one of INPUT_KEY_DOWN,
+        INPUT_KEY_UP, INPUT_TOUCH_DOWN, INPUT_TOUCH_MOVE or INPUT_TOUCH_UP.  For a key
+        event, key is the key name and x, y are 0.  For a mouse event, key is None and
+        (x,y) is the mouse position, as for `touch`.  The time is in seconds, on the same
+        clock as the profiler; only differences between times are meaningful.
+        
+        Holding down a key does not repeat its INPUT_KEY_DOWN event."""
+        if self._head == self._tail:
+            return None
+        slot = self._head % INPUT_CAPACITY
+        self._head += 1
+        return (self._kinds[slot],self._keys[slot],self._xs[slot],self._ys[slot],self._times[slot])
     
     def is_touch_down(self):
         """**Returns**: True if the mouse is currently held down.
@@ -2467,7 +3383,7 @@ class GInput(object):
         if self._view is None:
             return
         self._view.bind(on_touch_down=self._capture_touch)
-        self._view.bind(on_touch_move=self._capture_touch)
+        self._view.bind(on_touch_move=self._move_touch)
         self._view.bind(on_touch_up=self._release_touch)
     
     def _disable_touch(self):
@@ -2475,7 +3391,7 @@ class GInput(object):
         if self._view is None:
             return
         self._view.unbind(on_touch_down=self._capture_touch)
-        self._view.unbind(on_touch_move=self._capture_touch)
+        self._view.unbind(on_touch_move=self._move_touch)
         self._view.unbind(on_touch_up=self._release_touch)
         self._touch = None
     
@@ -2495,8 +3411,9 @@ class GInput(object):
         self._keyboard.unbind(on_key_down=self._capture_key)
         self._keyboard.unbind(on_key_up=self._release_key)
         self._keyboard = None
-        self._keystate = {}
+        self._keybits = 0
         self._keycount = 0
+        self._since.clear()
     
     def _capture_key(self, keyboard, keycode, text, modifiers):
         """Captures a simple keypress and adds it to the key dictionary.
@@ -2514,10 +3431,15 @@ class GInput(object):
             **Precondition**: Must be a list of key codes
         """
         k = keycode[1]
-        # Need to handle the case where a release was dropped
-        if not k in self._keystate or not self._keystate[k]:
+        bit = key_mask(k)
+        # Need to handle the case where a release was dropped (and key repeats)
+        if not self._keybits & bit:
+            now = _clock()
+            self._keybits |= bit
             self._keycount += 1
-        self._keystate[k] = True
+            self._presses += 1
+            self._since[k] = now
+            self._push(INPUT_KEY_DOWN,k,0.0,0.0,now)
         return True
     
     def _release_key(self, keyboard, keycode):
@@ -2529,8 +3451,15 @@ class GInput(object):
             :param keycode: the key pressed
             **Precondition**: Must be a pair of an int (keycode) and a string
         """
-        self._keystate[keycode[1]] = False
-        self._keycount -= 1
+        k = keycode[1]
+        bit = key_mask(k)
+        if self._keybits & bit:
+            now = _clock()
+            self._keybits &= ~bit
+            self._keycount -= 1
+            start = max(self._since.pop(k),self._framestart)
+            self._held[k] = self._held.get(k,0.0)+now-start
+            self._push(INPUT_KEY_UP,k,0.0,0.0,now)
         return True
     
     def _capture_touch(self,view,touch):
@@ -2544,6 +3473,23 @@ class GInput(object):
         """
         self._touch = touch
         #self._touch.grab(self)
+        self._touchx = touch.x/self._density
+        self._touchy = touch.y/self._density
+        self._push(INPUT_TOUCH_DOWN,None,self._touchx,self._touchy,_clock())
+    
+    def _move_touch(self,view,touch):
+        """Captures a the current mouse position as the mouse moves while pressed.
+        
+            :param view: reference to the view window
+            **Precondition**: Must be a GView.
+        
+            :param touch: the information about the mouse move
+            **Precondition**: Must be a TouchEvent
+        """
+        self._touch = touch
+        self._touchx = touch.x/self._density
+        self._touchy = touch.y/self._density
+        self._push(INPUT_TOUCH_MOVE,None,self._touchx,self._touchy,_clock())
     
     def _release_touch(self,view,touch):
         """Releases a the current mouse position from memory.
@@ -2555,6 +3501,58 @@ class GInput(object):
             **Precondition**: Must be a TouchEvent
         """
         self._touch = None
+        self._touchx = touch.x/self._density
+        self._touchy = touch.y/self._density
+        self._push(INPUT_TOUCH_UP,None,self._touchx,self._touchy,_clock())
+    
+    def _push(self,kind,key,x,y,time):
+        """Adds an event to the ring buffer, overwriting the oldest if it is full
+        
+            :param kind: the event kind
+            **Precondition**: Must be one of the INPUT constants
+            
+            :param key: the key name
+            **Precondition**: Must be a string, or None for a mouse event
+            
+            :param x: the mouse x coordinate
+            **Precondition**: Must be a float
+            
+            :param y: the mouse y coordinate
+            **Precondition**: Must be a float
+            
+            :param time: the time of the event
+            **Precondition**: Must be a float
+        """
+        slot = self._tail % INPUT_CAPACITY
+        self._kinds[slot] = kind
+        self._keys[slot]  = key
+        self._xs[slot]    = x
+        self._ys[slot]    = y
+        self._times[slot] = time
+        self._tail += 1
+        if self._tail-self._head > INPUT_CAPACITY:
+            self._head += 1
+            self._dropped += 1
+    
+    def _begin_frame(self):
+        """Closes the input of the last frame, before `update` is called
+        
+        This totals the time each key was held down during the frame (for 
+        `held_fraction`) and the presses (for `press_count`)."""
+        now = _clock()
+        for (k, since) in self._since.iteritems():
+            start = max(since,self._framestart)
+            self._held[k] = self._held.get(k,0.0)+now-start
+        self._lastheld, self._held = self._held, self._lastheld
+        self._held.clear()
+        self._frametime = now-self._framestart
+        self._framestart = now
+        self._presscount = self._presses
+        self._presses = 0
+    
+    def _end_frame(self):
+        """Discards the events not read during `update`"""
+        self._head = self._tail
 
 
 class GView(FloatLayout):
@@ -2581,6 +3579,11 @@ class GView(FloatLayout):
         `GameApp`. See the class `GameApp` for more information."""
         FloatLayout.__init__(self)
         self._frame = InstructionGroup()
+        self._recorder = None
+        self._fbos = None
+        self._front = 0
+        self._fresh = False
+        self._display = None
         self.bind(pos=self._reset)
         self.bind(size=self._reset)
         self._reset()
@@ -2609,11 +3612,546 @@ class GView(FloatLayout):
     def _reset(self,obj=None,value=None):
         """Resets the view canvas in response to a resizing event"""
         self.canvas.clear()
+        if not self._recorder is None:
+            self._reset_capture()
+            return
         self.canvas.add(Color(1,1,1))
         self.canvas.add(Rectangle(pos=self.pos,size=self.size))
         # Work-around for Retina Macs
         self.canvas.add(Scale(dp(1),dp(1),dp(1)))
         self.canvas.add(self._frame)
+    
+    def _reset_capture(self):
+        """Rebuilds the two capture framebuffers at the current view size.
+        
+        In capture mode the frame is drawn into an offscreen `Fbo`, and the view shows
+        the texture of that `Fbo`.  There are two of them: while one is drawn, the 
+        other holds the previous frame, waiting to be read back."""
+        if not self._fbos is None:
+            self._fbos[self._front].remove(self._frame)
+        self.canvas.before.clear()
+        size = (max(int(self.width),1),max(int(self.height),1))
+        self._fbos = []
+        for ii in range(2):
+            fbo = Fbo(size=size)
+            fbo.add(ClearColor(1,1,1,1))
+            fbo.add(ClearBuffers())
+            # Work-around for Retina Macs
+            fbo.add(Scale(dp(1),dp(1),dp(1)))
+            self._fbos.append(fbo)
+        self._front = 0
+        self._fresh = False
+        self._fbos[0].add(self._frame)
+        self.canvas.before.add(self._fbos[0])
+        self.canvas.add(Color(1,1,1))
+        self._display = Rectangle(pos=self.pos,size=self.size,texture=self._fbos[0].texture)
+        self.canvas.add(self._display)
+    
+    def _capture(self,*args):
+        """Callback reading back the previous frame and swapping the framebuffers.
+        
+        This is called when the window is flipped, after the current frame has been
+        submitted.  The frame read back is the one before it, which the GPU has usually
+        finished by then.  The read itself is still a blocking `glReadPixels` of the 
+        whole frame on the Kivy thread, once per frame: Kivy only exposes OpenGL ES 2, 
+        which has no pixel buffer objects to read into asynchronously.  Only the
+        encoding is taken off this thread, by the recorder."""
+        if self._fbos is None:
+            return
+        front = self._fbos[self._front]
+        back  = self._fbos[1-self._front]
+        if self._fresh:
+            self._recorder._submit(back.pixels,back.size)
+        front.remove(self._frame)
+        back.add(self._frame)
+        self.canvas.before.remove(front)
+        self.canvas.before.add(back)
+        self._display.texture = back.texture
+        self._front = 1-self._front
+        self._fresh = True
+    
+    def _finish_capture(self):
+        """Reads back the last frame and closes the recorder."""
+        if self._fbos is None:
+            return
+        if self._fresh:
+            back = self._fbos[1-self._front]
+            self._recorder._submit(back.pixels,back.size)
+            self._fresh = False
+        self._recorder.close()
+
+
+################# PROFILING #################
+pass
+# #mark PROFILING
+
+class _GNullScope(object):
+    """A profiling scope that does nothing.
+
+    This is the scope returned by `profile_scope` when there is no active profiler.
+    There is only one instance, so opening a scope never allocates."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        return False
+
+
+class _GProfileScope(object):
+    """A named profiling scope that accumulates time into a `GProfiler`.
+
+    Scopes are cached by name in the profiler, so opening the same scope every
+    frame reuses the same object.  A scope may be opened several times in a frame;
+    the times are summed."""
+
+    def __init__(self, profiler, column):
+        """**Constructor**: Creates a new scope writing to the given column.
+
+            :param profiler: the profiler to record to
+            **Precondition**: a GProfiler
+
+            :param column: the scope column in the profiler
+            **Precondition**: an int >= 0
+        """
+        self._profiler = profiler
+        self._column = column
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = _clock()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self._profiler._scopetime[self._column] += _clock()-self._start
+        return False
+
+
+_NULL_SCOPE = _GNullScope()
+
+# The profiler of the running GameApp (or None if profiling is disabled)
+_PROFILER = None
+
+
+def profile_scope(name):
+    """**Returns**: A context manager timing the named scope in the active profiler.
+
+        :param name: the name of the scope
+        **Precondition**: a nonempty string
+
+    Use this function in a `with` statement to time a section of code, as follows:
+
+        with profile_scope('physics'):
+            ...
+
+    The time is recorded in the profiler of the running `GameApp`.  If profiling is
+    not enabled, this returns a shared scope that does nothing."""
+    if _PROFILER is None:
+        return _NULL_SCOPE
+    return _PROFILER.scope(name)
+
+
+class GProfiler(object):
+    """Instances record the time spent in each phase of an animation frame.
+
+    A `GameApp` with profiling enabled times the four phases of every frame: clearing
+    the view, `update`, `draw`, and the Kivy canvas submit (the time it takes Kivy to
+    render the canvas).  It also times any scope opened with `profile_scope`.  The
+    times are kept in a fixed size ring buffer, so only the most recent `capacity`
+    frames are remembered.
+
+    The canvas submit happens after `_refresh` returns, so the submit time of a frame
+    is recorded with the frame that follows it.
+
+    All times are measured in seconds, but are displayed in milliseconds."""
+
+    #: The phases timed in every frame
+    PHASES = ('clear','update','draw','submit')
+
+    #: The maximum number of user-named scopes
+    MAX_SCOPES = 16
+
+    # IMMUTABLE PROPERTIES
+    @property
+    def capacity(self):
+        """The number of frames remembered by this profiler.
+
+        **Invariant**: Must be an int > 0."""
+        return self._capacity
+
+    @property
+    def frames(self):
+        """The number of frames recorded so far (including those forgotten).
+
+        **Invariant**: Must be an int >= 0."""
+        return self._count
+
+    @property
+    def scopes(self):
+        """The names of the user scopes, in the order they were first opened.
+
+        **Invariant**: Must be a tuple of strings."""
+        return tuple(self._scopenames)
+
+
+    # BUILT-IN METHODS
+    def __init__(self, capacity=600, overlay=True, interval=30, dump=None):
+        """**Constructor**: Creates a new profiler.
+
+            :param capacity: the number of frames to remember
+            **Precondition**: an int > 0
+
+            :param overlay: whether to draw the timing overlay on screen
+            **Precondition**: a bool
+
+            :param interval: the number of frames between overlay refreshes
+            **Precondition**: an int > 0
+
+            :param dump: the file to write the samples to on exit (or None)
+            **Precondition**: a string ending in .csv or .json, or None
+        """
+        assert type(capacity) == int and capacity > 0, 'capacity %s is not valid' % `capacity`
+        assert type(interval) == int and interval > 0, 'interval %s is not valid' % `interval`
+        assert dump is None or os.path.splitext(dump)[1] in ('.csv','.json'), \
+                'dump %s is not a .csv or .json file' % `dump`
+        self._capacity = capacity
+        self._interval = interval
+        self._dump = dump
+
+        # One row per frame: the phases, then the frame total, then the scopes
+        self._width = len(self.PHASES)+1
+        self._samples = np.zeros((capacity,self._width+self.MAX_SCOPES),dtype=np.float64)
+        self._phase = np.zeros(len(self.PHASES),dtype=np.float64)
+        self._scopetime = [0.0]*self.MAX_SCOPES
+        self._scopes = {}
+        self._scopenames = []
+        self._count = 0
+
+        self._mark = 0.0
+        self._submit = 0.0
+        self._submit_start = None
+
+        self._overlay = GLabel(text=' ',font_size=12,halign='left',left=4,top=0,
+                               fillcolor=(1,1,1,0.75),linecolor=(0,0,0,1)) if overlay else None
+
+    # PUBLIC METHODS
+    def scope(self, name):
+        """**Returns**: The (cached) scope object for the given name.
+
+            :param name: the name of the scope
+            **Precondition**: a nonempty string
+
+        If there are already `MAX_SCOPES` scopes, any new name is ignored and this
+        method returns a scope that does nothing."""
+        try:
+            return self._scopes[name]
+        except KeyError:
+            assert type(name) == str and name != '', 'name %s is not a valid scope' % `name`
+            if len(self._scopenames) == self.MAX_SCOPES:
+                return _NULL_SCOPE
+            result = _GProfileScope(self,len(self._scopenames))
+            self._scopes[name] = result
+            self._scopenames.append(name)
+            return result
+
+    def percentiles(self, column='frame', ranks=(50,95,99)):
+        """**Returns**: The percentiles of the given column over the remembered frames.
+
+            :param column: the phase, scope or 'frame' (the total) to summarize
+            **Precondition**: a string naming a recorded column
+
+            :param ranks: the percentile ranks to compute
+            **Precondition**: a sequence of numbers in 0..100
+
+        The value returned is a tuple of times in seconds, one for each rank.  If no
+        frames have been recorded, all of the values are 0."""
+        n = min(self._count,self._capacity)
+        if n == 0:
+            return tuple(0.0 for r in ranks)
+        data = self._samples[:n,self._column(column)]
+        return tuple(float(v) for v in np.percentile(data,ranks))
+
+    def summary(self):
+        """**Returns**: A dictionary summarizing the remembered frames.
+
+        Each phase, the frame total, and each scope is mapped to a dictionary with
+        keys 'mean', 'p50', 'p95' and 'p99' (all in seconds)."""
+        n = min(self._count,self._capacity)
+        result = {}
+        for name in self.PHASES+('frame',)+self.scopes:
+            data = self._samples[:n,self._column(name)]
+            mean = float(data.mean()) if n else 0.0
+            p50, p95, p99 = self.percentiles(name)
+            result[name] = {'mean':mean,'p50':p50,'p95':p95,'p99':p99}
+        return result
+
+    def dump(self, filename=None):
+        """Writes the remembered frames to a file.
+
+            :param filename: the file to write to (or None for the default dump file)
+            **Precondition**: a string ending in .csv or .json, or None
+
+        A .csv file has one row per frame, oldest first, with a column for each phase,
+        the frame total, and each scope.  A .json file contains the `summary` together
+        with the same frames.  If there is no file to write, this method does nothing."""
+        filename = self._dump if filename is None else filename
+        if filename is None:
+            return
+
+        header = list(self.PHASES)+['frame']+list(self.scopes)
+        rows = self._ordered()[:,:len(header)]
+        if os.path.splitext(filename)[1] == '.json':
+            with open(filename,'w') as file:
+                json.dump({'frames':self._count,'columns':header,
+                           'summary':self.summary(),'samples':rows.tolist()},file,indent=1)
+        else:
+            with open(filename,'wb') as file:
+                writer = csv.writer(file)
+                writer.writerow(header)
+                writer.writerows(rows.tolist())
+
+    def draw(self, view):
+        """Draws the timing overlay (if enabled) in the provide view.
+
+            :param view: view to draw to
+            **Precondition**: an *instance of* `GView`"""
+        if not self._overlay is None:
+            self._overlay.draw(view)
+
+    # HIDDEN METHODS
+    def _column(self, name):
+        """**Returns**: The sample column for the given phase or scope name"""
+        if name == 'frame':
+            return len(self.PHASES)
+        elif name in self.PHASES:
+            return self.PHASES.index(name)
+        return self._width+self._scopenames.index(name)
+
+    def _ordered(self):
+        """**Returns**: The remembered samples, oldest first"""
+        if self._count <= self._capacity:
+            return self._samples[:self._count]
+        pos = self._count % self._capacity
+        return np.concatenate((self._samples[pos:],self._samples[:pos]))
+
+    def _begin(self):
+        """Marks the start of a frame phase"""
+        self._mark = _clock()
+
+    def _end(self, phase):
+        """Records the time since the last mark as the given phase.
+
+            :param phase: the index of the phase in PHASES
+            **Precondition**: an int in 0..len(PHASES)-1
+        """
+        now = _clock()
+        self._phase[phase] = now-self._mark
+        self._mark = now
+
+    def _commit(self, view, height):
+        """Commits the current frame to the ring buffer and draws the overlay.
+
+            :param view: the view to draw the overlay to
+            **Precondition**: a GView
+
+            :param height: the height of the window
+            **Precondition**: an int or float > 0
+        """
+        self._phase[3] = self._submit
+        row = self._samples[self._count % self._capacity]
+        row[:4] = self._phase
+        row[4] = self._phase.sum()
+        scopes = self._scopetime
+        for ii in xrange(len(self._scopenames)):
+            row[self._width+ii] = scopes[ii]
+            scopes[ii] = 0.0
+        self._count += 1
+
+        if self._overlay is None:
+            return
+        if self._count % self._interval == 1 or self._interval == 1:
+            self._refresh_overlay(height)
+        self._overlay.draw(view)
+
+    def _refresh_overlay(self, height):
+        """Updates the text of the overlay label
+
+            :param height: the height of the window
+            **Precondition**: an int or float > 0
+        """
+        n = min(self._count,self._capacity)
+        means = self._samples[:n,:4].mean(axis=0)*1000
+        p50, p95, p99 = self.percentiles()
+        lines = ['frame p50 %.2f  p95 %.2f  p99 %.2f ms' % (p50*1000,p95*1000,p99*1000),
+                 '  '.join('%s %.2f' % (self.PHASES[ii],means[ii]) for ii in range(4))]
+        for ii in xrange(len(self._scopenames)):
+            mean = self._samples[:n,self._width+ii].mean()*1000
+            lines.append('%s %.2f' % (self._scopenames[ii],mean))
+        self._overlay.text = '\n'.join(lines)
+        self._overlay.left = 4
+        self._overlay.top = height-4
+
+    def _draw_begin(self, *args):
+        """Callback marking the start of the Kivy canvas submit"""
+        self._submit_start = _clock()
+
+    def _draw_end(self, *args):
+        """Callback marking the end of the Kivy canvas submit"""
+        if not self._submit_start is None:
+            self._submit = _clock()-self._submit_start
+            self._submit_start = None
+
+
+################# CAPTURE #################
+pass
+# #mark CAPTURE
+
+class GRecorder(object):
+    """Instances write captured frames to disk on a background thread.
+    
+    A `GameApp` with capture enabled reads every frame back from the GPU (a blocking 
+    read on the Kivy thread) and hands the pixels to its recorder.  The recorder puts them in a bounded queue and returns at 
+    once; a worker thread does the encoding and the file writes.  If the worker falls
+    so far behind that the queue is full, the frame is dropped (and counted) rather 
+    than stalling the game.
+    
+    The output depends on the path.  If it ends in .raw, the frames are appended to 
+    that file as raw RGBA video (top row first), and the size and frame rate are 
+    written to the same path with .json added.  The video can be encoded with
+    
+        ffmpeg -f rawvideo -pix_fmt rgba -s WxH -r FPS -i game.raw game.mp4
+    
+    Otherwise the path is a directory, and every frame is written to it as a PNG file 
+    named frame000000.png, frame000001.png, and so on."""
+    
+    # IMMUTABLE PROPERTIES
+    @property
+    def path(self):
+        """The file or directory the frames are written to.
+        
+        **Invariant**: Must be a string."""
+        return self._path
+    
+    @property
+    def frames(self):
+        """The number of frames written so far.
+        
+        **Invariant**: Must be an int >= 0."""
+        return self._written
+    
+    @property
+    def dropped(self):
+        """The number of frames dropped because the queue was full.
+        
+        **Invariant**: Must be an int >= 0."""
+        return self._dropped
+    
+    
+    # BUILT-IN METHODS
+    def __init__(self, path, fps=60.0, queue=120):
+        """**Constructor**: Creates a recorder and starts its worker thread.
+        
+            :param path: the .raw file or the PNG directory to write to
+            **Precondition**: a string
+            
+            :param fps: the frame rate, recorded for raw video
+            **Precondition**: an int or float > 0
+            
+            :param queue: the number of frames that may wait to be encoded
+            **Precondition**: an int > 0
+        """
+        assert type(path) == str, 'path %s is not a string' % `path`
+        assert _is_num(fps) and fps > 0, 'fps %s is not valid' % `fps`
+        assert type(queue) == int and queue > 0, 'queue %s is not valid' % `queue`
+        self._path = path
+        self._fps = fps
+        self._raw = path.endswith('.raw')
+        self._size = None
+        self._written = 0
+        self._dropped = 0
+        if not self._raw and not os.path.isdir(path):
+            os.makedirs(path)
+        
+        self._queue = Queue.Queue(queue)
+        self._thread = threading.Thread(target=self._run,name='GRecorder')
+        self._thread.daemon = True
+        self._thread.start()
+    
+    
+    # PUBLIC METHODS
+    def close(self):
+        """Waits for the queued frames to be written and stops the worker thread."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        if self._raw and not self._size is None:
+            with open(self._path+'.json','w') as file:
+                json.dump({'width':self._size[0],'height':self._size[1],'fps':self._fps,
+                           'frames':self._written,'format':'rgba'},file)
+    
+    
+    # HIDDEN METHODS
+    def _submit(self, pixels, size):
+        """Queues a frame to be written, dropping it if the queue is full.
+        
+            :param pixels: the frame, as read from a Kivy `Fbo` (bottom row first)
+            **Precondition**: a string of width*height*4 RGBA bytes
+            
+            :param size: the frame size
+            **Precondition**: a pair (width, height) of ints > 0
+        """
+        try:
+            self._queue.put_nowait((pixels,size))
+        except Queue.Full:
+            self._dropped += 1
+    
+    def _run(self):
+        """Writes the queued frames until the queue yields None"""
+        file = open(self._path,'wb') if self._raw else None
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                (pixels, size) = item
+                image = np.frombuffer(pixels,dtype=np.uint8).reshape(size[1],size[0],4)[::-1]
+                if self._raw:
+                    if self._size is None:
+                        self._size = size
+                    if size == self._size:
+                        file.write(np.ascontiguousarray(image).tostring())
+                    else:
+                        self._dropped += 1
+                        continue
+                else:
+                    name = os.path.join(self._path,'frame%06d.png' % self._written)
+                    with open(name,'wb') as png:
+                        png.write(_encode_png(image))
+                self._written += 1
+        finally:
+            if not file is None:
+                file.close()
+
+
+def _encode_png(image):
+    """**Returns**: The bytes of a PNG file for the given image.
+    
+        :param image: the image, top row first
+        **Precondition**: a uint8 NumPy array of shape (height, width, 4)
+    
+    The rows are not filtered.  zlib releases the GIL while it compresses, so the 
+    game keeps running while a frame is encoded."""
+    height, width = image.shape[:2]
+    rows = np.zeros((height,1+width*4),dtype=np.uint8)
+    rows[:,1:] = image.reshape(height,width*4)
+    def chunk(tag, data):
+        return (struct.pack('>I',len(data))+tag+data+
+                struct.pack('>I',zlib.crc32(tag+data) & 0xffffffff))
+    header = struct.pack('>IIBBBBB',width,height,8,6,0,0,0)
+    return ('\x89PNG\r\n\x1a\n'+chunk('IHDR',header)+
+            chunk('IDAT',zlib.compress(rows.tostring(),6))+chunk('IEND',''))
 
 
 ################# PRIMARY APP CLASS #################
@@ -2695,6 +4233,24 @@ class GameApp(kivy.app.App):
         **Invariant**: Must be instance of GInput."""
         return self._input
     
+    @property
+    def profiler(self):
+        """The frame profiler, if profiling is enabled.
+        
+        See the class `GProfiler` for more information.
+        
+        **Invariant**: Must be instance of GProfiler or None."""
+        return self._profiler
+    
+    @property
+    def recorder(self):
+        """The frame recorder, if capture is enabled.
+        
+        See the class `GRecorder` for more information.
+        
+        **Invariant**: Must be instance of GRecorder or None."""
+        return self._recorder
+    
     
     # BUILT-IN METHODS
     def __init__(self,**keywords):
@@ -2713,20 +4269,41 @@ class GameApp(kivy.app.App):
         The game window will not show until you start the game. To start the game, use 
         the method `run()`.
         
+        To time each animation frame, add the keyword `profile`.  If it is True, the
+        game creates a `GProfiler` and draws its overlay on the screen.  If it is the 
+        name of a .csv or .json file, the profiler also writes its samples to that file 
+        when the game stops.  Set the keyword `profile_overlay` to False to hide the 
+        overlay.
+        
+        To record the game, add the keyword `capture` with the name of a .raw file or
+        of a directory for PNG files.  The view is then drawn offscreen and every frame
+        is written out by a `GRecorder`.
+        
         **You will never call the constructor or `run` yourself.  That is handled for 
         you in the provided code."""
         w = keywords['width']  if  'width' in keywords else 0.0
         h = keywords['height'] if 'height' in keywords else 0.0
         f = keywords['fps']    if 'fps'    in keywords else 60.0
+        p = keywords['profile'] if 'profile' in keywords else False
+        o = keywords['profile_overlay'] if 'profile_overlay' in keywords else True
+        c = keywords['capture'] if 'capture' in keywords else None
 
         assert _is_num(w), 'width %s is not a number' % `w`
         assert _is_num(h), 'height %s is not a number' % `h`
         assert _is_num(f), 'fps %s is not a number' % `value`
         assert f > 0, 'fps %s is not positive' % `value`
+        assert type(p) in [bool, str], 'profile %s is not a bool or file name' % `p`
+        assert type(o) == bool, 'profile_overlay %s is not a bool' % `o`
+        assert c is None or type(c) == str, 'capture %s is not a file name' % `c`
 
         self._gwidth = w
         self._gheight = h
         self._fps = f
+        self._profile = p
+        self._profile_overlay = o
+        self._profiler = None
+        self._capture = c
+        self._recorder = None
         Config.set('graphics', 'width', str(self.width))
         Config.set('graphics', 'height', str(self.height))
         
@@ -2744,6 +4321,10 @@ class GameApp(kivy.app.App):
         self._view.size_hint = (1,1)
         self._input = GInput()
         self._input._register(self._view)
+        if self._profile:
+            self._enable_profiler()
+        if self._capture:
+            self._enable_capture()
         return self.view
     
     def run(self):
@@ -2759,9 +4340,36 @@ class GameApp(kivy.app.App):
         
         This is a Kivy reserved method.  It is part of the Kivy application process.  
         It should **never** be overridden."""
+        if not self._profiler is None:
+            self._profiler.dump()
+        if not self._recorder is None:
+            self._view._finish_capture()
         kivy.app.App.stop(self)
         sys.exit(0)
     
+    def headless(self):
+        """Initializes the game without a window.
+        
+        This method creates the view and input handler, but does not hook them up to 
+        Kivy, and then calls `start`.  Nothing is shown on the screen and there is no
+        keyboard or mouse; the clock is not running either.  Use the method `step` to 
+        animate each frame by hand.  This is for benchmarks and automated tests; it 
+        should never be called on a game started with `run()`."""
+        self._view = GView()
+        self._view.size_hint = (1,1)
+        self._input = GInput()
+        self.start()
+    
+    def step(self,dt):
+        """Animates a single frame of a headless game.
+        
+            :param dt: time in seconds since last update
+            **Precondition**: a number (int or float)
+        
+        This method clears the view and calls `update` and `draw`, exactly like a frame
+        scheduled by the clock.  See the method `headless` for more information."""
+        self._refresh(dt)
+    
     def start(self):
         """Initializes the game state, creating a new game.
         
@@ -2813,8 +4421,48 @@ class GameApp(kivy.app.App):
         
         This method a callback-proxy for the methods `update` and `draw`.  It handles
         important issues behind the scenes, particularly with clearing the window."""
+        profiler = self._profiler
+        if profiler is None:
+            self.view.clear()
+            self.input._begin_frame()
+            self.update(dt)
+            self.input._end_frame()
+            self.draw()
+            return
+        
+        profiler._begin()
         self.view.clear()
+        profiler._end(0)
+        self.input._begin_frame()
         self.update(dt)
+        self.input._end_frame()
+        profiler._end(1)
         self.draw()
+        profiler._end(2)
+        profiler._commit(self.view,self.height)
+    
+    def _enable_profiler(self):
+        """Creates the frame profiler and hooks it up to the Kivy window.
+        
+        The canvas submit is timed from the start of the window draw event to the 
+        buffer flip."""
+        global _PROFILER
+        from kivy.core.window import Window
+        dump = self._profile if type(self._profile) == str else None
+        self._profiler = GProfiler(overlay=self._profile_overlay,dump=dump)
+        Window.bind(on_draw=self._profiler._draw_begin)
+        Window.bind(on_flip=self._profiler._draw_end)
+        _PROFILER = self._profiler
+    
+    def _enable_capture(self):
+        """Creates the frame recorder and switches the view to offscreen drawing.
+        
+        Frames are read back when the window is flipped (see `GView._capture`).  That
+        costs one blocking full-frame read per frame on the Kivy thread."""
+        from kivy.core.window import Window
+        self._recorder = GRecorder(self._capture,self.fps)
+        self._view._recorder = self._recorder
+        self._view._reset()
+        Window.bind(on_flip=self._view._capture)
     
     
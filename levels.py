@@ -0,0 +1,328 @@
+# levels.py
+# Rui Chen rc687 and Tian Tan tt474
+# 10/19/2026
+"""Level files for Breakout
+
+A level is a list of bricks.  Each brick has an arbitrary center, size, color and
+number of hit points.  In memory a level is a NumPy array of BRICK_DTYPE records (see
+models.py), which is exactly what a BrickField is made from.
+
+There are two file formats.  The text format is for writing levels by hand.  It has
+one brick per line:
+
+    # lines starting with a hash are comments
+    brick <x> <y> <width> <height> <color> [<hp>]
+
+The color is either the name of a colormodel constant (e.g. red or light_gray) or a
+web color '#rrggbb' or '#rrggbbaa'.  The hit points default to 1.  A brick with hit
+points 0 or less (e.g. BRICK_UNBREAKABLE) can never be broken.
+
+The binary format is for shipping levels.  It is a 16 byte header (the magic string
+BRKL, the format version, reserved flags and the number of bricks, all little-endian)
+followed by the brick records, 24 bytes each, in the layout BRICK_DTYPE.
+
+Both formats are read in chunks, so very large levels can be streamed from disk
+without ever creating one object per brick.
+
+Many levels can be shipped together in a level pack.  A pack is a 24 byte header 
+(the magic string BRKP, the format version, reserved flags, the number of levels and
+the offset of the index), the brick records of every level back to back, and then the
+index, which has the offset and brick count of each level.  A LevelPack opens the file with mmap, so getting a 
+level is just a view of its records in the mapped file.  Nothing is read or copied,
+no matter how many levels are in the pack."""
+import mmap
+import struct
+import numpy as np
+import colormodel
+from constants import *
+from models import BRICK_DTYPE
+
+
+#: the first four bytes of a binary level file
+LEVEL_MAGIC = 'BRKL'
+#: the version of the binary level format
+LEVEL_VERSION = 1
+#: the layout of the binary level header: magic, version, flags, count, reserved
+LEVEL_HEADER = struct.Struct('<4sHHII')
+#: the number of bricks read from disk at a time
+LEVEL_CHUNK = 65536
+
+#: the first four bytes of a level pack file
+PACK_MAGIC = 'BRKP'
+#: the version of the level pack format
+PACK_VERSION = 1
+#: the layout of the level pack header: magic, version, flags, count, reserved, index offset
+PACK_HEADER = struct.Struct('<4sHHIIQ')
+#: the layout of an entry in the level pack index (16 bytes)
+PACK_INDEX_DTYPE = np.dtype([('offset','<u8'),('count','<u4'),('flags','<u4')])
+
+
+class LevelPack(object):
+    """An instance is an open level pack file.
+    
+    The file is memory mapped when the pack is opened.  Indexing the pack returns the
+    records of a level as a read-only NumPy array that views the mapped file directly,
+    so it takes the same (constant) time for every level, no matter the size of the
+    pack.  The operating system only reads the pages of the levels that are played.
+    
+    The views stay valid until the pack is closed.
+    
+    INSTANCE ATTRIBUTES:
+        _file  [file]: the open pack file
+        _map   [mmap]: the read-only mapping of the file
+        _index [array of PACK_INDEX_DTYPE]: the offset and brick count of each level
+    """
+    
+    def __init__(self, filename):
+        """**Constructor**: opens the level pack in the given file.
+        
+            :param filename: the level pack file
+            **Precondition**: filename is the name of a valid level pack file
+        
+        A pack with no levels is not valid: there would be nothing to play.
+        """
+        self._file=open(filename,'rb')
+        try:
+            self._map=mmap.mmap(self._file.fileno(),0,access=mmap.ACCESS_READ)
+            if self._map[:4]!=PACK_MAGIC or len(self._map)<PACK_HEADER.size:
+                raise IOError('File %s is not a level pack' % `filename`)
+            magic, version, flags, count, reserved, offset = PACK_HEADER.unpack_from(self._map)
+            if version!=PACK_VERSION:
+                raise IOError('Level pack %s has unsupported version %d' % (`filename`,version))
+            if count==0:
+                raise IOError('Level pack %s has no levels' % `filename`)
+            if offset+count*PACK_INDEX_DTYPE.itemsize>len(self._map):
+                raise IOError('Level pack %s is truncated' % `filename`)
+            self._index=np.frombuffer(self._map,dtype=PACK_INDEX_DTYPE,count=count,
+                                      offset=offset)
+            end=self._index['offset']+self._index['count']*BRICK_DTYPE.itemsize
+            if end.max()>offset:
+                raise IOError('Level pack %s is corrupt' % `filename`)
+        except:
+            self._file.close()
+            raise
+    
+    def __len__(self):
+        """**Returns**: the number of levels in this pack."""
+        return len(self._index)
+    
+    def __getitem__(self, level):
+        """**Returns**: the records of the given level (a read-only view).
+        
+            :param level: the level number
+            **Precondition**: level is an int in 0..len(self)-1
+        """
+        entry=self._index[level]
+        return np.frombuffer(self._map,dtype=BRICK_DTYPE,count=int(entry['count']),
+                             offset=int(entry['offset']))
+    
+    def close(self):
+        """Closes this pack.
+        
+        Any level records viewed from this pack must no longer be used."""
+        self._index=None
+        self._map.close()
+        self._file.close()
+
+
+def grid_level(rows=BRICK_ROWS, columns=BRICKS_IN_ROW):
+    """Returns: the records of the classic Breakout brick grid
+
+    The rows are colored with BRICK_COLOR, from the top down, and every brick has a
+    single hit point.
+
+    Parameter rows: the number of rows of bricks
+    Precondition: rows is an int > 0
+
+    Parameter columns: the number of bricks in a row
+    Precondition: columns is an int > 0 with GAME_WIDTH/columns > BRICK_SEP_H"""
+    assert type(rows)==int and rows>0
+    assert type(columns)==int and columns>0 and GAME_WIDTH/columns>BRICK_SEP_H
+    width=GAME_WIDTH/columns-BRICK_SEP_H
+    records=np.zeros(rows*columns,dtype=BRICK_DTYPE)
+    row=np.arange(rows*columns)//columns
+    column=np.arange(rows*columns)%columns
+    records['x']=BRICK_SEP_H/2.0+column*(width+BRICK_SEP_H)+width/2.0
+    records['y']=GAME_HEIGHT-BRICK_Y_OFFSET-BRICK_HEIGHT/2.0-row*(BRICK_HEIGHT+BRICK_SEP_V)
+    records['width']=width
+    records['height']=BRICK_HEIGHT
+    palette=np.array([_color_bytes(c.glColor()) for c in BRICK_COLOR],dtype=np.uint8)
+    records['color']=palette[row%len(BRICK_COLOR)]
+    records['hp']=1
+    return records
+
+
+def load_level(filename, chunk=LEVEL_CHUNK):
+    """Returns: the records of the level in the given file
+
+    The format (text or binary) is determined from the start of the file.
+
+    Parameter filename: the level file
+    Precondition: filename is the name of a valid level file
+
+    Parameter chunk: the number of bricks to read from disk at a time
+    Precondition: chunk is an int > 0"""
+    with open(filename,'rb') as file:
+        count=_read_header(file)
+        if count is not None:
+            records=np.fromfile(file,dtype=BRICK_DTYPE,count=count)
+            if len(records)!=count:
+                raise IOError('Level file %s is truncated' % `filename`)
+            return records
+
+    parts=list(stream_level(filename,chunk))
+    if len(parts)==0:
+        return np.zeros(0,dtype=BRICK_DTYPE)
+    return parts[0] if len(parts)==1 else np.concatenate(parts)
+
+
+def stream_level(filename, chunk=LEVEL_CHUNK):
+    """Yields: the records of the level in the given file, a chunk at a time
+
+    Each value yielded is a NumPy array of at most chunk records.  This generator
+    never holds more than one chunk in memory.
+
+    Parameter filename: the level file
+    Precondition: filename is the name of a valid level file
+
+    Parameter chunk: the number of bricks to read from disk at a time
+    Precondition: chunk is an int > 0"""
+    assert type(chunk)==int and chunk>0
+    with open(filename,'rb') as file:
+        count=_read_header(file)
+        if count is not None:
+            while count>0:
+                records=np.fromfile(file,dtype=BRICK_DTYPE,count=min(chunk,count))
+                if len(records)==0:
+                    raise IOError('Level file %s is truncated' % `filename`)
+                count-=len(records)
+                yield records
+            return
+
+        buffer=np.zeros(chunk,dtype=BRICK_DTYPE)
+        size=0
+        colors={}
+        for (number, line) in enumerate(file):
+            line=line.split()
+            if len(line)==0 or line[0][0]=='#':
+                continue
+            try:
+                assert line[0]=='brick' and 6<=len(line)<=7
+                if not line[5] in colors:
+                    colors[line[5]]=_parse_color(line[5])
+                hp=int(line[6]) if len(line)==7 else 1
+                buffer[size]=(float(line[1]),float(line[2]),float(line[3]),float(line[4]),
+                              colors[line[5]],hp,0)
+            except (AssertionError, ValueError, AttributeError):
+                raise ValueError('Line %d of level file %s is not a valid brick'
+                                 % (number+1,`filename`))
+            size+=1
+            if size==chunk:
+                yield buffer
+                buffer=np.zeros(chunk,dtype=BRICK_DTYPE)
+                size=0
+        if size>0:
+            yield buffer[:size]
+
+
+def save_level(filename, records, binary=True):
+    """Writes the given level records to a file.
+
+    Parameter filename: the file to write
+    Precondition: filename is a string
+
+    Parameter records: the bricks of the level
+    Precondition: records is a NumPy array of BRICK_DTYPE
+
+    Parameter binary: whether to write the binary format (instead of text)
+    Precondition: binary is a bool"""
+    assert isinstance(records,np.ndarray) and records.dtype==BRICK_DTYPE
+    if binary:
+        with open(filename,'wb') as file:
+            file.write(LEVEL_HEADER.pack(LEVEL_MAGIC,LEVEL_VERSION,0,len(records),0))
+            records.tofile(file)
+        return
+
+    with open(filename,'w') as file:
+        file.write('# brick x y width height color hp\n')
+        for rec in records:
+            file.write('brick %g %g %g %g #%02x%02x%02x%02x %d\n' %
+                       ((rec['x'],rec['y'],rec['width'],rec['height'])+
+                        tuple(rec['color'])+(rec['hp'],)))
+
+
+def save_pack(filename, levels):
+    """Writes the given levels to a level pack file.
+    
+    The levels are written one at a time as they are produced, so levels may be any
+    iterable (e.g. a generator loading one level file after another).
+    
+    Parameter filename: the file to write
+    Precondition: filename is a string
+    
+    Parameter levels: the records of each level, in order
+    Precondition: levels is a non-empty iterable of NumPy arrays of BRICK_DTYPE"""
+    entries=[]
+    with open(filename,'wb') as file:
+        file.write(PACK_HEADER.pack(PACK_MAGIC,PACK_VERSION,0,0,0,0))
+        for records in levels:
+            assert isinstance(records,np.ndarray) and records.dtype==BRICK_DTYPE
+            entries.append((file.tell(),len(records),0))
+            records.tofile(file)
+        
+        # The index goes at the end, once we know where each level is
+        offset=file.tell()
+        np.array(entries,dtype=PACK_INDEX_DTYPE).tofile(file)
+        file.seek(0)
+        file.write(PACK_HEADER.pack(PACK_MAGIC,PACK_VERSION,0,len(entries),0,offset))
+
+
+def is_level_pack(filename):
+    """Returns: True if the given file is a level pack (and not a level file)
+    
+    Parameter filename: the file to test
+    Precondition: filename is the name of an existing file"""
+    with open(filename,'rb') as file:
+        return file.read(4)==PACK_MAGIC
+
+
+# HELPER FUNCTIONS
+def _read_header(file):
+    """Returns: the brick count of a binary level file, or None for a text file
+
+    If the file is binary, this function leaves the file positioned at the first
+    record.  Otherwise it rewinds the file.
+
+    Parameter file: the open level file
+    Precondition: file is a file opened in binary mode, positioned at the start"""
+    data=file.read(LEVEL_HEADER.size)
+    if data[:4]!=LEVEL_MAGIC:
+        file.seek(0)
+        return None
+    if len(data)<LEVEL_HEADER.size:
+        raise IOError('Level file %s is truncated' % `file.name`)
+    magic, version, flags, count, reserved = LEVEL_HEADER.unpack(data)
+    if version!=LEVEL_VERSION:
+        raise IOError('Level file %s has unsupported version %d' % (`file.name`,version))
+    return count
+
+
+def _parse_color(text):
+    """Returns: the RGBA bytes of a color in a level file
+
+    Parameter text: the color name or web color
+    Precondition: text is a string"""
+    if text[0]=='#':
+        assert len(text) in (7,9)
+        value=[int(text[ii:ii+2],16) for ii in range(1,len(text),2)]
+        return tuple(value+[255]*(4-len(value)))
+    return _color_bytes(getattr(colormodel,text.upper()).glColor())
+
+
+def _color_bytes(color):
+    """Returns: the RGBA bytes of a color given as floats
+
+    Parameter color: the color
+    Precondition: color is a sequence of 3 or 4 floats in 0..1"""
+    value=[int(round(c*255)) for c in color]
+    return tuple(value+[255]*(4-len(value)))
@@ -14,11 +14,43 @@ detection.  That is why we have custom classes.
 You are free to add new models to this module.  You may wish to do this when you add
 new features to your game.  If you are unsure about whether to make a new class or 
 not, please ask on Piazza."""
+import math
 import random # To randomly generate the ball velocity
+import numpy as np
+import game2d
 from constants import *
 from game2d import *
 
 
+#: the record layout of a brick in a BrickField (and in level files); 24 bytes
+BRICK_DTYPE = np.dtype([('x','<f4'),('y','<f4'),('width','<f4'),('height','<f4'),
+                        ('color','u1',(4,)),('hp','<i2'),('flags','<u2')])
+
+
+#: the bounce directions off the paddle, as (sin, cos) of the angle from straight up,
+#: for BOUNCE_STEPS offsets spread evenly from the left edge to the right edge
+BOUNCE_TABLE = tuple((math.sin(a),math.cos(a)) for a in
+                     [math.radians(BOUNCE_MAX_ANGLE*(2.0*ii/(BOUNCE_STEPS-1)-1.0))
+                      for ii in range(BOUNCE_STEPS)])
+
+# Whether the collision methods check their arguments (see set_validation)
+_CHECKED = True
+
+
+def set_validation(level):
+    """Sets how much the values given to the models and to game2d are checked.
+    
+    With VALIDATE_NONE, the collision methods do not check that they were given a 
+    Ball, and the hot GObject properties are not checked (see game2d._set_checked).
+    This is the only way to set the level.  Call it once at startup.
+    
+    parameter level: the validation level
+    precondition: level is one of VALIDATE_FULL or VALIDATE_NONE"""
+    global _CHECKED
+    game2d._set_checked(level)
+    _CHECKED = level == VALIDATE_FULL
+
+
 # PRIMARY RULE: Models are not allowed to access anything except the module constants.py.
 # If you need extra information from Play, then it should be a parameter in your method, 
 # and Play should pass it as a argument when it calls the method.
@@ -59,18 +91,29 @@ class Paddle(GRectangle):
     def collides(self,ball ):
         """Returns: True if the ball collides with this paddle
         
+        The ball collides if it is moving down and its bounding box overlaps the 
+        paddle anywhere, including the middle of its bottom edge.  A ball moving up 
+        has already bounced, so it never collides again on the way out.
+        
         Parameter ball: The ball to check
         Precondition: ball is of class Ball"""
-        assert isinstance (ball, Ball)
-        Truth=False
-        if (not self.contains(ball.x+0.5*BALL_DIAMETER,ball.y+0.5*BALL_DIAMETER) and
-            not self.contains(ball.x-0.5*BALL_DIAMETER,ball.y+0.5*BALL_DIAMETER)):
-
-           if self.contains(ball.x+0.5*BALL_DIAMETER,ball.y-0.5*BALL_DIAMETER):
-              Truth=True
-           if self.contains(ball.x-0.5*BALL_DIAMETER,ball.y-0.5*BALL_DIAMETER):
-              Truth=True
-        return Truth
+        assert not _CHECKED or isinstance(ball, Ball)
+        if ball.getVy()>=0:
+            return False
+        r=0.5*BALL_DIAMETER
+        return (ball.x+r>=self.left and ball.x-r<=self.right and
+                ball.y-r<=self.top and ball.y+r>=self.bottom)
+    
+    def getOffset(self,ball):
+        """Returns: where the ball is along the paddle, from -1.0 (left edge) to 1.0 (right)
+        
+        Balls past the edges (touching the paddle with their side) are clamped to the 
+        edges.
+        
+        Parameter ball: The ball to check
+        Precondition: ball is of class Ball"""
+        offset=(ball.x-self.x)/(0.5*self.width)
+        return min(max(offset,-1.0),1.0)
     
     # ADD MORE METHODS (PROPERLY SPECIFIED) AS NECESSARY
 
@@ -112,7 +155,7 @@ class Brick(GRectangle):
         
         Parameter ball: The ball to check
         Precondition: ball is of class Ball"""
-        assert isinstance( ball, Ball)
+        assert not _CHECKED or isinstance(ball, Ball)
         xr=ball.x+BALL_DIAMETER/2.0
         xl=ball.x-BALL_DIAMETER/2.0
         yt=ball.y+BALL_DIAMETER/2.0
@@ -122,8 +165,678 @@ class Brick(GRectangle):
         return fact
     
         # ADD MORE METHODS (PROPERLY SPECIFIED) AS NECESSARY
+
+
+class BrickField(object):
+    """An instance is the set of bricks in a game, stored as compact arrays.
+    
+    Each brick is a record in a NumPy structured array with the layout BRICK_DTYPE: 
+    center, size, RGBA color (as bytes) and hit points.  The records are never changed, 
+    so they may be a read-only view of a level file.  Removing a brick just clears its 
+    flag in the alive mask.
+    
+    Collisions use a uniform grid over the bricks.  The cells are at least as large as 
+    the largest brick, so a brick is in at most 4 cells, and the ball only has to be 
+    tested against the bricks in the few cells under it.  The number of bricks on the 
+    board does not matter.
+    
+    A brick only becomes a Brick object when it is first drawn.  Loading a level (or 
+    testing it for collisions) never creates one object per brick.
+    
+    The hit points in the records are the starting hit points.  The current hit points 
+    are kept in a separate array, so the records can stay read-only.  A brick with 
+    more than one hit point fades toward BRICK_DAMAGE_COLOR each time it is hit.  A 
+    brick with hit points <= 0 is unbreakable.  The number of breakable bricks left is 
+    kept as a counter, so the game never has to scan the board to see if it is won.
+    
+    INSTANCE ATTRIBUTES:
+        _records [structured array of BRICK_DTYPE]: the bricks, on the board or not
+        _alive   [bool array, same length as _records]: True if the brick is on the board
+        _hp      [int16 array, same length as _records]: the current hit points
+        _count   [int >= 0]: the number of True values in _alive
+        _remain  [int >= 0]: the number of breakable bricks on the board
+        _changes [list of int]: the index of every brick hit or removed, in order
+        _shapes  [dict of int to Brick]: the bricks on the board that have been drawn
+        _origin  [pair of floats]: the bottom left corner of the grid
+        _cell    [pair of floats > 0]: the width and height of a grid cell
+        _dims    [pair of ints >= 0]: the number of grid cells across and down
+        _start   [int array of length cells+1]: where the bricks of each cell start in _items
+        _items   [int array]: the brick indices, sorted by grid cell
+    """
+    
+    # GETTERS AND SETTERS
+    def getRecords(self):
+        """Return: the brick records (including bricks no longer on the board)"""
+        return self._records
+    
+    def getSize(self):
+        """Return: the number of bricks in the level (on the board or not)"""
+        return len(self._records)
+    
+    def getRemaining(self):
+        """Return: the number of breakable bricks still on the board"""
+        return self._remain
+    
+    def getChanges(self,start=0):
+        """Return: the indices of the bricks hit or removed since the given change
+        
+        Every hit or removal appends the brick index to a log.  A consumer that wants to
+        know what changed (e.g. to redraw it) remembers getChangeCount() and passes it
+        as start the next time.  Any number of consumers may read the log this way.
         
+        parameter start: the number of changes already seen
+        precondition: start is an int in 0..getChangeCount()"""
+        return self._changes[start:]
+    
+    def getChangeCount(self):
+        """Return: the number of hits and removals so far"""
+        return len(self._changes)
+    
+    def getColor(self,index):
+        """Return: the color of the given brick for its damage stage, as 4 floats
         
+        A brick that has lost a fraction f of its hit points is f of the way from its
+        own color to BRICK_DAMAGE_COLOR.
+        
+        parameter index: the brick index
+        precondition: index is an int in 0..getSize()-1"""
+        color=[float(c)/255.0 for c in self._records['color'][index]]
+        start=int(self._records['hp'][index])
+        if start<=1:
+            return tuple(color)
+        fade=float(start-self._hp[index])/start
+        damage=BRICK_DAMAGE_COLOR.glColor()
+        return tuple(color[ii]+(damage[ii]-color[ii])*fade for ii in range(4))
+    
+    def getAlive(self):
+        """Return: the mask of bricks still on the board, as a NumPy bool array
+        
+        This is the array used by this field, not a copy.  Do not modify it."""
+        return self._alive
+    
+    def getHitPoints(self):
+        """Return: the current hit points of every brick, as a NumPy int16 array
+        
+        This is the array used by this field, not a copy.  Do not modify it."""
+        return self._hp
+    
+    def getHP(self,index):
+        """Return: the current hit points of the given brick (<= 0 if unbreakable)
+        
+        parameter index: the brick index
+        precondition: index is an int in 0..getSize()-1"""
+        return int(self._hp[index])
+    
+    def isAlive(self,index):
+        """Return: True if the given brick is still on the board
+        
+        parameter index: the brick index
+        precondition: index is an int in 0..getSize()-1"""
+        return bool(self._alive[index])
+    
+    # INITIALIZER
+    def __init__(self,records):
+        """**Constructor**: creates a board with every brick in records.
+        
+        :param records: the bricks of the level
+        **Precondition**: records is a NumPy array of BRICK_DTYPE
+        """
+        assert isinstance(records,np.ndarray) and records.dtype == BRICK_DTYPE
+        self._records=records
+        self._alive=np.ones(len(records),dtype=bool)
+        self._hp=np.array(records['hp'],dtype=np.int16)
+        self._count=len(records)
+        self._remain=int(np.count_nonzero(self._hp>0))
+        self._changes=[]
+        self._shapes={}
+        self._build_index()
+    
+    def __len__(self):
+        """Return: the number of bricks still on the board (including unbreakable ones)"""
+        return self._count
+    
+    # METHODS TO QUERY AND REMOVE BRICKS
+    def query(self,left,bottom,right,top):
+        """Return: the indices of the bricks on the board overlapping a rectangle
+        
+        parameter left, bottom, right, top: the edges of the rectangle
+        precondition: all are ints or floats with left <= right, bottom <= top"""
+        cand=self._candidates(left,bottom,right,top)
+        rec=self._records[cand]
+        hw=rec['width']/2.0
+        hh=rec['height']/2.0
+        keep=(self._alive[cand] & (rec['x']-hw < right) & (rec['x']+hw > left) &
+              (rec['y']-hh < top) & (rec['y']+hh > bottom))
+        return cand[keep]
+    
+    def collide(self,ball):
+        """Return: the indices of the bricks on the board hit by the ball
+        
+        As with Brick.collides, a brick is hit if a corner of the ball's bounding box
+        is inside of it.
+        
+        parameter ball: The ball to check
+        precondition: ball is of class Ball"""
+        r=BALL_DIAMETER/2.0
+        bx=ball.x
+        by=ball.y
+        cand=self._candidates(bx-r,by-r,bx+r,by+r)
+        if len(cand)==0:
+            return cand
+        rec=self._records[cand]
+        hw=rec['width']/2.0
+        hh=rec['height']/2.0
+        inx=(np.abs(bx+r-rec['x']) < hw) | (np.abs(bx-r-rec['x']) < hw)
+        iny=(np.abs(by+r-rec['y']) < hh) | (np.abs(by-r-rec['y']) < hh)
+        return cand[self._alive[cand] & inx & iny]
+    
+    def getContact(self,index,ball):
+        """Return: the contact (depth,axis,push) between the ball and the given brick
+        
+        The depth is the area where the bounding boxes overlap, so the deepest contact
+        of a frame is the one with the largest depth.  The axis of the contact normal 
+        is 0 (x) or 1 (y): it is the axis along which the overlap is thinner, the side
+        the ball came in through.  The push is the signed distance to move the ball 
+        along that axis to take it out of the brick.
+        
+        parameter index: the brick index
+        precondition: index is an int in 0..getSize()-1
+        parameter ball: the ball touching the brick
+        precondition: ball is of class Ball"""
+        rec=self._records[index]
+        r=BALL_DIAMETER/2.0
+        x=float(rec['x'])
+        y=float(rec['y'])
+        hw=float(rec['width'])/2.0
+        hh=float(rec['height'])/2.0
+        dx=min(ball.x+r,x+hw)-max(ball.x-r,x-hw)
+        dy=min(ball.y+r,y+hh)-max(ball.y-r,y-hh)
+        if dx<dy:
+            return (dx*dy,0,dx if ball.x>x else -dx)
+        return (dx*dy,1,dy if ball.y>y else -dy)
+    
+    def hit(self,index):
+        """Damages the given brick by one hit point.
+        
+        Return: True if the hit destroyed the brick, False otherwise
+        
+        The brick is removed from the board when it runs out of hit points.  Otherwise
+        it changes to the color of its damage stage.  Hitting an unbreakable brick, or
+        one that is not on the board, does nothing.
+        
+        parameter index: the brick index
+        precondition: index is an int in 0..getSize()-1"""
+        hp=self._hp[index]
+        if hp<=0 or not self._alive[index]:
+            return False
+        self._hp[index]=hp-1
+        if hp==1:
+            self.kill(index)
+            return True
+        self._changes.append(index)
+        if index in self._shapes:
+            color=self.getColor(index)
+            self._shapes[index].fillcolor=color
+            self._shapes[index].linecolor=color
+        return False
+    
+    def kill(self,index):
+        """Removes the given brick from the board, no matter its hit points.
+        
+        Removing a brick that is no longer on the board does nothing.
+        
+        parameter index: the brick index
+        precondition: index is an int in 0..getSize()-1"""
+        if self._alive[index]:
+            self._alive[index]=False
+            self._count-=1
+            if self._records['hp'][index]>0:
+                self._remain-=1
+            self._changes.append(index)
+            self._shapes.pop(index,None)
+    
+    def restore(self,alive,hp):
+        """Sets the bricks on the board and their hit points all at once.
+        
+        This is how a copy of a board catches up with a keyframe (see network.py) 
+        instead of replaying every hit.  The change log is left alone.
+        
+        parameter alive: the mask of bricks on the board
+        precondition: alive is a NumPy bool array of getSize() values
+        parameter hp: the hit points of every brick
+        precondition: hp is a NumPy int array of getSize() values"""
+        self._alive[:]=alive
+        self._hp[:]=hp
+        self._count=int(np.count_nonzero(self._alive))
+        self._remain=int(np.count_nonzero(self._alive & (self._records['hp']>0)))
+        self._shapes.clear()
+    
+    # DRAW METHOD
+    def draw(self,view):
+        """Draws the bricks still on the board.
+        
+        The first time this method is called, it creates a Brick for every brick on the
+        board.  After that, it only draws the bricks it already has.
+        
+        parameter view: the view to draw to
+        precondition: view is an instance of GView"""
+        if len(self._shapes)<self._count:
+            for index in np.flatnonzero(self._alive):
+                if not index in self._shapes:
+                    self._shapes[index]=self._shape(index)
+        for brick in self._shapes.itervalues():
+            brick.draw(view)
+    
+    # HELPER METHODS
+    def _shape(self,index):
+        """Return: a new Brick for the given record
+        
+        parameter index: the brick index
+        precondition: index is an int in 0..getSize()-1"""
+        rec=self._records[index]
+        color=self.getColor(index)
+        return Brick(float(rec['x']),float(rec['y']),float(rec['width']),float(rec['height']),
+                     color,color)
+    
+    def _build_index(self):
+        """Builds the uniform grid over the bricks.
+        
+        The cells are as wide as the widest brick and as tall as the tallest.  If the
+        bricks are sparse, the cells are enlarged so that there are at most 4 cells per
+        brick."""
+        n=len(self._records)
+        self._origin=(0.0,0.0)
+        self._cell=(1.0,1.0)
+        self._dims=(0,0)
+        self._start=np.zeros(1,dtype=np.intp)
+        self._items=np.zeros(0,dtype=np.intp)
+        if n==0:
+            return
+        
+        rec=self._records
+        hw=rec['width'].astype(np.float64)/2.0
+        hh=rec['height'].astype(np.float64)/2.0
+        left=rec['x']-hw
+        right=rec['x']+hw
+        bottom=rec['y']-hh
+        top=rec['y']+hh
+        ox=float(left.min())
+        oy=float(bottom.min())
+        cw=max(float(hw.max())*2.0,1.0)
+        ch=max(float(hh.max())*2.0,1.0)
+        nx=int((right.max()-ox)//cw)+1
+        ny=int((top.max()-oy)//ch)+1
+        if nx*ny>4*n:
+            grow=np.sqrt(nx*ny/(4.0*n))
+            cw*=grow
+            ch*=grow
+            nx=int((right.max()-ox)//cw)+1
+            ny=int((top.max()-oy)//ch)+1
+        
+        cx0=((left-ox)//cw).astype(np.intp)
+        cx1=np.minimum(((right-ox)//cw).astype(np.intp),nx-1)
+        cy0=((bottom-oy)//ch).astype(np.intp)
+        cy1=np.minimum(((top-oy)//ch).astype(np.intp),ny-1)
+        index=np.arange(n,dtype=np.intp)
+        cells=[]
+        items=[]
+        for dx in (0,1):
+            for dy in (0,1):
+                m=(cx0+dx<=cx1) & (cy0+dy<=cy1)
+                cells.append((cy0[m]+dy)*nx+cx0[m]+dx)
+                items.append(index[m])
+        cells=np.concatenate(cells)
+        items=np.concatenate(items)
+        
+        self._origin=(ox,oy)
+        self._cell=(cw,ch)
+        self._dims=(nx,ny)
+        self._items=items[np.argsort(cells,kind='mergesort')]
+        self._start=np.zeros(nx*ny+1,dtype=np.intp)
+        np.cumsum(np.bincount(cells,minlength=nx*ny),out=self._start[1:])
+    
+    def _candidates(self,left,bottom,right,top):
+        """Return: the indices of the bricks in the grid cells under a rectangle
+        
+        The bricks may not be on the board, and may not overlap the rectangle.
+        
+        parameter left, bottom, right, top: the edges of the rectangle
+        precondition: all are ints or floats with left <= right, bottom <= top"""
+        nx,ny=self._dims
+        cx0=max(int((left-self._origin[0])//self._cell[0]),0)
+        cx1=min(int((right-self._origin[0])//self._cell[0]),nx-1)
+        cy0=max(int((bottom-self._origin[1])//self._cell[1]),0)
+        cy1=min(int((top-self._origin[1])//self._cell[1]),ny-1)
+        if cx0>cx1 or cy0>cy1:
+            return self._items[:0]
+        
+        # The cells of a grid row are contiguous in _items
+        start=self._start
+        if cy0==cy1:
+            result=self._items[start[cy0*nx+cx0]:start[cy0*nx+cx1+1]]
+        else:
+            result=np.concatenate([self._items[start[cy*nx+cx0]:start[cy*nx+cx1+1]]
+                                   for cy in range(cy0,cy1+1)])
+        return np.unique(result)
+        
+        
+class PowerUpPool(object):
+    """An instance is the set of power-ups falling in a game, kept in a fixed pool.
+    
+    There are POWERUP_POOL slots for each kind of power-up.  Every slot has its own 
+    GRectangle, created once in the color of its kind, so dropping a power-up only 
+    moves a free slot to the brick and never creates an object or rebuilds a drawing 
+    cache.  When all of the slots of a kind are falling, new drops of that kind are 
+    ignored.
+    
+    The positions are NumPy arrays.  Every frame, update moves all of the falling 
+    power-ups and tests them against each paddle in one vectorized pass.
+    
+    INSTANCE ATTRIBUTES:
+        _x      [float array of length POWERUP_KINDS*POWERUP_POOL]: the slot centers x
+        _y      [float array, same length as _x]: the slot centers y
+        _active [bool array, same length as _x]: whether each slot is falling
+        _kinds  [int array, same length as _x]: the kind of each slot (never changes)
+        _catcher [int array, same length as _x]: the paddle catching each slot this frame,
+                 or -1 (scratch space for update)
+        _free   [list of POWERUP_KINDS lists of int]: the free slots of each kind
+        _shapes [list of GRectangle]: the shape of each slot
+    """
+    
+    # GETTERS AND SETTERS
+    def getActive(self):
+        """Return: the mask of falling power-ups, as a NumPy bool array
+        
+        This is the array used by this pool, not a copy.  Do not modify it."""
+        return self._active
+    
+    def getX(self):
+        """Return: the x of every slot center, as a NumPy float array
+        
+        The kind of slot i is i//POWERUP_POOL.  This is the array used by this pool, 
+        not a copy.  Do not modify it."""
+        return self._x
+    
+    def getY(self):
+        """Return: the y of every slot center, as a NumPy float array
+        
+        This is the array used by this pool, not a copy.  Do not modify it."""
+        return self._y
+    
+    def __len__(self):
+        """Return: the number of power-ups falling"""
+        return int(np.count_nonzero(self._active))
+    
+    # INITIALIZER
+    def __init__(self):
+        """Initializer: creates a pool with nothing falling"""
+        size=POWERUP_KINDS*POWERUP_POOL
+        self._x=np.zeros(size,dtype=np.float64)
+        self._y=np.zeros(size,dtype=np.float64)
+        self._active=np.zeros(size,dtype=bool)
+        self._kinds=np.arange(size)//POWERUP_POOL
+        self._catcher=np.zeros(size,dtype=np.intp)
+        self._free=[range(kind*POWERUP_POOL,(kind+1)*POWERUP_POOL)[::-1]
+                    for kind in range(POWERUP_KINDS)]
+        self._shapes=[GRectangle(x=0,y=0,width=POWERUP_WIDTH,height=POWERUP_HEIGHT,
+                                 fillcolor=POWERUP_COLORS[kind],linecolor=POWERUP_COLORS[kind])
+                      for kind in self._kinds]
+    
+    # METHODS TO DROP, MOVE AND CATCH POWER-UPS
+    def drop(self,kind,x,y):
+        """Starts a power-up falling from the given point
+        
+        Return: True if it was dropped, False if every slot of that kind is in use
+        
+        parameter kind: the power-up kind
+        precondition: kind is one of the POWERUP constants
+        parameter x, y: the starting center
+        precondition: x and y are ints or floats"""
+        free=self._free[kind]
+        if not free:
+            return False
+        slot=free.pop()
+        self._x[slot]=x
+        self._y[slot]=y
+        self._active[slot]=True
+        return True
+    
+    def update(self,paddles):
+        """Moves the falling power-ups down and catches the ones touching a paddle
+        
+        Return: the pair (kinds, catchers) of NumPy int arrays (usually empty), where
+        catchers[i] is the position in paddles of the paddle that caught kinds[i]
+        
+        A power-up touching several paddles is caught by the first of them.  Power-ups 
+        that fall off the bottom of the screen are freed.
+        
+        parameter paddles: the paddles catching the power-ups
+        precondition: paddles is a list of Paddle"""
+        active=self._active
+        y=self._y
+        y[active]-=POWERUP_SPEED
+        catcher=self._catcher
+        catcher.fill(-1)
+        for ii in xrange(len(paddles)-1,-1,-1):
+            paddle=paddles[ii]
+            catcher[active & (np.abs(self._x-paddle.x) <= (paddle.width+POWERUP_WIDTH)/2.0) &
+                    (np.abs(y-paddle.y) <= (paddle.height+POWERUP_HEIGHT)/2.0)]=ii
+        caught=catcher >= 0
+        done=caught | (active & (y < -POWERUP_HEIGHT))
+        if not done.any():
+            return (self._kinds[:0], catcher[:0])
+        for slot in np.flatnonzero(done):
+            active[slot]=False
+            self._free[self._kinds[slot]].append(slot)
+        return (self._kinds[caught], catcher[caught])
+    
+    def clear(self):
+        """Frees every power-up slot"""
+        for slot in np.flatnonzero(self._active):
+            self._active[slot]=False
+            self._free[self._kinds[slot]].append(slot)
+    
+    def restore(self,x,y,active):
+        """Sets the falling power-ups all at once, as they are in another pool
+        
+        This is how a copy of a pool catches up with the game (see simulation.py).
+        
+        parameter x, y: the slot centers
+        precondition: x and y are NumPy float arrays of POWERUP_KINDS*POWERUP_POOL values
+        parameter active: the mask of falling power-ups
+        precondition: active is a NumPy bool array of POWERUP_KINDS*POWERUP_POOL values"""
+        np.copyto(self._x,x)
+        np.copyto(self._y,y)
+        if (self._active!=active).any():
+            np.copyto(self._active,active)
+            self._free=[[slot for slot in xrange((kind+1)*POWERUP_POOL-1,kind*POWERUP_POOL-1,-1)
+                         if not active[slot]] for kind in xrange(POWERUP_KINDS)]
+    
+    # DRAW METHOD
+    def draw(self,view):
+        """Draws the falling power-ups
+        
+        parameter view: the view to draw to
+        precondition: view is an instance of GView"""
+        for slot in np.flatnonzero(self._active):
+            shape=self._shapes[slot]
+            shape.x=float(self._x[slot])
+            shape.y=float(self._y[slot])
+            shape.draw(view)
+
+
+class ParticleSystem(object):
+    """An instance is a fixed-capacity set of debris particles drawn as one Mesh.
+    
+    A particle is a small square with a position, velocity, remaining life and color.
+    These are stored in NumPy arrays, with the live particles packed at the front, so
+    update integrates every particle in one vectorized step and drops the dead ones.
+    Nothing is created per particle, and there are no GObjects.
+    
+    All of the particles are drawn with a single Mesh, whose vertices are rewritten 
+    in place every frame.  The Mesh reads the vertices and indices straight from NumPy
+    buffers that last as long as the system, and the indices are only handed over again
+    when the number of particles changes.  The default Kivy shader has no per-vertex color, so the colors come
+    from a small palette texture instead: each column is a color, each row is that 
+    color with less alpha, and the texture coordinates of a particle pick its color 
+    and how far it has faded.  The Mesh and the texture are made the first time the 
+    particles are drawn, so a game that is never drawn never touches the GPU.
+    
+    INSTANCE ATTRIBUTES:
+        _count   [int in 0..PARTICLE_CAPACITY]: the number of live particles
+        _pos     [float32 array of shape (PARTICLE_CAPACITY, 2)]: the positions
+        _vel     [float32 array of shape (PARTICLE_CAPACITY, 2)]: the velocities
+        _life    [float32 array of length PARTICLE_CAPACITY]: the frames left to live
+        _color   [int array of length PARTICLE_CAPACITY]: the palette column of each
+        _palette [uint8 array of shape (PARTICLE_FADE, PARTICLE_PALETTE, 4)]: the 
+                 palette texture contents
+        _colors  [dict of 4-tuples to int]: the palette column of each color used
+        _verts   [float32 array of shape (PARTICLE_CAPACITY, 4, 4)]: the mesh vertices
+        _indices [uint16 array]: the triangle indices for PARTICLE_CAPACITY quads
+        _vbuf    [memoryview]: the flat float buffer over _verts
+        _ibuf    [memoryview]: the buffer over _indices
+        _drawn   [int >= 0, or None if never drawn]: the particles in the mesh indices
+        _vslice  [memoryview, or None]: the part of _vbuf with the _drawn particles
+        _mesh    [Mesh, or None if never drawn]: the mesh of all the particles
+        _texture [Texture, or None if never drawn]: the palette texture
+        _stale   [bool]: whether the palette changed since it was last uploaded
+        _group   [InstructionGroup, or None if never drawn]: the drawing instructions
+    """
+    
+    # GETTERS AND SETTERS
+    def __len__(self):
+        """Return: the number of live particles"""
+        return self._count
+    
+    # INITIALIZER
+    def __init__(self):
+        """Initializer: creates a system with no particles"""
+        self._count=0
+        self._pos=np.zeros((PARTICLE_CAPACITY,2),dtype=np.float32)
+        self._vel=np.zeros((PARTICLE_CAPACITY,2),dtype=np.float32)
+        self._life=np.zeros(PARTICLE_CAPACITY,dtype=np.float32)
+        self._color=np.zeros(PARTICLE_CAPACITY,dtype=np.intp)
+        self._palette=np.zeros((PARTICLE_FADE,PARTICLE_PALETTE,4),dtype=np.uint8)
+        self._colors={}
+        self._verts=np.zeros((PARTICLE_CAPACITY,4,4),dtype=np.float32)
+        quad=np.array([0,1,2,2,3,0])
+        self._indices=(np.arange(PARTICLE_CAPACITY)[:,np.newaxis]*4+quad).ravel().astype(np.uint16)
+        self._vbuf=memoryview(self._verts.reshape(-1))
+        self._ibuf=memoryview(self._indices)
+        self._drawn=None
+        self._vslice=None
+        self._mesh=None
+        self._texture=None
+        self._stale=True
+        self._group=None
+    
+    # METHODS TO EMIT AND MOVE PARTICLES
+    def emit(self,x,y,count,color):
+        """Adds a burst of particles flying out from a point
+        
+        If the system is full, the particles that do not fit are not added.
+        
+        parameter x, y: the center of the burst
+        precondition: x and y are ints or floats
+        parameter count: the number of particles
+        precondition: count is an int >= 0
+        parameter color: the color of the particles
+        precondition: color is a sequence of 4 floats in 0..1"""
+        start=self._count
+        end=min(start+count,PARTICLE_CAPACITY)
+        if end==start:
+            return
+        n=end-start
+        angle=np.random.uniform(0.0,2*np.pi,n)
+        speed=np.random.uniform(0.2*PARTICLE_SPEED,PARTICLE_SPEED,n)
+        self._pos[start:end,0]=x
+        self._pos[start:end,1]=y
+        self._vel[start:end,0]=np.cos(angle)*speed
+        self._vel[start:end,1]=np.sin(angle)*speed
+        self._life[start:end]=PARTICLE_LIFE
+        self._color[start:end]=self._column(color)
+        self._count=end
+    
+    def update(self):
+        """Moves every live particle one frame and removes the ones that died"""
+        n=self._count
+        if n==0:
+            return
+        vel=self._vel[:n]
+        vel[:,1]+=PARTICLE_GRAVITY
+        self._pos[:n]+=vel
+        life=self._life[:n]
+        life-=1.0
+        alive=life>0
+        live=int(np.count_nonzero(alive))
+        if live<n:
+            for array in (self._pos,self._vel,self._life,self._color):
+                array[:live]=array[:n][alive]
+            self._count=live
+    
+    def clear(self):
+        """Removes every particle"""
+        self._count=0
+    
+    # DRAW METHOD
+    def draw(self,view):
+        """Draws the live particles with one Mesh
+        
+        parameter view: the view to draw to
+        precondition: view is an instance of GView"""
+        if self._group is None:
+            self._texture=Texture.create(size=(PARTICLE_PALETTE,PARTICLE_FADE),colorfmt='rgba')
+            self._texture.mag_filter='nearest'
+            self._texture.min_filter='nearest'
+            self._mesh=Mesh(vertices=[],indices=[],mode='triangles',texture=self._texture)
+            self._group=InstructionGroup()
+            self._group.add(Color(1,1,1,1))
+            self._group.add(self._mesh)
+        if self._stale:
+            self._texture.blit_buffer(self._palette.tostring(),colorfmt='rgba',bufferfmt='ubyte')
+            self._stale=False
+        
+        n=self._count
+        verts=self._verts[:n]
+        half=PARTICLE_SIZE/2.0
+        for (corner, dx, dy) in ((0,-half,-half),(1,half,-half),(2,half,half),(3,-half,half)):
+            verts[:,corner,0]=self._pos[:n,0]+dx
+            verts[:,corner,1]=self._pos[:n,1]+dy
+        # Texture coordinates: the column is the color, the row is the fade step
+        fade=np.minimum(((1.0-self._life[:n]/PARTICLE_LIFE)*PARTICLE_FADE).astype(np.intp),
+                        PARTICLE_FADE-1)
+        verts[:,:,2]=((self._color[:n]+0.5)/PARTICLE_PALETTE)[:,np.newaxis]
+        verts[:,:,3]=((fade+0.5)/PARTICLE_FADE)[:,np.newaxis]
+        if n!=self._drawn:
+            self._drawn=n
+            self._vslice=self._vbuf[:16*n]
+            self._mesh.indices=self._ibuf[:6*n]
+        self._mesh.vertices=self._vslice
+        view.draw(self._group)
+    
+    # HELPER METHODS
+    def _column(self,color):
+        """Return: the palette column for the given color, adding it if it is new
+        
+        When the palette is full, the closest color already in it is used.
+        
+        parameter color: the color
+        precondition: color is a sequence of 4 floats in 0..1"""
+        key=tuple(int(round(c*255)) for c in color[:4])
+        if key in self._colors:
+            return self._colors[key]
+        if len(self._colors)<PARTICLE_PALETTE:
+            column=len(self._colors)
+            self._colors[key]=column
+            fade=1.0-np.arange(PARTICLE_FADE,dtype=np.float64)/PARTICLE_FADE
+            self._palette[:,column,:3]=key[:3]
+            self._palette[:,column,3]=np.round(key[3]*fade).astype(np.uint8)
+            self._stale=True
+            return column
+        best=min(self._colors,key=lambda k: sum((k[ii]-key[ii])**2 for ii in range(4)))
+        return self._colors[best]
+
+
 class Ball(GEllipse):
     """Instance is a game ball.
     
@@ -133,6 +846,7 @@ class Ball(GEllipse):
     INSTANCE ATTRIBUTES:
         _vx [int or float]: Velocity in x direction 
         _vy [int or float]: Velocity in y direction 
+        _speed [float > 0]: the length of the velocity, kept by paddle bounces
     
     The class Play will need to look at these attributes, so you will need
     getters for them.  However, it is possible to write this assignment with no
@@ -176,9 +890,27 @@ class Ball(GEllipse):
         self._vx=random.uniform(1.0,5.0)
         self._vx=self._vx*random.choice([-1,1])
         self._vy=-5.0
+        self._speed=math.sqrt(self._vx*self._vx+self._vy*self._vy)
         GEllipse.__init__(self,x=x,y=y,width=diameter,height=diameter,fillcolor=fillcolor)
     
     # METHODS TO MOVE AND/OR BOUNCE THE BALL
+    def setVelocity(self,vx,vy):
+        """Sets the velocity of the ball (and with it the speed kept by bounces)
+        
+        parameter vx, vy: the new velocity
+        precondition: vx and vy are ints or floats, not both 0"""
+        self._vx=vx
+        self._vy=vy
+        self._speed=math.sqrt(vx*vx+vy*vy)
+    
+    def scaleSpeed(self,factor):
+        """Multiplies the speed of the ball by the given factor, keeping its direction
+        
+        parameter factor: the speed multiplier
+        precondition: factor is an int or float > 0"""
+        self._vx=self._vx*factor
+        self._vy=self._vy*factor
+        self._speed=self._speed*factor
     
     # ADD MORE METHODS (PROPERLY SPECIFIED) AS NECESSARY
     def change_Xdirection(self):
@@ -197,5 +929,19 @@ class Ball(GEllipse):
        """
        self._vy=(-1)*self._vy
     
+    def bounce(self,offset):
+        """Bounces the ball up off the paddle at an angle given by where it hit
+        
+        The ball leaves straight up from the center of the paddle, and at up to
+        BOUNCE_MAX_ANGLE degrees towards the side it hit.  The offset is rounded to one
+        of BOUNCE_STEPS entries of BOUNCE_TABLE, so there is no trigonometry here and
+        the result is the same on every machine.  The speed of the ball is unchanged.
+        
+        parameter offset: where the ball hit, as returned by Paddle.getOffset
+        precondition: offset is a float in -1.0..1.0"""
+        (sin, cos)=BOUNCE_TABLE[int((offset+1.0)*0.5*(BOUNCE_STEPS-1)+0.5)]
+        self._vx=self._speed*sin
+        self._vy=self._speed*cos
+    
 
 # IF YOU NEED ADDITIONAL MODEL CLASSES, THEY GO HERE
\ No newline at end of file
@@ -0,0 +1,1147 @@
+# network.py
+# Rui Chen rc687 and Tian Tan tt474
+# 10/19/2026
+"""Networked co-op Breakout: an authoritative game server and its clients
+
+Two to four players share one brick wall, each with their own paddle.  The game (an
+instance of Play) runs only on the server, which steps it every NET_TICK seconds.  The
+clients send their input and draw what the server tells them; they never simulate.
+
+Everything goes over one TCP connection per player, with TCP_NODELAY so that small
+messages are not held back.  A message is a 5 byte header (its kind and the length of
+its body, little-endian) followed by the body:
+
+    NET_INPUT   client to server: the paddle move (a float in [-1,1], as held_fraction
+                of 'right' minus 'left') and the pointer x (negative for none)
+    NET_WELCOME server to client: the player number, the number of players, the brick
+                records of the level (24 bytes each, see BRICK_DTYPE) and the state
+    NET_STATE   server to client: the fields that changed in the last step (see below)
+    NET_END     server to client: 1 if the players won, 0 if they lost
+    NET_FULL    server to client: every seat is taken (the server then hangs up)
+    NET_KEYFRAME server to spectator: every field, then the mask of bricks on the board
+                (one bit each) and the hit points of every brick (int16 each)
+
+A state starts with the step number and a bit mask of the fields that follow.  The
+fields are the paddles (x and width, one bit each), the ball, the tries, the extra balls
+of POWERUP_MULTI and the bricks hit.  A field is only sent when it is different from the
+last broadcast, and the bricks are sent as the indices hit since then (the log of
+BrickField.getChanges), never as the whole board.  A client replays the hits on its own
+copy of the board, so the board stays exactly the same on every machine.  A player who
+joins late gets every field and every hit so far in the welcome, and then the same
+deltas as everyone else.
+
+A server may also take any number of spectators on a second port (see SpectatorHub).
+Every state is framed once, and the very same bytes are queued for every player and 
+every spectator.  A spectator's welcome has the level but no state; it starts to watch
+at the next keyframe, which the server makes every NET_KEYFRAME steps, but only when 
+some spectator is waiting for one.  A spectator that cannot keep up (more than 
+NET_SPECTATOR_BACKLOG bytes queued) has its queue dropped and waits for the next
+keyframe too, so a slow spectator never makes the server buffer without bound.
+
+The sockets are served with asyncore, so the server is one thread with no locks.  The
+server is started from the command line, as in
+
+    python network.py --players 2 --port 5555
+
+and every player then joins with (see STATE_REMOTE in breakout.py)
+
+    python breakout.py --connect 127.0.0.1:5555
+
+Spectators join the same way on the spectator port (5556 with --spectators 5556).  To
+measure how many spectators one core can serve, run the load generator (see 
+measure_fanout), which plays a game by itself on loopback:
+
+    python network.py --load 256
+
+The defaults listen on the loopback address, so the whole game can be played (or
+tested) on one machine.  Use --host '' to accept players from the rest of the LAN."""
+import argparse
+import asynchat
+import asyncore
+import collections
+import math
+import multiprocessing
+import os
+import select
+import socket
+import struct
+import time
+import numpy as np
+from constants import *
+from play import *
+
+
+#: client input: the paddle move and the pointer x
+NET_INPUT   = 0
+#: server greeting: the player number, the level and the state so far
+NET_WELCOME = 1
+#: server broadcast: the fields that changed in the last step
+NET_STATE   = 2
+#: server notice: the game is over
+NET_END     = 3
+#: server notice: there is no free seat
+NET_FULL    = 4
+#: server to spectator: the whole state, to start watching from
+NET_KEYFRAME = 5
+
+#: the player number in the welcome of a spectator
+NET_SPECTATOR = 255
+
+#: the state mask bits of the paddles (bit ii is the paddle of player ii)
+DELTA_PADDLES = (1 << PADDLE_MAX_PLAYERS)-1
+#: the state mask bit of the ball (shown or not, and its position)
+DELTA_BALL  = 1 << PADDLE_MAX_PLAYERS
+#: the state mask bit of the tries left
+DELTA_TRIES = DELTA_BALL << 1
+#: the state mask bit of the POWERUP_MULTI balls
+DELTA_EXTRA = DELTA_BALL << 2
+#: the state mask bit of the bricks hit
+DELTA_HITS  = DELTA_BALL << 3
+
+#: the largest number of steps the server runs back to back to catch up after a stall
+NET_CATCHUP = 5
+
+# The layouts of the messages (all little-endian)
+_HEADER  = struct.Struct('<BI')
+_INPUT   = struct.Struct('<ff')
+_WELCOME = struct.Struct('<BBI')
+_TICK    = struct.Struct('<IH')
+_PAIR    = struct.Struct('<ff')
+_BYTE    = struct.Struct('<B')
+_COUNT   = struct.Struct('<I')
+
+
+class _Channel(asynchat.async_chat):
+    """An instance is one end of a connection, which cuts the bytes into messages.
+
+    Every message is handed to the owner as owner._receive(channel, kind, body), and a
+    closed connection as owner._disconnect(channel).  Before the body of a message is
+    read, the owner is asked owner._admits(kind, length); if it says no, the connection
+    is closed at once, so a peer cannot make the channel buffer a huge body.
+
+    INSTANCE ATTRIBUTES:
+        player [int >= 0, or None]: the player on the other end (set by the server)
+        _owner [GameServer or GameClient]: the object told about messages
+        _kind  [int, or None if waiting for a header]: the kind of the message being read
+        _data  [list of str]: the bytes read since the last message
+    """
+
+    def __init__(self, sock, owner, map):
+        """Initializer: starts reading messages from a connected socket
+
+        parameter sock: the socket
+        precondition: sock is a connected TCP socket
+        parameter owner: the object told about messages
+        precondition: owner is a GameServer or a GameClient
+        parameter map: the socket map to serve the channel in
+        precondition: map is a dict"""
+        asynchat.async_chat.__init__(self, sock=sock, map=map)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.player = None
+        self._owner = owner
+        self._kind = None
+        self._data = []
+        self.set_terminator(_HEADER.size)
+
+    def send_message(self, kind, body=''):
+        """Queues a message to send
+
+        parameter kind: the kind of message
+        precondition: kind is one of the NET constants
+        parameter body: the body of the message
+        precondition: body is a str"""
+        self.push(frame_message(kind,body))
+
+    def collect_incoming_data(self, data):
+        """Keeps the bytes read until there is a whole header or body"""
+        self._data.append(data)
+
+    def found_terminator(self):
+        """Reads a header, or hands a whole message to the owner"""
+        data = ''.join(self._data)
+        del self._data[:]
+        if self._kind is None:
+            (kind, length) = _HEADER.unpack(data)
+            if not self._owner._admits(kind, length):
+                self.ac_in_buffer = ''
+                self.handle_close()
+                return
+            if length > 0:
+                self._kind = kind
+                self.set_terminator(length)
+                return
+            data = ''
+        else:
+            kind = self._kind
+            self._kind = None
+            self.set_terminator(_HEADER.size)
+        self._owner._receive(self, kind, data)
+
+    def handle_close(self):
+        """Closes the connection and tells the owner"""
+        self.close()
+        self._owner._disconnect(self)
+
+
+class _Subscriber(asyncore.dispatcher):
+    """An instance sends the frames of a SpectatorHub to one spectator.
+
+    The frames are queued as they are, so every spectator shares the same str objects.
+    A frame is sent from a buffer over it, so a partial send copies nothing either.
+
+    INSTANCE ATTRIBUTES:
+        _hub    [SpectatorHub]: the hub that feeds this spectator
+        _frames [deque of str]: the frames still to send, oldest first
+        _offset [int >= 0]: the bytes of the first frame already sent
+        _queued [int >= 0]: the bytes queued and not sent yet
+        _synced [bool]: whether the spectator has the state of the last broadcast
+    """
+
+    def __init__(self, sock, hub, map):
+        """Initializer: starts to feed a connected spectator
+
+        The spectator waits for a keyframe until it is synced.
+
+        parameter sock: the socket
+        precondition: sock is a connected TCP socket
+        parameter hub: the hub that feeds the spectator
+        precondition: hub is a SpectatorHub
+        parameter map: the socket map to serve the spectator in
+        precondition: map is a dict"""
+        asyncore.dispatcher.__init__(self, sock, map)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._hub = hub
+        self._frames = collections.deque()
+        self._offset = 0
+        self._queued = 0
+        self._synced = False
+
+    def getQueued(self):
+        """Returns: the bytes queued and not sent yet"""
+        return self._queued
+
+    def isSynced(self):
+        """Returns: True if the spectator has the state of the last broadcast"""
+        return self._synced
+
+    def push(self, frame, synced=None):
+        """Queues a frame
+
+        parameter frame: the frame (header and body)
+        precondition: frame is a str
+        parameter synced: whether the spectator is synced after it, or None for no change
+        precondition: synced is None or a bool"""
+        self._frames.append(frame)
+        self._queued += len(frame)
+        if not synced is None:
+            self._synced = synced
+
+    def skip(self):
+        """Drops every queued frame but one half sent, and waits for the next keyframe"""
+        if self._offset > 0:
+            first = self._frames.popleft()
+            self._frames.clear()
+            self._frames.append(first)
+            self._queued = len(first)-self._offset
+        else:
+            self._frames.clear()
+            self._queued = 0
+        self._synced = False
+
+    def writable(self):
+        """Returns: True if there is a frame to send"""
+        return len(self._frames) > 0
+
+    def handle_write(self):
+        """Sends as much of the first frame as the socket takes"""
+        frame = self._frames[0]
+        sent = self.send(buffer(frame,self._offset))
+        self._offset += sent
+        self._queued -= sent
+        if self._offset == len(frame):
+            self._frames.popleft()
+            self._offset = 0
+
+    def handle_read(self):
+        """Throws away anything the spectator sends (it has no say in the game)"""
+        self.recv(4096)
+
+    def handle_close(self):
+        """Closes the connection and takes the spectator off the hub"""
+        self.close()
+        self._hub._remove(self)
+
+
+class SpectatorHub(asyncore.dispatcher):
+    """An instance takes spectators for a GameServer and fans its frames out to them.
+
+    The hub is served in the socket map of the server.  Every spectator gets the level
+    first, and then the frames passed to publish.
+
+    INSTANCE ATTRIBUTES:
+        _map         [dict]: the socket map of the server
+        _welcome     [str]: the first frame of every spectator (NET_WELCOME with the level)
+        _subscribers [list of _Subscriber]: the spectators connected
+        _backlog     [int > 0]: the most bytes queued for a spectator before it skips
+        _skips       [int >= 0]: the number of times a spectator fell behind
+        _frames      [int >= 0]: the number of frames published
+    """
+
+    def __init__(self, map, welcome, host=NET_HOST, port=NET_SPECTATOR_PORT,
+                 backlog=NET_SPECTATOR_BACKLOG):
+        """Initializer: starts listening for spectators
+
+        parameter map: the socket map of the server
+        precondition: map is a dict
+        parameter welcome: the first frame for every spectator
+        precondition: welcome is a str
+        parameter host: the address to listen on ('' for every address of this machine)
+        precondition: host is a str
+        parameter port: the TCP port to listen on (0 to pick a free port)
+        precondition: port is an int in 0..65535
+        parameter backlog: the most bytes queued for a spectator before it skips
+        precondition: backlog is an int > 0"""
+        asyncore.dispatcher.__init__(self, map=map)
+        self._map = map
+        self._welcome = welcome
+        self._subscribers = []
+        self._backlog = backlog
+        self._skips = 0
+        self._frames = 0
+        self.create_socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.set_reuse_addr()
+        self.bind((host, port))
+        self.listen(128)
+
+    # GETTERS
+    def getAddress(self):
+        """Returns: the (host, port) the hub listens on"""
+        return self.socket.getsockname()
+
+    def getSubscriberCount(self):
+        """Returns: the number of spectators connected"""
+        return len(self._subscribers)
+
+    def getSkips(self):
+        """Returns: the number of times a spectator fell behind and skipped frames"""
+        return self._skips
+
+    def getFrameCount(self):
+        """Returns: the number of frames published"""
+        return self._frames
+
+    def isWaiting(self):
+        """Returns: True if a spectator is waiting for a keyframe"""
+        for sub in self._subscribers:
+            if not sub.isSynced():
+                return True
+        return False
+
+    # FAN-OUT
+    def publish(self, delta, keyframe=None):
+        """Queues the frames of a step for every spectator
+
+        A synced spectator gets the delta, unless it has more than the backlog queued;
+        then its queue is dropped and it waits for a keyframe.  A waiting spectator gets
+        the keyframe, if there is one and its queue has drained below the backlog.
+
+        parameter delta: the NET_STATE frame of the step, or None if nothing changed
+        precondition: delta is None or a str
+        parameter keyframe: the NET_KEYFRAME frame of the step, or None
+        precondition: keyframe is None or a str"""
+        backlog = self._backlog
+        for sub in self._subscribers:
+            if sub.isSynced():
+                if sub.getQueued() > backlog:
+                    sub.skip()
+                    self._skips += 1
+                elif not delta is None:
+                    sub.push(delta)
+            if not keyframe is None and not sub.isSynced() and sub.getQueued() <= backlog:
+                sub.push(keyframe,True)
+        self._frames += 1
+
+    def finish(self, frame):
+        """Queues a last frame (e.g. NET_END) for every spectator, synced or not
+
+        parameter frame: the frame
+        precondition: frame is a str"""
+        for sub in self._subscribers:
+            sub.push(frame)
+
+    def isFlushed(self):
+        """Returns: True if nothing is queued for any spectator"""
+        for sub in self._subscribers:
+            if sub.writable():
+                return False
+        return True
+
+    def close(self):
+        """Closes every spectator connection and stops listening"""
+        for sub in self._subscribers:
+            sub.close()
+        self._subscribers = []
+        asyncore.dispatcher.close(self)
+
+    # ASYNCORE HANDLERS
+    def handle_accept(self):
+        """Takes a new spectator and sends them the level"""
+        pair = self.accept()
+        if pair is None:
+            return
+        sub = _Subscriber(pair[0],self,self._map)
+        sub.push(self._welcome)
+        self._subscribers.append(sub)
+
+    def _remove(self, sub):
+        """Forgets a spectator who left
+
+        parameter sub: the spectator
+        precondition: sub is a _Subscriber"""
+        if sub in self._subscribers:
+            self._subscribers.remove(sub)
+
+
+def frame_message(kind, body=''):
+    """Returns: a message (header and body) ready to send
+
+    parameter kind: the kind of message
+    precondition: kind is one of the NET constants
+    parameter body: the body of the message
+    precondition: body is a str"""
+    return _HEADER.pack(kind,len(body))+body
+
+
+def encode_state(tick, state, base, hits):
+    """Returns: the body of a NET_STATE message
+
+    A state is a tuple (paddles, ball, tries, extra).  The paddles are a tuple of (x,
+    width) pairs, the ball is an (x,y) pair or None if it is not shown, the tries are an
+    int and the extra balls are a tuple of (x,y) pairs.  Only the fields that differ
+    from the base are written.
+
+    parameter tick: the step number
+    precondition: tick is an int >= 0
+    parameter state: the state to send
+    precondition: state is a state tuple
+    parameter base: the state the receivers have already, or None to write every field
+    precondition: base is None or a state tuple with as many paddles as state
+    parameter hits: the bricks hit since the base, in order
+    precondition: hits is a list of ints >= 0"""
+    (paddles, ball, tries, extra) = state
+    mask = 0
+    parts = []
+    for ii in xrange(len(paddles)):
+        if base is None or paddles[ii] != base[0][ii]:
+            mask |= 1 << ii
+            parts.append(_PAIR.pack(*paddles[ii]))
+    if base is None or ball != base[1]:
+        mask |= DELTA_BALL
+        parts.append(_BYTE.pack(0) if ball is None else _BYTE.pack(1)+_PAIR.pack(*ball))
+    if base is None or tries != base[2]:
+        mask |= DELTA_TRIES
+        parts.append(_BYTE.pack(tries))
+    if base is None or extra != base[3]:
+        mask |= DELTA_EXTRA
+        parts.append(_BYTE.pack(len(extra)))
+        for pair in extra:
+            parts.append(_PAIR.pack(*pair))
+    if len(hits) > 0:
+        mask |= DELTA_HITS
+        parts.append(_COUNT.pack(len(hits)))
+        parts.append(np.array(hits,dtype='<u4').tostring())
+    return _TICK.pack(tick,mask)+''.join(parts)
+
+
+class GameServer(asyncore.dispatcher):
+    """An instance owns a game of co-op Breakout and serves it to its players.
+
+    The server steps the game every NET_TICK seconds (see serve).  A step moves every
+    paddle by the last input of its player, moves the balls and broadcasts the changes.
+    The first ball is served NET_SERVE_TICKS steps after every seat is taken, and every
+    other ball NET_SERVE_TICKS steps after a try is lost.  A player that leaves keeps
+    their seat free for someone else; their paddle stays where it was.
+
+    With a spectator port, the server also has a SpectatorHub, fed with the same frames
+    as the players and with a keyframe every NET_KEYFRAME steps.
+
+    INSTANCE ATTRIBUTES:
+        _map     [dict]: the socket map of the server and its connections
+        _game    [Play]: the game, with one paddle per player
+        _seats   [list of _Channel or None]: the connection of every player (None if free)
+        _inputs  [list of (float, float or None) pairs]: the last move and pointer x of
+                 every player
+        _period  [float > 0]: the seconds between two steps
+        _tick    [int >= 0]: the number of steps so far
+        _serve   [int >= 0]: the steps left before the next serve (0 if the ball is in play)
+        _started [bool]: whether the first ball has been served
+        _sent    [state tuple]: the state of the last broadcast (see encode_state)
+        _changes [int >= 0]: the number of brick changes in the last broadcast
+        _over    [bool]: whether the game is over
+        _hub     [SpectatorHub, or None if there are no spectators]: the spectators
+    """
+
+    def __init__(self, host=NET_HOST, port=NET_PORT, players=NET_PLAYERS, level=None,
+                 period=NET_TICK, spectators=None):
+        """Initializer: creates a game and starts listening for players
+
+        parameter host: the address to listen on ('' for every address of this machine)
+        precondition: host is a str
+        parameter port: the TCP port to listen on (0 to pick a free port, see getAddress)
+        precondition: port is an int in 0..65535
+        parameter players: the number of seats
+        precondition: players is an int in 1..PADDLE_MAX_PLAYERS
+        parameter level: the records of the level to play, or None for the grid
+        precondition: level is None or a NumPy array of BRICK_DTYPE
+        parameter period: the seconds between two steps
+        precondition: period is a float > 0
+        parameter spectators: the TCP port for spectators (0 to pick one), or None for none
+        precondition: spectators is None or an int in 0..65535"""
+        self._map = {}
+        asyncore.dispatcher.__init__(self, map=self._map)
+        self._game = Play(level=level, players=players)
+        self._seats = [None]*players
+        self._inputs = [(0.0, None)]*players
+        self._period = period
+        self._tick = 0
+        self._serve = NET_SERVE_TICKS
+        self._started = False
+        self._sent = self._snapshot()
+        self._changes = 0
+        self._over = False
+        self.create_socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.set_reuse_addr()
+        self.bind((host, port))
+        self.listen(players)
+        self._hub = None
+        if not spectators is None:
+            records = self._game.getBricks().getRecords()
+            welcome = frame_message(NET_WELCOME,_WELCOME.pack(NET_SPECTATOR,players,
+                                    len(records))+records.tostring())
+            self._hub = SpectatorHub(self._map,welcome,host,spectators)
+
+    # GETTERS
+    def getGame(self):
+        """Returns: the game served (a Play)"""
+        return self._game
+
+    def getAddress(self):
+        """Returns: the (host, port) the server listens on"""
+        return self.socket.getsockname()
+
+    def getPlayerCount(self):
+        """Returns: the number of players connected"""
+        return len(self._seats)-self._seats.count(None)
+
+    def getSpectators(self):
+        """Returns: the SpectatorHub of the server, or None if it has no spectators"""
+        return self._hub
+
+    def isOver(self):
+        """Returns: True if the game is over"""
+        return self._over
+
+    # THE GAME LOOP
+    def serve(self, steps=None):
+        """Runs the game until it is over, or for the given number of steps
+
+        Between two steps the server waits on the sockets, so input is applied as soon
+        as the next step.  If the server falls behind (e.g. the machine stalls) it runs
+        at most NET_CATCHUP steps back to back and then drops the rest of the delay.
+        When the game is over, the last messages are flushed and the server is closed.
+
+        parameter steps: the number of steps to run, or None to run to the end
+        precondition: steps is None or an int >= 0"""
+        count = 0
+        deadline = time.time()
+        while not self._over and (steps is None or count < steps):
+            now = time.time()
+            if now < deadline:
+                self.poll(deadline-now)
+                continue
+            self.step()
+            count += 1
+            deadline += self._period
+            if now-deadline > NET_CATCHUP*self._period:
+                deadline = now
+        if self._over:
+            self.shutdown()
+
+    def poll(self, timeout=0.0):
+        """Reads input and sends queued messages, waiting at most timeout seconds
+
+        parameter timeout: the most seconds to wait
+        precondition: timeout is a float >= 0"""
+        asyncore.loop(timeout, False, self._map, 1)
+
+    def start(self):
+        """Serves the first ball at the next step, without waiting for every seat"""
+        self._started = True
+        self._serve = min(self._serve,1)
+
+    def setInput(self, player, move, pointer=None):
+        """Sets the input of a player, used from the next step on
+
+        The input of a player that is connected is replaced by every message they send.
+        This is also how a bot (e.g. the load generator) plays an empty seat.
+
+        parameter player: the player
+        precondition: player is an int in 0..players-1
+        parameter move: the fraction of PADDLE_V to move right (negative to move left)
+        precondition: move is a float in [-1,1]
+        parameter pointer: the x coordinate for the paddle to follow, or None
+        precondition: pointer is None or a float"""
+        self._inputs[player] = (move, pointer)
+
+    def step(self):
+        """Steps the game once and broadcasts what changed"""
+        game = self._game
+        for player in xrange(len(self._seats)):
+            (move, pointer) = self._inputs[player]
+            game.movePaddle(player,move,pointer)
+        if self._serve > 0:
+            if self._started or not None in self._seats:
+                self._serve -= 1
+                if self._serve == 0:
+                    self._started = True
+                    game.serveBall()
+        else:
+            tries = game.getTries()
+            game.updateBall()
+            if game.getRemaining() == 0 or game.getTries() == 0:
+                self._over = True
+            elif tries != game.getTries():
+                self._serve = NET_SERVE_TICKS
+        game.getEvents().drain()
+        self._tick += 1
+        self._broadcast()
+        if self._over:
+            end = frame_message(NET_END,_BYTE.pack(1 if game.getRemaining() == 0 else 0))
+            for channel in self._seats:
+                if not channel is None:
+                    channel.push(end)
+            if not self._hub is None:
+                self._hub.finish(end)
+
+    def shutdown(self, timeout=1.0):
+        """Sends what is left to send (waiting at most timeout seconds) and closes
+        every connection and the server
+
+        parameter timeout: the most seconds to wait for the players
+        precondition: timeout is a float >= 0"""
+        end = time.time()+timeout
+        while time.time() < end and (any(not c is None and c.writable() for c in self._seats)
+                                     or not (self._hub is None or self._hub.isFlushed())):
+            self.poll(0.01)
+        for channel in self._seats:
+            if not channel is None:
+                channel.close()
+        self._seats = [None]*len(self._seats)
+        if not self._hub is None:
+            self._hub.close()
+        self.close()
+
+    # HELPERS FOR THE STATE
+    def _snapshot(self):
+        """Returns: the state of the game to send, as a state tuple (see encode_state)"""
+        game = self._game
+        paddles = tuple((p.x, p.width) for p in game.getPaddles())
+        ball = game.getBall()
+        if self._serve > 0 or ball is None:
+            return (paddles, None, game.getTries(), ())
+        extra = tuple((b.x, b.y) for b in game.getExtraBalls())
+        return (paddles, (ball.x, ball.y), game.getTries(), extra)
+
+    def _broadcast(self):
+        """Sends the fields that changed since the last broadcast to every player and
+        spectator
+
+        The frame is made once and the same str is queued for everyone.  Nothing is sent
+        if nothing changed, but a keyframe is still made for the spectators if it is
+        time for one and a spectator is waiting."""
+        state = self._snapshot()
+        bricks = self._game.getBricks()
+        hits = bricks.getChanges(self._changes)
+        body = encode_state(self._tick,state,self._sent,hits)
+        self._sent = state
+        self._changes = bricks.getChangeCount()
+        delta = None
+        if len(body) > _TICK.size:
+            delta = frame_message(NET_STATE,body)
+            for channel in self._seats:
+                if not channel is None:
+                    channel.push(delta)
+        hub = self._hub
+        if not hub is None and hub.getSubscriberCount() > 0:
+            keyframe = None
+            if self._tick % NET_KEYFRAME == 0 and hub.isWaiting():
+                keyframe = self._keyframe()
+            hub.publish(delta,keyframe)
+
+    def _keyframe(self):
+        """Returns: the NET_KEYFRAME frame of the last broadcast"""
+        bricks = self._game.getBricks()
+        body = [encode_state(self._tick,self._sent,None,[]),
+                np.packbits(bricks.getAlive()).tostring(),
+                bricks.getHitPoints().astype('<i2').tostring()]
+        return frame_message(NET_KEYFRAME,''.join(body))
+
+    # ASYNCORE HANDLERS
+    def handle_accept(self):
+        """Seats a new player and welcomes them, or turns them away if the game is full
+
+        The welcome has the level and every field of the last broadcast, with every
+        brick hit so far, so the player is in step with the others."""
+        pair = self.accept()
+        if pair is None:
+            return
+        channel = _Channel(pair[0],self,self._map)
+        if not None in self._seats or self._over:
+            channel.send_message(NET_FULL)
+            channel.close_when_done()
+            return
+        player = self._seats.index(None)
+        channel.player = player
+        self._seats[player] = channel
+        self._inputs[player] = (0.0, None)
+        records = self._game.getBricks().getRecords()
+        body = [_WELCOME.pack(player,len(self._seats),len(records)), records.tostring(),
+                encode_state(self._tick,self._sent,None,
+                             self._game.getBricks().getChanges()[:self._changes])]
+        channel.send_message(NET_WELCOME,''.join(body))
+
+    def _admits(self, kind, length):
+        """Returns: True if a message with this header may be read from a player
+
+        Players only send NET_INPUT, which has a fixed size.
+
+        parameter kind: the kind of message
+        precondition: kind is an int
+        parameter length: the length of the body
+        precondition: length is an int >= 0"""
+        return kind == NET_INPUT and length == _INPUT.size
+
+    def _receive(self, channel, kind, body):
+        """Keeps the input of a player for the next step
+
+        An input that is not a number (NaN or infinite) closes the connection.  A move
+        out of [-1,1] is ignored, and the pointer is kept on the screen.
+
+        parameter channel: the connection of the player
+        precondition: channel is a _Channel in _seats
+        parameter kind: the kind of message
+        precondition: kind is an int
+        parameter body: the body of the message
+        precondition: body is a str"""
+        if kind != NET_INPUT or len(body) != _INPUT.size or channel.player is None:
+            channel.handle_close()
+            return
+        (move, pointer) = _INPUT.unpack(body)
+        if math.isnan(move) or math.isinf(move) or math.isnan(pointer) or math.isinf(pointer):
+            channel.handle_close()
+            return
+        if not -1.0 <= move <= 1.0:
+            move = 0.0
+        self._inputs[channel.player] = (move, None if pointer < 0 else min(pointer,GAME_WIDTH))
+
+    def _disconnect(self, channel):
+        """Frees the seat of a player who left
+
+        parameter channel: the connection closed
+        precondition: channel is a _Channel"""
+        if not channel.player is None and self._seats[channel.player] is channel:
+            self._seats[channel.player] = None
+            self._inputs[channel.player] = (0.0, None)
+
+
+class GameClient(object):
+    """An instance is a connection to a GameServer, with a copy of the game to draw.
+
+    The copy only changes when a message from the server is read (see poll).  It has its
+    own BrickField, made from the level in the welcome, and replays the bricks hit on it.
+    The paddles and balls are placed where the server says.
+
+    The falling power-ups and the brick debris are not part of the protocol, so a client
+    never shows them.  The effects of the power-ups still show, as the server sends the 
+    paddle widths and the extra balls.
+
+    A client connected to the spectator port of a server only watches.  It has no 
+    player, sends no input and draws nothing until the first keyframe.
+
+    This class is a subcontroller, like Play.  Breakout only uses its getters and its
+    methods poll, sendInput and draw.
+
+    INSTANCE ATTRIBUTES:
+        _map     [dict]: the socket map of the connection
+        _channel [_Channel, or None if the connection is closed]: the connection
+        _player  [int >= 0, or None before the welcome or for a spectator]: the player of
+                 this client
+        _spectator [bool]: whether this client only watches
+        _synced  [bool]: whether the copy has the state of the last broadcast
+        _bricks  [BrickField, or None before the welcome]: the copy of the board
+        _paddles [list of Paddle]: the paddle of every player
+        _ball    [Ball]: the ball, drawn only if _shown is True
+        _shown   [bool]: whether the ball is in play
+        _extra   [list of Ball]: the balls of POWERUP_MULTI (only the first _count are drawn)
+        _count   [int >= 0]: the number of POWERUP_MULTI balls in play
+        _tries   [int >= 0]: the tries left
+        _tick    [int >= 0]: the step of the last state read
+        _input   [(float, float) pair]: the last input sent
+        _result  [None, or bool]: None while playing, True if the game was won, False if lost
+        _full    [bool]: whether the server turned this client away
+    """
+
+    # GETTERS
+    def isReady(self):
+        """Returns: True once the copy of the game can be drawn"""
+        return self._synced
+
+    def isSpectator(self):
+        """Returns: True if this client only watches"""
+        return self._spectator
+
+    def isConnected(self):
+        """Returns: True if the connection to the server is open"""
+        return not self._channel is None
+
+    def isFull(self):
+        """Returns: True if the server had no seat for this client"""
+        return self._full
+
+    def isServed(self):
+        """Returns: True if the ball is in play"""
+        return self._shown
+
+    def getPlayer(self):
+        """Returns: the player number of this client, or None before the welcome"""
+        return self._player
+
+    def getPlayerCount(self):
+        """Returns: the number of seats in the game"""
+        return len(self._paddles)
+
+    def getTries(self):
+        """Returns: the tries left"""
+        return self._tries
+
+    def getRemaining(self):
+        """Returns: the number of breakable bricks remaining (0 before the welcome)"""
+        return 0 if self._bricks is None else self._bricks.getRemaining()
+
+    def getTick(self):
+        """Returns: the step of the last state read"""
+        return self._tick
+
+    def getResult(self):
+        """Returns: None while the game is on, True if it was won and False if it was lost"""
+        return self._result
+
+    # INITIALIZER
+    def __init__(self, address, timeout=5.0):
+        """Initializer: connects to a server
+
+        The welcome is read by a later call to poll.
+
+        parameter address: the (host, port) of the server
+        precondition: address is a pair of a str and an int
+        parameter timeout: the most seconds to wait for the connection
+        precondition: timeout is a float > 0"""
+        self._map = {}
+        sock = socket.create_connection(address,timeout)
+        self._channel = _Channel(sock,self,self._map)
+        self._player = None
+        self._spectator = False
+        self._synced = False
+        self._bricks = None
+        self._paddles = []
+        self._ball = Ball(GAME_WIDTH/2.0,GAME_HEIGHT/2.0,BALL_DIAMETER,colormodel.BLUE)
+        self._shown = False
+        self._extra = []
+        self._count = 0
+        self._tries = NUMBER_TURNS
+        self._tick = 0
+        self._input = (0.0, -1.0)
+        self._result = None
+        self._full = False
+
+    # METHODS TO TALK TO THE SERVER
+    def poll(self, timeout=0.0):
+        """Sends the queued input and reads every message that has arrived
+
+        parameter timeout: the most seconds to wait for a message
+        precondition: timeout is a float >= 0"""
+        if not self._channel is None:
+            asyncore.loop(timeout, False, self._map, 1)
+
+    def sendInput(self, move, pointer=None):
+        """Sends the input of the player (if it changed since the last time)
+
+        The server keeps using the last input until a new one arrives.
+
+        parameter move: the fraction of PADDLE_V to move right (negative to move left)
+        precondition: move is a float in [-1,1]
+        parameter pointer: the x coordinate for the paddle to follow, or None
+        precondition: pointer is None or a float >= 0"""
+        value = (float(move), -1.0 if pointer is None else float(pointer))
+        if value != self._input and not self._channel is None and not self._spectator:
+            self._input = value
+            self._channel.send_message(NET_INPUT,_INPUT.pack(*value))
+
+    def close(self):
+        """Closes the connection to the server"""
+        if not self._channel is None:
+            self._channel.close()
+            self._channel = None
+
+    # DRAW METHOD
+    def draw(self, view):
+        """Draws the bricks, paddles and balls
+
+        There are no power-ups or particles to draw (see the class docstring).
+
+        parameter view: the view to draw to
+        precondition: view is a GView"""
+        if not self._synced:
+            return
+        self._bricks.draw(view)
+        for paddle in self._paddles:
+            paddle.draw(view)
+        if self._shown:
+            self._ball.draw(view)
+            for ii in xrange(self._count):
+                self._extra[ii].draw(view)
+
+    # HELPERS FOR THE MESSAGES
+    def _admits(self, kind, length):
+        """Returns: True, as the server is trusted (welcomes and keyframes are large)
+
+        parameter kind: the kind of message
+        precondition: kind is an int
+        parameter length: the length of the body
+        precondition: length is an int >= 0"""
+        return True
+
+    def _receive(self, channel, kind, body):
+        """Applies a message from the server
+
+        parameter channel: the connection
+        precondition: channel is _channel
+        parameter kind: the kind of message
+        precondition: kind is an int
+        parameter body: the body of the message
+        precondition: body is a str"""
+        if kind == NET_STATE and self._synced:
+            self._apply(body,0)
+        elif kind == NET_KEYFRAME and not self._bricks is None:
+            self._keyframe(body)
+        elif kind == NET_WELCOME:
+            self._welcome(body)
+        elif kind == NET_END:
+            self._result = _BYTE.unpack(body)[0] == 1
+        elif kind == NET_FULL:
+            self._full = True
+
+    def _disconnect(self, channel):
+        """Forgets the connection once the server hangs up
+
+        parameter channel: the connection
+        precondition: channel is _channel"""
+        self._channel = None
+
+    def _welcome(self, body):
+        """Makes the board and the paddles from a welcome, and applies its state
+
+        The welcome of a spectator has no state; the copy is synced by the next keyframe.
+
+        parameter body: the body of a NET_WELCOME message
+        precondition: body is a str"""
+        (player, players, count) = _WELCOME.unpack_from(body,0)
+        offset = _WELCOME.size
+        size = count*BRICK_DTYPE.itemsize
+        records = np.frombuffer(body,dtype=BRICK_DTYPE,count=count,offset=offset).copy()
+        self._spectator = player == NET_SPECTATOR
+        self._player = None if self._spectator else player
+        self._bricks = BrickField(records)
+        self._paddles = []
+        for ii in xrange(players):
+            color = PADDLE_COLORS[ii]
+            self._paddles.append(Paddle(GAME_WIDTH*(ii+0.5)/players,PADDLE_OFFSET,
+                                        PADDLE_WIDTH,PADDLE_HEIGHT,color,color))
+        if offset+size < len(body):
+            self._apply(body,offset+size)
+            self._synced = True
+
+    def _keyframe(self, body):
+        """Replaces the copy of the game with a keyframe
+
+        parameter body: the body of a NET_KEYFRAME message
+        precondition: body is a str"""
+        offset = self._apply(body,0)
+        count = self._bricks.getSize()
+        alive = np.unpackbits(np.frombuffer(body,dtype=np.uint8,count=(count+7)//8,
+                                            offset=offset))[:count].astype(bool)
+        offset += (count+7)//8
+        hp = np.frombuffer(body,dtype='<i2',count=count,offset=offset)
+        self._bricks.restore(alive,hp)
+        self._synced = True
+
+    def _apply(self, body, offset):
+        """Applies a state (see encode_state) to the copy of the game
+
+        Returns: the position in body after the state
+
+        parameter body: the message with the state
+        precondition: body is a str
+        parameter offset: the position of the state in body
+        precondition: offset is an int >= 0"""
+        (tick, mask) = _TICK.unpack_from(body,offset)
+        offset += _TICK.size
+        self._tick = tick
+        for ii in xrange(len(self._paddles)):
+            if mask & (1 << ii):
+                (x, width) = _PAIR.unpack_from(body,offset)
+                offset += _PAIR.size
+                paddle = self._paddles[ii]
+                paddle.width = width
+                paddle.x = x
+        if mask & DELTA_BALL:
+            self._shown = _BYTE.unpack_from(body,offset)[0] == 1
+            offset += _BYTE.size
+            if self._shown:
+                (self._ball.x, self._ball.y) = _PAIR.unpack_from(body,offset)
+                offset += _PAIR.size
+        if mask & DELTA_TRIES:
+            self._tries = _BYTE.unpack_from(body,offset)[0]
+            offset += _BYTE.size
+        if mask & DELTA_EXTRA:
+            self._count = _BYTE.unpack_from(body,offset)[0]
+            offset += _BYTE.size
+            for ii in xrange(self._count):
+                if ii == len(self._extra):
+                    self._extra.append(Ball(0,0,BALL_DIAMETER,colormodel.BLUE))
+                (self._extra[ii].x, self._extra[ii].y) = _PAIR.unpack_from(body,offset)
+                offset += _PAIR.size
+        if mask & DELTA_HITS:
+            count = _COUNT.unpack_from(body,offset)[0]
+            offset += _COUNT.size
+            for index in np.frombuffer(body,dtype='<u4',count=count,offset=offset):
+                self._bricks.hit(int(index))
+            offset += 4*count
+        return offset
+
+
+def _drain(address, count, seconds):
+    """Opens spectator connections and reads everything sent on them, for the load
+    generator (this runs in a worker process)
+
+    parameter address: the (host, port) of the spectator port
+    precondition: address is a pair of a str and an int
+    parameter count: the number of connections
+    precondition: count is an int >= 0
+    parameter seconds: the most seconds to read for
+    precondition: seconds is a float > 0"""
+    socks = []
+    for ii in xrange(count):
+        sock = socket.create_connection(address)
+        sock.setblocking(0)
+        socks.append(sock)
+    end = time.time()+seconds
+    while len(socks) > 0 and time.time() < end:
+        (ready, _, _) = select.select(socks,[],[],0.1)
+        for sock in ready:
+            try:
+                data = sock.recv(65536)
+            except socket.error:
+                data = ''
+            if not data:
+                socks.remove(sock)
+                sock.close()
+    for sock in socks:
+        sock.close()
+
+
+def measure_fanout(spectators=NET_LOAD_SPECTATORS, seconds=10.0, workers=None):
+    """Returns: the number of spectators one core can feed at NET_TICK, and the number
+    of times a spectator fell behind, as a pair
+
+    This is a load generator that runs entirely on loopback.  It starts a server with
+    one seat, which a bot plays (the paddle follows the ball), and worker processes that
+    open the spectator connections between them and read as fast as they can.  The 
+    server runs in this process, and its CPU time (user and system) is measured over
+    the given seconds.  The result is the spectators served, scaled by the share of one
+    core the server used.  As the time includes the game itself, it is a low estimate.
+
+    parameter spectators: the number of spectator connections
+    precondition: spectators is an int > 0
+    parameter seconds: the seconds to run the game for
+    precondition: seconds is a float > 0
+    parameter workers: the number of reader processes, or None for one per other core
+    precondition: workers is None or an int > 0"""
+    if workers is None:
+        workers = max(1,multiprocessing.cpu_count()-1)
+    server = GameServer(port=0,players=1,spectators=0)
+    hub = server.getSpectators()
+    procs = []
+    for ii in xrange(workers):
+        count = spectators//workers+(1 if ii < spectators % workers else 0)
+        proc = multiprocessing.Process(target=_drain,args=(hub.getAddress(),count,seconds+5.0))
+        proc.daemon = True
+        proc.start()
+        procs.append(proc)
+    wait = time.time()+5.0
+    while hub.getSubscriberCount() < spectators and time.time() < wait:
+        server.poll(0.01)
+    server.start()
+    game = server.getGame()
+    (user, system) = os.times()[:2]
+    start = time.time()
+    deadline = start
+    ticks = 0
+    while time.time()-start < seconds and not server.isOver():
+        now = time.time()
+        if now < deadline:
+            server.poll(deadline-now)
+            continue
+        ball = game.getBall()
+        server.setInput(0,0.0,None if ball is None else ball.x)
+        server.step()
+        ticks += 1
+        deadline += NET_TICK
+    times = os.times()
+    cpu = (times[0]-user)+(times[1]-system)
+    served = hub.getSubscriberCount()
+    skips = hub.getSkips()
+    server.shutdown(0.0)
+    for proc in procs:
+        proc.join(1.0)
+    if cpu <= 0:
+        cpu = 0.01
+    return (served*ticks*NET_TICK/cpu, skips)
+
+
+# Server application code
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serves a game of co-op Breakout')
+    parser.add_argument('--host',default=NET_HOST,help="the address to listen on ('' for the LAN)")
+    parser.add_argument('--port',type=int,default=NET_PORT,help='the TCP port to listen on')
+    parser.add_argument('--players',type=int,default=NET_PLAYERS,help='the number of players')
+    parser.add_argument('--level',default=None,help='a level file (see levels.py)')
+    parser.add_argument('--spectators',type=int,default=None,
+                        help='the TCP port for spectators (none if not given)')
+    parser.add_argument('--load',type=int,default=None,metavar='SPECTATORS',
+                        help='measure the spectators per core on loopback instead of serving')
+    args = parser.parse_args()
+    set_validation(VALIDATE_FULL if VALIDATE else VALIDATE_NONE)
+    if not args.load is None:
+        set_validation(VALIDATE_NONE)
+        (rate, skips) = measure_fanout(args.load)
+        print '%d spectators: %.0f spectators per core (%d skips to a keyframe)' % (args.load,
+                                                                                   rate,skips)
+    else:
+        server = GameServer(args.host,args.port,args.players,
+                            None if args.level is None else load_level(args.level),
+                            spectators=args.spectators)
+        print 'Serving %d players on %s:%d' % ((args.players,)+server.getAddress())
+        if not server.getSpectators() is None:
+            print 'Spectators on %s:%d' % server.getSpectators().getAddress()
+        server.serve()
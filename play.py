@@ -13,9 +13,13 @@ Their classes are defined in models.py.
 Most of your work on this assignment will be in either this module or models.py.
 Whether a helper method belongs in this module or models.py is often a complicated
 issue.  If you do not know, ask on Piazza and we will answer."""
+import random
 from constants import *
 from game2d import *
 from models import *
+from levels import *
+from events import *
+from broadphase import *
 
 
 # PRIMARY RULE: Play can only access attributes in models.py via getters/setters
@@ -33,10 +37,22 @@ class Play(object):
     subcontrollers.py from Lecture 25 for an example.
     
     INSTANCE ATTRIBUTES:
-        _paddle [Paddle]: the paddle to play with 
-        _bricks [list of Brick]: the list of bricks still remaining 
+        _paddle [Paddle]: the paddle to play with (the paddle of player 0)
+        _paddles [list of Paddle]: the paddle of every player, left to right at the start
+        _bricks [BrickField]: the bricks of the level; len(_bricks) is the number remaining
         _ball   [Ball, or None if waiting for a serve]:  the ball to animate
         _tries  [int >= 0]: the number of tries left 
+        _events [EventQueue]: the events of the ball, drained by the owner of the game
+        _broad  [SweepAndPrune]: the broad phase over the moving models (not the bricks)
+        _handles [dict of Ball to int]: the handle in _broad of every ball in play
+        _singlehit [bool]: whether only the deepest brick contact of a frame is hit
+        _extra  [list of Ball]: the balls added by POWERUP_MULTI; losing them costs no try
+        _powerups [PowerUpPool]: the power-ups falling from destroyed bricks
+        _effects [list of POWERUP_KINDS ints >= 0]: the frames left of each caught power-up
+        _wide   [list of Paddle]: the paddles widened by the running POWERUP_WIDE
+        _gunner [Paddle]: the paddle that fires POWERUP_LASER (the last one to catch it)
+        _particles [ParticleSystem]: the debris of destroyed bricks
+        _pointer [bool]: whether the paddle follows the mouse while it is pressed
     
     As you can see, all of these attributes are hidden.  You may find that you want to
     access an attribute in class Breakout. It is okay if you do, but you MAY NOT ACCESS 
@@ -57,84 +73,202 @@ class Play(object):
         """Return: the paddle to handle"""
         return self._paddle
     
+    def getPaddles(self):
+        """Return: the paddle of every player, as a list indexed by player"""
+        return self._paddles
+    
     def getBricks(self):
-        """Return: the list of the bricks remaining"""
+        """Return: the bricks remaining, as a BrickField"""
         return self._bricks
     
+    def getRemaining(self):
+        """Return: the number of breakable bricks remaining (the game is won at 0)"""
+        return self._bricks.getRemaining()
+    
     def getBall(self):
         """Return: the ball to play"""
         return self._ball
+    
+    def getExtraBalls(self):
+        """Return: the balls added by POWERUP_MULTI, as a list"""
+        return self._extra
+    
+    def getPowerUps(self):
+        """Return: the power-ups falling, as a PowerUpPool"""
+        return self._powerups
         
     def getTries(self):
         """Return: the life that the play has left"""
         return self._tries
     
+    def getEvents(self):
+        """Return: the queue of ball events (see events.py)"""
+        return self._events
+    
     def getMusic(self):
         """Return: the sound of the bouncing and breaking"""
         return self._music
     
     # INITIALIZER (standard form) TO CREATE PADDLES AND BRICKS
-    def __init__(self):
+    def __init__(self,rows=BRICK_ROWS,columns=BRICKS_IN_ROW,level=None,events=None,
+                 singlehit=True,pointer=False,players=1):
         """Initializer: to create paddle and bricks.
         
-        This function creates a paddle and a 2 dimensional list of bricks. When they are created, they can be drawed
+        This function creates a paddle and the bricks. When they are created, they can be drawed
         by a draw method. Moreover, it also assign default values to music and tries attributes.
+        
+        The bricks come from the given level.  If there is no level, they are the classic
+        grid of the given size.
+        
+        parameter rows: the number of rows of bricks (ignored if there is a level)
+        precondition: rows is an int > 0
+        parameter columns: the number of bricks in a row (ignored if there is a level)
+        precondition: columns is an int > 0 with GAME_WIDTH/columns > BRICK_SEP_H
+        parameter level: the records of the level to play, or None for the grid
+        precondition: level is None or a NumPy array of BRICK_DTYPE (see levels.py)
+        parameter events: the queue to report ball events to, or None for a new one
+        precondition: events is None or an EventQueue
+        parameter singlehit: whether the ball hits only one brick per frame
+        precondition: singlehit is a bool
+        parameter pointer: whether the paddle follows the mouse while it is pressed
+        precondition: pointer is a bool
+        parameter players: the number of paddles, spread evenly along the bottom
+        precondition: players is an int in 1..PADDLE_MAX_PLAYERS
         """
-        bricks_list=[]
-        for row in range(BRICK_ROWS):
-            color=(row if row<10 else row%10)
-            for column in range(BRICKS_IN_ROW):
-                b=Brick(BRICK_SEP_H/2.0+column*(BRICK_WIDTH+BRICK_SEP_H)+BRICK_WIDTH/2.0,
-                                 GAME_HEIGHT-BRICK_Y_OFFSET-BRICK_HEIGHT/2.0-row*BRICK_HEIGHT-row*BRICK_SEP_V,
-                                 BRICK_WIDTH, BRICK_HEIGHT, BRICK_COLOR[color], BRICK_COLOR[color])
-                bricks_list+=[b]
-        self._bricks=bricks_list
-        self._paddle=Paddle(GAME_WIDTH/2.0,PADDLE_OFFSET,PADDLE_WIDTH,PADDLE_HEIGHT, colormodel.BLACK,colormodel.BLACK)
+        assert type(players)==int and 1<=players<=PADDLE_MAX_PLAYERS, `players`
+        if level is None:
+            level=grid_level(rows,columns)
+        self._events=EventQueue() if events is None else events
+        self._bricks=BrickField(level)
+        self._paddles=[]
+        self._broad=SweepAndPrune()
+        for ii in xrange(players):
+            color=PADDLE_COLORS[ii]
+            paddle=Paddle(GAME_WIDTH*(ii+0.5)/players,PADDLE_OFFSET,PADDLE_WIDTH,PADDLE_HEIGHT,
+                          color,color)
+            self._paddles.append(paddle)
+            self._broad.add(paddle)
+        self._paddle=self._paddles[0]
+        self._ball=None
+        self._handles={}
+        self._singlehit=singlehit
+        self._pointer=pointer
+        self._extra=[]
+        self._powerups=PowerUpPool()
+        self._effects=[0]*POWERUP_KINDS
+        self._wide=[]
+        self._gunner=self._paddle
+        self._particles=ParticleSystem()
         self._tries=3
         self._music=None 
             
     # UPDATE METHODS TO MOVE PADDLE, SERVE AND MOVE THE BALL
     def updatePaddle(self,inputkey):
         """animinate the paddle
+        
+        The paddle moves PADDLE_V for every frame an arrow key is held down, in
+        proportion to the part of the last frame it was held (see GInput.held_fraction).
+        A tap shorter than a frame still moves the paddle a little.
+        
+        In pointer mode, while the mouse is pressed the paddle follows it instead.  It
+        covers PADDLE_FOLLOW of the distance to the mouse every frame, but never more
+        than PADDLE_MAX_V.  The mouse position is read as two floats (touch_x), so no
+        object is created per frame.
+        
         parameter inputkey: an indicator of keyboard information
         precondition: inputkey is an object of class GInput"""
-        if inputkey.is_key_down('right'):
-            self._paddle.x=min(self._paddle.x+PADDLE_V , GAME_WIDTH-PADDLE_WIDTH/2.0)
-        if inputkey.is_key_down('left'):
-            self._paddle.x=max(self._paddle.x-PADDLE_V, PADDLE_WIDTH/2.0)
+        if self._pointer and inputkey.is_touch_down():
+            self._followPointer(self._paddle,inputkey.touch_x)
+            return
+        right=inputkey.held_fraction('right')
+        if right>0:
+            self._paddle.x=min(self._paddle.x+PADDLE_V*right, GAME_WIDTH-self._paddle.width/2.0)
+        left=inputkey.held_fraction('left')
+        if left>0:
+            self._paddle.x=max(self._paddle.x-PADDLE_V*left, self._paddle.width/2.0)
+    
+    def movePaddle(self,player,move,pointer=None):
+        """Moves the paddle of a player by an input that did not come from a GInput
+        
+        This is how the game server (see network.py) applies the input of a client.  A 
+        move of 1 is the same as holding the right arrow key for the whole frame, and -1
+        the same as holding the left one.  If there is a pointer, the paddle follows it
+        instead, as in updatePaddle.
+        
+        parameter player: the player whose paddle moves
+        precondition: player is an int in 0..len(getPaddles())-1
+        parameter move: the fraction of PADDLE_V to move right (negative to move left)
+        precondition: move is a float in [-1,1]
+        parameter pointer: the x coordinate to follow, or None to use move
+        precondition: pointer is None or a float"""
+        paddle=self._paddles[player]
+        if pointer is not None:
+            self._followPointer(paddle,pointer)
+        elif move>0:
+            paddle.x=min(paddle.x+PADDLE_V*move, GAME_WIDTH-paddle.width/2.0)
+        elif move<0:
+            paddle.x=max(paddle.x+PADDLE_V*move, paddle.width/2.0)
+    
+    def _followPointer(self,paddle,x):
+        """Moves a paddle toward the given x coordinate, with smoothing and a speed limit
+        
+        The paddle stays in [width/2, GAME_WIDTH-width/2], as for the arrow keys.
+        
+        parameter paddle: the paddle to move
+        precondition: paddle is one of the paddles in _paddles
+        parameter x: the x coordinate of the mouse
+        precondition: x is a float"""
+        half=paddle.width/2.0
+        target=min(max(x,half),GAME_WIDTH-half)
+        dx=(target-paddle.x)*PADDLE_FOLLOW
+        if dx>PADDLE_MAX_V:
+            dx=PADDLE_MAX_V
+        elif dx<-PADDLE_MAX_V:
+            dx=-PADDLE_MAX_V
+        paddle.x=paddle.x+dx
             
     def updateBall(self):
         """This method animinate the ball
         
         checking the dynamic condition of the ball and animate it
-        moving or hit the obstacle and change the direction of the ball"""
-        self._ball.x=self._ball.x+self._ball.getVx()
-        self._ball.y=self._ball.y+self._ball.getVy()
-        state = None
-        for b in self._bricks:
-            if b.collides(self._ball):
-                self._ball.change_Ydirection()
-                self._bricks.remove(b)
-                state = "brick"
-        if self._paddle.collides(self._ball):
-            self._ball.change_Ydirection()
-            state = "paddle"
-        if self._ball.x>=GAME_WIDTH-BALL_DIAMETER/2.0 or self._ball.x<=BALL_DIAMETER/2.0:
-            self._ball.change_Xdirection()
-        if self._ball.y>=GAME_HEIGHT-BALL_DIAMETER/2.0:
-            self._ball.change_Ydirection()
+        moving or hit the obstacle and change the direction of the ball
+        
+        Every hit is pushed to the event queue (see getEvents), so several hits in
+        one frame are all reported.
+        
+        The extra balls of POWERUP_MULTI move the same way.  When the ball falls out
+        while there are extra balls, one of them becomes the ball and no try is lost.
+        The falling power-ups and the caught ones are updated last."""
+        self._moveBall(self._ball)
+        for ball in self._extra:
+            self._moveBall(ball)
+        with profile_scope('broadphase'):
+            pairs=self._broad.update()
+        for (a, b) in pairs:
+            self._collideObjects(a,b)
+        for ii in xrange(len(self._extra)-1,-1,-1):
+            if self._extra[ii].y<=BALL_DIAMETER/2.0:
+                self._removeBall(self._extra.pop(ii))
         if self._ball.y<=BALL_DIAMETER/2.0:
-            self._tries=self._tries-1
-        return state
+            if self._extra:
+                self._removeBall(self._ball)
+                self._ball=self._extra.pop()
+            else:
+                self._tries=self._tries-1
+                self._events.push(EVENT_LOST,self._tries)
+        self._updatePowerUps()
+        self._particles.update()
             
     # DRAW METHOD TO DRAW THE PADDLES, BALL, AND BRICKS
     def draw(self,view):
         """draw the paddle and bricks
         parameter view:the contents that this method is going to draw
         precondition: view is an object of class GameApp"""
-        for brick in self._bricks:
-            brick.draw(view)
-        self._paddle.draw(view)
+        self._bricks.draw(view)
+        self._particles.draw(view)
+        self._powerups.draw(view)
+        for paddle in self._paddles:
+            paddle.draw(view)
      
     def drawBall(self,view):
         """draw the ball
@@ -142,14 +276,184 @@ class Play(object):
         precondition: view is an object of class GameApp"""
         if self.getBall() is not None:
             self.getBall().draw(view)
+        for ball in self._extra:
+            ball.draw(view)
                
     # HELPER METHODS FOR PHYSICS AND COLLISION DETECTION
+    def _moveBall(self,ball):
+        """Moves a ball one frame and bounces it off the bricks and walls
+        
+        parameter ball: the ball to move
+        precondition: ball is a Ball in play"""
+        events=self._events
+        ball.x=ball.x+ball.getVx()
+        ball.y=ball.y+ball.getVy()
+        with profile_scope('collisions'):
+            self._resolveBricks(ball)
+        if ball.x>=GAME_WIDTH-BALL_DIAMETER/2.0 or ball.x<=BALL_DIAMETER/2.0:
+            ball.change_Xdirection()
+            events.push(EVENT_WALL,WALL_LEFT if ball.x<=BALL_DIAMETER/2.0 else WALL_RIGHT)
+        if ball.y>=GAME_HEIGHT-BALL_DIAMETER/2.0:
+            ball.change_Ydirection()
+            events.push(EVENT_WALL,WALL_TOP)
+    
+    def _resolveBricks(self,ball):
+        """Bounces the ball off the bricks it touches this frame
+        
+        All of the contacts of the frame are gathered first.  The deepest one decides
+        the bounce: the ball is pushed out of that brick along the contact normal, and
+        its velocity is reflected on that axis (once, and only if it is moving into the
+        brick).  So a side hit flips x, and touching two bricks at once never flips the 
+        ball twice and sends it on through the row.
+        
+        If _singlehit is True only the deepest brick is hit; otherwise every brick 
+        touched is hit.
+        
+        parameter ball: the ball to bounce
+        precondition: ball is a Ball in play"""
+        bricks=self._bricks
+        contacts=bricks.collide(ball)
+        if len(contacts)==0:
+            return
+        best=contacts[0]
+        (depth, axis, push)=bricks.getContact(best,ball)
+        for b in contacts[1:]:
+            contact=bricks.getContact(b,ball)
+            if contact[0]>depth:
+                best=b
+                (depth, axis, push)=contact
+        if axis==0:
+            ball.x=ball.x+push
+            if ball.getVx()*push<0:
+                ball.change_Xdirection()
+        else:
+            ball.y=ball.y+push
+            if ball.getVy()*push<0:
+                ball.change_Ydirection()
+        for b in ([best] if self._singlehit else contacts):
+            self._hitBrick(b)
+    
+    def _hitBrick(self,index):
+        """Damages a brick and reports it; a destroyed brick bursts into particles and
+        may drop a power-up
+        
+        parameter index: the brick hit
+        precondition: index is the index of a brick on the board"""
+        bricks=self._bricks
+        color=bricks.getColor(index)
+        if bricks.hit(index):
+            rec=bricks.getRecords()[index]
+            self._particles.emit(float(rec['x']),float(rec['y']),PARTICLE_BURST,color)
+            if random.random()<POWERUP_CHANCE:
+                self._powerups.drop(random.randrange(POWERUP_KINDS),float(rec['x']),float(rec['y']))
+        self._events.push(EVENT_BRICK,int(index),bricks.getHP(index))
+    
+    def _collideObjects(self,a,b):
+        """Narrow phase for a pair of moving models whose boxes overlap
+        
+        The broad phase (_broad) only reports pairs whose bounding boxes overlap.  This
+        method runs the exact test for the pair and responds to a hit.
+        
+        parameter a, b: the two models
+        precondition: a and b are models in _broad"""
+        if isinstance(a,Ball):
+            a,b=b,a
+        if isinstance(a,Paddle) and isinstance(b,Ball) and a.collides(b):
+            b.bounce(a.getOffset(b))
+            b.y=a.top+BALL_DIAMETER/2.0
+            self._events.push(EVENT_PADDLE,self._paddles.index(a),b.x-a.x)
+    
+    
+    def _updatePowerUps(self):
+        """Moves the falling power-ups and runs the ones that have been caught"""
+        (kinds, catchers)=self._powerups.update(self._paddles)
+        for ii in xrange(len(kinds)):
+            self._startPowerUp(int(kinds[ii]),self._paddles[catchers[ii]])
+        effects=self._effects
+        for kind in xrange(POWERUP_KINDS):
+            if effects[kind]>0:
+                effects[kind]-=1
+                if kind==POWERUP_LASER and effects[kind]%POWERUP_LASER_PERIOD==0:
+                    self._fireLaser()
+                if effects[kind]==0:
+                    self._endPowerUp(kind)
+    
+    def _startPowerUp(self,kind,paddle):
+        """Starts the effect of a caught power-up (or restarts its timer)
+        
+        POWERUP_WIDE widens the paddle that caught it, and POWERUP_LASER fires from it.
+        
+        parameter kind: the power-up caught
+        precondition: kind is one of the POWERUP constants
+        parameter paddle: the paddle that caught the power-up
+        precondition: paddle is one of the paddles of this game"""
+        self._events.push(EVENT_POWERUP,kind)
+        if kind==POWERUP_MULTI:
+            main=self._ball
+            for (vx, vy) in ((-main.getVx(),main.getVy()),(main.getVx(),-main.getVy())):
+                if len(self._extra)+1>=POWERUP_MAX_BALLS:
+                    break
+                ball=Ball(main.x,main.y,BALL_DIAMETER,colormodel.BLUE)
+                ball.setVelocity(vx,vy)
+                self._extra.append(ball)
+                self._handles[ball]=self._broad.add(ball)
+            return
+        if kind==POWERUP_WIDE:
+            if not paddle in self._wide:
+                paddle.width=PADDLE_WIDTH*POWERUP_WIDE_SCALE
+                paddle.x=min(max(paddle.x,paddle.width/2.0),GAME_WIDTH-paddle.width/2.0)
+                self._wide.append(paddle)
+        elif kind==POWERUP_LASER:
+            self._gunner=paddle
+        elif kind==POWERUP_SLOW and self._effects[kind]==0:
+            self._ball.scaleSpeed(POWERUP_SLOW_SCALE)
+            for ball in self._extra:
+                ball.scaleSpeed(POWERUP_SLOW_SCALE)
+        self._effects[kind]=POWERUP_FRAMES
+    
+    def _endPowerUp(self,kind):
+        """Undoes the effect of a power-up whose time is up
+        
+        parameter kind: the power-up ending
+        precondition: kind is one of the POWERUP constants"""
+        self._effects[kind]=0
+        if kind==POWERUP_WIDE:
+            for paddle in self._wide:
+                paddle.width=PADDLE_WIDTH
+            del self._wide[:]
+        elif kind==POWERUP_SLOW:
+            self._ball.scaleSpeed(1.0/POWERUP_SLOW_SCALE)
+            for ball in self._extra:
+                ball.scaleSpeed(1.0/POWERUP_SLOW_SCALE)
+    
+    def _fireLaser(self):
+        """Hits the lowest brick straight above the center of the gunner paddle (if any)"""
+        x=self._gunner.x
+        above=self._bricks.query(x-1.0,self._gunner.top,x+1.0,GAME_HEIGHT)
+        if len(above)>0:
+            heights=self._bricks.getRecords()['y'][above]
+            self._hitBrick(above[heights.argmin()])
+    
+    def _removeBall(self,ball):
+        """Takes a ball out of the broad phase
+        
+        parameter ball: the ball to remove
+        precondition: ball is a Ball in play"""
+        self._broad.remove(self._handles.pop(ball))
     
     # ADD ANY ADDITIONAL METHODS (FULLY SPECIFIED) HERE
     def serveBall(self):
         """Initializer for ball: create a ball.
         
-        This method provides the ball on the screen.
+        This method provides the ball on the screen.  Serving a new ball also ends
+        every power-up and clears the ones still falling.
         """
+        for kind in xrange(POWERUP_KINDS):
+            if self._effects[kind]>0:
+                self._endPowerUp(kind)
+        self._powerups.clear()
+        if self._ball is not None:
+            self._removeBall(self._ball)
         self._ball=Ball(0.5*GAME_WIDTH,0.5*GAME_WIDTH,
-                        BALL_DIAMETER,colormodel.BLUE)
\ No newline at end of file
+                        BALL_DIAMETER,colormodel.BLUE)
+        self._handles[self._ball]=self._broad.add(self._ball)
\ No newline at end of file
@@ -0,0 +1,232 @@
+# renderer.py
+# Rui Chen rc687 and Tian Tan tt474
+# 10/19/2026
+"""Software renderer for Breakout
+
+This module draws the state of a game (an instance of Play) into a small NumPy image,
+without Kivy or a GPU.  It is used for the pixel observations of vision-based agents
+(see environment.py).
+
+The image is a uint8 array of shape (height, width, channels), with 1 channel
+(luminance) or 3 channels (RGB).  Row 0 is the top of the game.  A pixel is covered by
+a shape if its center is inside the shape.  The bricks and the paddle are drawn as
+rectangles and the ball as an ellipse, in the same order as Play.draw: bricks, paddle,
+ball.
+
+After the first frame of a game, only the dirty regions are redrawn: the old and new
+ball and paddle rectangles, and the bricks hit or removed since the last frame.  The
+cost of a frame does not depend on the number of bricks."""
+import math
+import numpy as np
+from constants import *
+from play import *
+
+
+#: the background color (the GView clears to white)
+RENDER_BACKGROUND = (1.0,1.0,1.0,1.0)
+
+
+class SoftwareRenderer(object):
+    """An instance renders games into one preallocated image.
+
+    The image returned by render is always the same array, overwritten every frame.
+    Copy it if you need to keep it.
+
+    INSTANCE ATTRIBUTES:
+        _image    [uint8 array of shape (height, width, channels)]: the image
+        _scale    [pair of floats]: the pixels per game unit across and down
+        _game     [Play, or None]: the game in the image
+        _changes  [int >= 0]: the number of brick changes already drawn
+        _regions  [list of 4-tuples of ints]: the paddle and ball pixel bounds last frame
+        _palette  [uint8 array of shape (bricks, channels)]: the undamaged brick colors
+    """
+
+    # IMMUTABLE PROPERTIES
+    @property
+    def image(self):
+        """The rendered image.
+
+        **Invariant**: Must be a uint8 array of shape (height, width, channels)."""
+        return self._image
+
+
+    # BUILT-IN METHODS
+    def __init__(self, width=84, height=84, channels=1):
+        """**Constructor**: creates a renderer with a blank image.
+
+            :param width: the image width in pixels
+            **Precondition**: an int > 0
+
+            :param height: the image height in pixels
+            **Precondition**: an int > 0
+
+            :param channels: the number of color channels
+            **Precondition**: 1 (luminance) or 3 (RGB)
+        """
+        assert type(width) == int and width > 0, 'width %s is not valid' % `width`
+        assert type(height) == int and height > 0, 'height %s is not valid' % `height`
+        assert channels in (1,3), 'channels %s is not 1 or 3' % `channels`
+        self._image = np.zeros((height,width,channels),dtype=np.uint8)
+        self._scale = (float(width)/GAME_WIDTH,float(height)/GAME_HEIGHT)
+        self._background = self._pixel(RENDER_BACKGROUND)
+        self._game = None
+        self._changes = 0
+        self._regions = []
+        self._palette = None
+
+
+    # PUBLIC METHODS
+    def render(self, game):
+        """**Returns**: The image, updated to the current state of the game.
+
+            :param game: the game to draw
+            **Precondition**: a Play object
+
+        The first time a game is rendered, the whole image is drawn.  After that only
+        the dirty regions are redrawn."""
+        if game is self._game:
+            self._update(game)
+        else:
+            self._redraw(game)
+        return self._image
+
+
+    # HIDDEN METHODS
+    def _redraw(self, game):
+        """Draws the whole game from scratch
+
+            :param game: the game to draw
+            **Precondition**: a Play object
+        """
+        field = game.getBricks()
+        records = field.getRecords()
+        colors = records['color'][:,:3].astype(np.float64)
+        if self._image.shape[2] == 1:
+            colors = np.dot(colors,[0.299,0.587,0.114])[:,np.newaxis]
+        self._palette = np.round(colors).astype(np.uint8)
+
+        self._game = game
+        self._changes = field.getChangeCount()
+        self._image[:] = self._background
+        for index in np.flatnonzero(field.getAlive()):
+            self._brick(field,index,None)
+        self._regions = []
+        self._movers(game)
+
+    def _update(self, game):
+        """Redraws the dirty regions of the game
+
+            :param game: the game to draw
+            **Precondition**: a Play object (the one drawn last frame)
+        """
+        field = game.getBricks()
+        regions = self._regions
+        for index in field.getChanges(self._changes):
+            rec = field.getRecords()[index]
+            hw = rec['width']/2.0
+            hh = rec['height']/2.0
+            regions.append(self._bounds(rec['x']-hw,rec['y']-hh,rec['x']+hw,rec['y']+hh))
+        self._changes = field.getChangeCount()
+
+        sx, sy = self._scale
+        for region in regions:
+            (r0, r1, c0, c1) = region
+            if r0 >= r1 or c0 >= c1:
+                continue
+            self._image[r0:r1,c0:c1] = self._background
+            for index in field.query(c0/sx,GAME_HEIGHT-r1/sy,c1/sx,GAME_HEIGHT-r0/sy):
+                self._brick(field,index,region)
+        self._regions = []
+        self._movers(game)
+
+    def _movers(self, game):
+        """Draws the paddle and ball, remembering their bounds for the next frame
+
+            :param game: the game to draw
+            **Precondition**: a Play object
+        """
+        paddle = game.getPaddle()
+        bounds = self._bounds(paddle.left,paddle.bottom,paddle.right,paddle.top)
+        self._fill(bounds,self._pixel(paddle.fillcolor))
+        self._regions.append(bounds)
+
+        ball = game.getBall()
+        if ball is None:
+            return
+        bounds = self._bounds(ball.left,ball.bottom,ball.right,ball.top)
+        (r0, r1, c0, c1) = bounds
+        self._regions.append(bounds)
+        if r0 >= r1 or c0 >= c1:
+            return
+        sx, sy = self._scale
+        rows, cols = np.ogrid[r0:r1,c0:c1]
+        dx = ((cols+0.5)/sx-ball.x)/(ball.width/2.0)
+        dy = ((GAME_HEIGHT-(rows+0.5)/sy)-ball.y)/(ball.height/2.0)
+        self._image[r0:r1,c0:c1][dx*dx+dy*dy <= 1.0] = self._pixel(ball.fillcolor)
+
+    def _brick(self, field, index, clip):
+        """Draws a brick, clipped to the given pixel bounds
+
+            :param field: the bricks of the game
+            **Precondition**: a BrickField
+
+            :param index: the brick to draw
+            **Precondition**: an int, the index of a brick on the board
+
+            :param clip: the pixel bounds to draw in, or None for the whole image
+            **Precondition**: a 4-tuple of ints (r0,r1,c0,c1), or None
+        """
+        rec = field.getRecords()[index]
+        hw = rec['width']/2.0
+        hh = rec['height']/2.0
+        (r0, r1, c0, c1) = self._bounds(rec['x']-hw,rec['y']-hh,rec['x']+hw,rec['y']+hh)
+        if not clip is None:
+            r0 = max(r0,clip[0])
+            r1 = min(r1,clip[1])
+            c0 = max(c0,clip[2])
+            c1 = min(c1,clip[3])
+        if rec['hp'] > 1 and field.getHP(index) != rec['hp']:
+            color = self._pixel(field.getColor(index))
+        else:
+            color = self._palette[index]
+        self._fill((r0,r1,c0,c1),color)
+
+    def _fill(self, bounds, color):
+        """Fills the given pixel bounds with a color
+
+            :param bounds: the pixel bounds
+            **Precondition**: a 4-tuple of ints (r0,r1,c0,c1)
+
+            :param color: the pixel value
+            **Precondition**: a uint8 array with one value per channel
+        """
+        (r0, r1, c0, c1) = bounds
+        if r0 < r1 and c0 < c1:
+            self._image[r0:r1,c0:c1] = color
+
+    def _bounds(self, left, bottom, right, top):
+        """**Returns**: The pixel bounds (r0,r1,c0,c1) of a rectangle, clipped to the image.
+
+        The bounds are half open: they cover rows r0..r1-1 and columns c0..c1-1.
+
+            :param left, bottom, right, top: the edges of the rectangle in the game
+            **Precondition**: all are numbers with left <= right, bottom <= top
+        """
+        sx, sy = self._scale
+        height, width = self._image.shape[:2]
+        c0 = min(max(int(math.ceil(left*sx-0.5)),0),width)
+        c1 = min(max(int(math.ceil(right*sx-0.5)),0),width)
+        r0 = min(max(int(math.ceil((GAME_HEIGHT-top)*sy-0.5)),0),height)
+        r1 = min(max(int(math.ceil((GAME_HEIGHT-bottom)*sy-0.5)),0),height)
+        return (r0,r1,c0,c1)
+
+    def _pixel(self, color):
+        """**Returns**: The pixel value of a color
+
+            :param color: the color
+            **Precondition**: a sequence of 3 or 4 floats in 0..1
+        """
+        rgb = np.array(color[:3],dtype=np.float64)*255.0
+        if self._image.shape[2] == 1:
+            rgb = np.array([np.dot(rgb,[0.299,0.587,0.114])])
+        return np.round(rgb).astype(np.uint8)
@@ -0,0 +1,441 @@
+# simulation.py
+# Rui Chen rc687 and Tian Tan tt474
+# 10/19/2026
+"""Threaded simulation for Breakout
+
+Normally Breakout updates and draws its game one after the other on the Kivy thread, so
+a slow frame (a label to rasterize, many bricks to draw) also delays the physics.  A
+ThreadedPlay instead runs the game (an instance of Play) on its own thread, at a fixed
+rate of one step every SIM_TICK seconds, and only draws on the Kivy thread.
+
+The two threads share two preallocated state buffers.  After every step the simulation
+thread writes the paddles, the balls, the falling power-ups, the tries and the bricks
+into the buffer it did not publish last, and then publishes it.  The drawing side
+copies the last published buffer into a buffer of its own, applies that copy to its
+own copy of the game and draws it.  There are no locks.  A buffer has a sequence
+number that is odd while it is written, so the reader can tell if the writer came
+round to the buffer while it was copying it (the drawing side was more than a whole
+step late), and copies it again.  If it never gets a clean copy, it keeps drawing the
+previous state.
+
+A ThreadedPlay has the methods of Play that Breakout uses, so Breakout plays it the same
+way (see SIM_THREADED).  The physics never touch the Kivy objects that are drawn, and
+the hits are reported on the Kivy thread, when the state is read.  The debris of the
+destroyed bricks is only made on the drawing side, as the bricks are read.
+
+The thread still shares the interpreter lock with the Kivy thread, so this does not add
+a core.  What it buys is that a late frame no longer holds back the game clock."""
+import threading
+import time
+import numpy as np
+from constants import *
+from play import *
+
+
+#: the largest number of steps the simulation runs back to back to catch up after a stall
+SIM_CATCHUP = 5
+#: the most times the drawing side reads again when the writer overtakes it
+SIM_RETRIES = 4
+
+
+class _StateBuffer(object):
+    """An instance is one of the two state buffers of a ThreadedPlay.
+
+    Only the simulation thread writes a buffer, and only the drawing side reads it.  The
+    arrays are allocated once, so publishing a step allocates nothing.
+
+    INSTANCE ATTRIBUTES:
+        seq     [int >= 0]: odd while the buffer is being written, even when it is complete
+        tick    [int >= 0]: the step in the buffer
+        paddles [float64 array of shape (players,2)]: the x and width of every paddle
+        ball    [float64 array of 2]: the ball position (meaningless if not shown)
+        shown   [bool]: whether the ball is in play
+        extra   [float64 array of shape (POWERUP_MAX_BALLS,2)]: the POWERUP_MULTI balls
+        count   [int >= 0]: the number of POWERUP_MULTI balls in extra
+        powerx  [float64 array of POWERUP_KINDS*POWERUP_POOL]: the x of every power-up
+                slot (slot i holds kind i//POWERUP_POOL)
+        powery  [float64 array, same length as powerx]: the y of every power-up slot
+        falling [bool array, same length as powerx]: whether each power-up slot is falling
+        tries   [int >= 0]: the tries left
+        remaining [int >= 0]: the breakable bricks left
+        paddlehits [int >= 0]: the number of paddle hits so far
+        alive   [bool array]: the mask of bricks on the board
+        hp      [int16 array]: the hit points of every brick
+        changes [int >= 0]: the brick changes (see BrickField.getChangeCount) in alive and hp
+    """
+
+    def __init__(self, players, bricks):
+        """Initializer: allocates a buffer with the state of a new game
+
+        parameter players: the number of paddles
+        precondition: players is an int > 0
+        parameter bricks: the bricks of the game
+        precondition: bricks is a BrickField"""
+        self.seq = 0
+        self.tick = 0
+        self.paddles = np.zeros((players,2),dtype=np.float64)
+        self.ball = np.zeros(2,dtype=np.float64)
+        self.shown = False
+        self.extra = np.zeros((POWERUP_MAX_BALLS,2),dtype=np.float64)
+        self.count = 0
+        size = POWERUP_KINDS*POWERUP_POOL
+        self.powerx = np.zeros(size,dtype=np.float64)
+        self.powery = np.zeros(size,dtype=np.float64)
+        self.falling = np.zeros(size,dtype=bool)
+        self.tries = NUMBER_TURNS
+        self.remaining = bricks.getRemaining()
+        self.paddlehits = 0
+        self.alive = bricks.getAlive().copy()
+        self.hp = bricks.getHitPoints().copy()
+        self.changes = bricks.getChangeCount()
+
+
+class ThreadedPlay(object):
+    """An instance runs a game of Breakout on its own thread, and draws it on this one.
+
+    The simulation starts as soon as the instance is made.  It moves the paddle at every
+    step, using the last input from updatePaddle (an input older than SIM_INPUT_TIMEOUT
+    is dropped, so the paddle stops when Breakout stops sending it).  The ball moves from
+    the step after serveBall until a try is lost.  The thread ends when the game is over,
+    or with stop.
+
+    updateBall does not move anything: the ball moves on the simulation thread.  It reads
+    the latest state, so that getTries and getRemaining are up to date for Breakout.
+
+    INSTANCE ATTRIBUTES (simulation thread):
+        _game    [Play]: the game; after the start only the simulation thread touches it
+        _period  [float > 0]: the seconds between two steps
+        _buffers [list of 2 _StateBuffer]: the state buffers
+        _next    [0 or 1]: the index of the buffer to write next
+        _front   [_StateBuffer]: the last buffer published (read by the drawing side)
+        _paddlehits [int >= 0]: the number of paddle hits so far
+        _running [bool]: whether the ball is in play
+        _serving [bool]: whether the next step serves a ball (set by serveBall)
+        _stopped [bool]: whether the thread must end (set by stop)
+        _input   [triple (float, float or None, float)]: the move, pointer x and time of
+                 the last input (set by updatePaddle)
+        _thread  [Thread]: the simulation thread
+
+    INSTANCE ATTRIBUTES (drawing side):
+        _events  [EventQueue]: the queue the hits are reported to
+        _pointer [bool]: whether the paddle follows the mouse while it is pressed
+        _copy    [_StateBuffer]: the last clean copy of a published buffer
+        _bricks  [BrickField]: the copy of the board to draw
+        _paddles [list of Paddle]: the copy of the paddles
+        _ball    [Ball]: the copy of the ball
+        _shown   [bool]: whether the ball is in play in the state read
+        _extra   [list of Ball]: the copies of the POWERUP_MULTI balls (the first _count)
+        _count   [int >= 0]: the number of POWERUP_MULTI balls in the state read
+        _powerups [PowerUpPool]: the copy of the falling power-ups
+        _particles [ParticleSystem]: the debris of the bricks destroyed in the states read
+        _tick    [int >= -1]: the step of the state read (-1 before the first read)
+        _changes [int >= 0]: the brick changes of the state read
+        _hits    [int >= 0]: the paddle hits of the state read
+        _lasttries [int >= 0]: the tries of the state read
+        _tries   [int >= 0]: the tries as of the last updateBall
+        _remaining [int >= 0]: the breakable bricks of the state read
+    """
+
+    # GETTERS
+    def getTries(self):
+        """Return: the tries left, as of the last call to updateBall"""
+        return self._tries
+
+    def getRemaining(self):
+        """Return: the number of breakable bricks remaining (the game is won at 0)"""
+        return self._remaining
+
+    def getEvents(self):
+        """Return: the queue the hits are reported to (see events.py)"""
+        return self._events
+
+    def getTick(self):
+        """Return: the step of the last state read"""
+        return self._tick
+
+    def isAlive(self):
+        """Return: True if the simulation thread is still running"""
+        return self._thread.is_alive()
+
+    # INITIALIZER
+    def __init__(self,rows=BRICK_ROWS,columns=BRICKS_IN_ROW,level=None,events=None,
+                 singlehit=True,pointer=False,period=SIM_TICK):
+        """Initializer: creates a game (as Play does) and starts its simulation thread
+
+        parameter rows: the number of rows of bricks (ignored if there is a level)
+        precondition: rows is an int > 0
+        parameter columns: the number of bricks in a row (ignored if there is a level)
+        precondition: columns is an int > 0 with GAME_WIDTH/columns > BRICK_SEP_H
+        parameter level: the records of the level to play, or None for the grid
+        precondition: level is None or a NumPy array of BRICK_DTYPE (see levels.py)
+        parameter events: the queue to report hits to, or None for a new one
+        precondition: events is None or an EventQueue
+        parameter singlehit: whether the ball hits only one brick per frame
+        precondition: singlehit is a bool
+        parameter pointer: whether the paddle follows the mouse while it is pressed
+        precondition: pointer is a bool
+        parameter period: the seconds between two steps
+        precondition: period is a float > 0"""
+        self._game = Play(rows,columns,level,None,singlehit)
+        self._game.getEvents().listen(EVENT_PADDLE,self._onPaddle)
+        bricks = self._game.getBricks()
+        players = len(self._game.getPaddles())
+        self._period = period
+        self._buffers = [_StateBuffer(players,bricks), _StateBuffer(players,bricks)]
+        self._next = 0
+        self._paddlehits = 0
+        self._running = False
+        self._serving = False
+        self._stopped = False
+        self._input = (0.0, None, 0.0)
+        self._front = None
+        self._write(self._buffers[1])
+        self._front = self._buffers[1]
+
+        self._events = EventQueue() if events is None else events
+        self._pointer = pointer
+        self._copy = _StateBuffer(players,bricks)
+        self._bricks = BrickField(bricks.getRecords())
+        self._paddles = []
+        for ii in xrange(players):
+            color = PADDLE_COLORS[ii]
+            self._paddles.append(Paddle(GAME_WIDTH*(ii+0.5)/players,PADDLE_OFFSET,
+                                        PADDLE_WIDTH,PADDLE_HEIGHT,color,color))
+        self._ball = Ball(GAME_WIDTH/2.0,GAME_HEIGHT/2.0,BALL_DIAMETER,colormodel.BLUE)
+        self._shown = False
+        self._extra = []
+        self._count = 0
+        self._powerups = PowerUpPool()
+        self._particles = ParticleSystem()
+        self._tick = -1
+        self._changes = bricks.getChangeCount()
+        self._hits = 0
+        self._lasttries = self._game.getTries()
+        self._tries = self._lasttries
+        self._remaining = bricks.getRemaining()
+        self._read()
+
+        self._thread = threading.Thread(target=self._run,name='ThreadedPlay')
+        self._thread.daemon = True
+        self._thread.start()
+
+    # METHODS CALLED BY BREAKOUT (drawing side)
+    def updatePaddle(self,inputkey):
+        """Sends the input of this frame to the simulation thread
+
+        The simulation moves the paddle as Play.updatePaddle would, at every step until
+        the input is SIM_INPUT_TIMEOUT seconds old.
+
+        parameter inputkey: an indicator of keyboard information
+        precondition: inputkey is an object of class GInput"""
+        pointer = None
+        if self._pointer and inputkey.is_touch_down():
+            pointer = inputkey.touch_x
+        move = inputkey.held_fraction('right')-inputkey.held_fraction('left')
+        self._input = (move, pointer, time.time())
+
+    def serveBall(self):
+        """Asks the simulation thread to serve a ball at its next step"""
+        self._serving = True
+
+    def updateBall(self):
+        """Reads the latest state of the game (the ball moves on the simulation thread)"""
+        self._read()
+        self._tries = self._lasttries
+
+    def stop(self):
+        """Ends the simulation thread and waits for it"""
+        self._stopped = True
+        self._thread.join()
+
+    def draw(self,view):
+        """Reads the latest state of the game, and draws the bricks, debris, power-ups
+        and paddles
+
+        parameter view: the view to draw to
+        precondition: view is a GView"""
+        self._read()
+        self._bricks.draw(view)
+        self._particles.draw(view)
+        self._powerups.draw(view)
+        for paddle in self._paddles:
+            paddle.draw(view)
+
+    def drawBall(self,view):
+        """Draws the balls of the state read by draw
+
+        parameter view: the view to draw to
+        precondition: view is a GView"""
+        if self._shown:
+            self._ball.draw(view)
+            for ii in xrange(self._count):
+                self._extra[ii].draw(view)
+
+    # HELPERS FOR THE DRAWING SIDE
+    def _read(self):
+        """Copies the last published state into the copy of the game
+
+        The buffer is first copied into _copy.  If it changes while it is copied, it is
+        copied again (at most SIM_RETRIES times).  If none of the copies is clean, the 
+        copy of the game keeps the previous state.  The bricks hit are reported to the 
+        event queue, and the debris moves one frame for every new state."""
+        copy = self._copy
+        for attempt in xrange(SIM_RETRIES):
+            buf = self._front
+            seq = buf.seq
+            if buf.tick == self._tick:
+                return
+            copy.tick = buf.tick
+            np.copyto(copy.paddles,buf.paddles)
+            copy.shown = buf.shown
+            np.copyto(copy.ball,buf.ball)
+            copy.count = buf.count
+            np.copyto(copy.extra,buf.extra)
+            np.copyto(copy.powerx,buf.powerx)
+            np.copyto(copy.powery,buf.powery)
+            np.copyto(copy.falling,buf.falling)
+            copy.tries = buf.tries
+            copy.remaining = buf.remaining
+            copy.paddlehits = buf.paddlehits
+            copy.changes = buf.changes
+            if copy.changes != self._changes:
+                np.copyto(copy.alive,buf.alive)
+                np.copyto(copy.hp,buf.hp)
+            if buf.seq == seq and seq % 2 == 0:
+                break
+        else:
+            return
+        self._tick = copy.tick
+        for ii in xrange(len(self._paddles)):
+            paddle = self._paddles[ii]
+            paddle.width = float(copy.paddles[ii,1])
+            paddle.x = float(copy.paddles[ii,0])
+        self._shown = copy.shown
+        if self._shown:
+            self._ball.x = float(copy.ball[0])
+            self._ball.y = float(copy.ball[1])
+        self._count = copy.count
+        for ii in xrange(self._count):
+            if ii == len(self._extra):
+                self._extra.append(Ball(0,0,BALL_DIAMETER,colormodel.BLUE))
+            self._extra[ii].x = float(copy.extra[ii,0])
+            self._extra[ii].y = float(copy.extra[ii,1])
+        self._powerups.restore(copy.powerx,copy.powery,copy.falling)
+        self._particles.update()
+        self._lasttries = copy.tries
+        self._remaining = copy.remaining
+        for ii in xrange(self._hits,copy.paddlehits):
+            self._events.push(EVENT_PADDLE,0,0.0)
+        self._hits = copy.paddlehits
+        if copy.changes != self._changes:
+            self._changes = copy.changes
+            self._readBricks(copy)
+
+    def _readBricks(self,buf):
+        """Hits the bricks of the copy of the game until they match a state buffer
+
+        A brick destroyed by the hits bursts into particles, as in Play.
+
+        parameter buf: the clean copy of the buffer read
+        precondition: buf is _copy"""
+        bricks = self._bricks
+        alive = bricks.getAlive()
+        hp = bricks.getHitPoints()
+        for index in np.flatnonzero(alive & ((buf.hp < hp) | ~buf.alive)):
+            index = int(index)
+            target = int(buf.hp[index])
+            while bricks.isAlive(index) and bricks.getHP(index) > target:
+                color = bricks.getColor(index)
+                if bricks.hit(index):
+                    rec = bricks.getRecords()[index]
+                    self._particles.emit(float(rec['x']),float(rec['y']),PARTICLE_BURST,
+                                         color)
+            self._events.push(EVENT_BRICK,index,bricks.getHP(index))
+
+    # HELPERS FOR THE SIMULATION THREAD
+    def _run(self):
+        """Steps the game every _period seconds until it is over or stopped
+
+        If the thread falls behind, it runs at most SIM_CATCHUP steps back to back and
+        then drops the rest of the delay."""
+        deadline = time.time()
+        while not self._stopped:
+            now = time.time()
+            if now < deadline:
+                time.sleep(deadline-now)
+                continue
+            if not self._step():
+                break
+            deadline += self._period
+            if now-deadline > SIM_CATCHUP*self._period:
+                deadline = now
+
+    def _step(self):
+        """Steps the game once and publishes its state
+
+        Returns: False if the game is over, True otherwise"""
+        game = self._game
+        if self._serving:
+            self._serving = False
+            self._running = True
+            game.serveBall()
+        (move, pointer, stamp) = self._input
+        if time.time()-stamp < SIM_INPUT_TIMEOUT:
+            game.movePaddle(0,max(-1.0,min(1.0,move)),pointer)
+        over = False
+        if self._running:
+            tries = game.getTries()
+            game.updateBall()
+            game.getEvents().drain()
+            over = game.getRemaining() == 0 or game.getTries() == 0
+            if over or tries != game.getTries():
+                self._running = False
+        buf = self._buffers[self._next]
+        self._write(buf)
+        self._front = buf
+        self._next = 1-self._next
+        return not over
+
+    def _write(self,buf):
+        """Writes the state of the game into a buffer
+
+        parameter buf: the buffer to write (not the one published)
+        precondition: buf is a _StateBuffer"""
+        game = self._game
+        buf.seq += 1
+        buf.tick = 0 if self._front is None else self._front.tick+1
+        for (ii, paddle) in enumerate(game.getPaddles()):
+            buf.paddles[ii,0] = paddle.x
+            buf.paddles[ii,1] = paddle.width
+        ball = game.getBall()
+        buf.shown = self._running and not ball is None
+        if buf.shown:
+            buf.ball[0] = ball.x
+            buf.ball[1] = ball.y
+        extra = game.getExtraBalls()
+        buf.count = len(extra) if buf.shown else 0
+        for ii in xrange(buf.count):
+            buf.extra[ii,0] = extra[ii].x
+            buf.extra[ii,1] = extra[ii].y
+        powerups = game.getPowerUps()
+        np.copyto(buf.powerx,powerups.getX())
+        np.copyto(buf.powery,powerups.getY())
+        np.copyto(buf.falling,powerups.getActive())
+        buf.tries = game.getTries()
+        buf.remaining = game.getRemaining()
+        buf.paddlehits = self._paddlehits
+        bricks = game.getBricks()
+        if buf.changes != bricks.getChangeCount():
+            np.copyto(buf.alive,bricks.getAlive())
+            np.copyto(buf.hp,bricks.getHitPoints())
+            buf.changes = bricks.getChangeCount()
+        buf.seq += 1
+
+    def _onPaddle(self,index,offset):
+        """Counts a paddle hit (listener on the simulation thread for EVENT_PADDLE)
+
+        parameter index: the player whose paddle was hit
+        precondition: index is an int
+        parameter offset: the ball x minus the paddle x
+        precondition: offset is a float"""
+        self._paddlehits += 1
@@ -0,0 +1,44 @@
+# test_game2d.py
+# Rui Chen rc687 and Tian Tan tt474
+# 10/19/2026
+"""Tests for the shared color cache of game2d.py
+
+These tests need Kivy, NumPy and colormodel.  They have not been run yet: colormodel
+was not available where they were written.
+
+Run it from this folder with
+
+    python -m unittest test_game2d"""
+import unittest
+import game2d
+from game2d import *
+
+
+class ColorCacheTest(unittest.TestCase):
+    """The tests of _intern_color, _use_color and _prune_colors"""
+
+    def testPrune(self):
+        """A prune drops the colors no object uses, and keeps the others"""
+        kept = GRectangle(fillcolor=(0.1,0.2,0.3,1.0),linecolor=(0.1,0.2,0.3,1.0))
+        moved = GRectangle(fillcolor=(0.4,0.5,0.6,1.0),linecolor=(0.1,0.2,0.3,1.0))
+        moved.fillcolor = (0.7,0.8,0.9,1.0)
+        game2d._intern_color((0.2,0.2,0.2,1.0))
+        game2d._prune_colors()
+        self.assertTrue((0.1,0.2,0.3,1.0) in game2d._COLORS)
+        self.assertTrue((0.7,0.8,0.9,1.0) in game2d._COLORS)
+        self.assertFalse((0.4,0.5,0.6,1.0) in game2d._COLORS)
+        self.assertFalse((0.2,0.2,0.2,1.0) in game2d._COLORS)
+        self.assertTrue(kept._fillcolor is game2d._COLORS[(0.1,0.2,0.3,1.0)])
+
+    def testShared(self):
+        """Objects of the same color share one instruction, counted once per object"""
+        first = GRectangle(fillcolor=(0.3,0.3,0.6,1.0))
+        second = GRectangle(fillcolor=(0.3,0.3,0.6,1.0))
+        self.assertTrue(first._fillcolor is second._fillcolor)
+        self.assertEqual(game2d._USES[id(first._fillcolor)],2)
+        first.fillcolor = (0.6,0.3,0.3,1.0)
+        self.assertEqual(game2d._USES[id(second._fillcolor)],1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+# test_network.py
+# Rui Chen rc687 and Tian Tan tt474
+# 10/19/2026
+"""Round-trip tests for the protocol of network.py
+
+Every test runs a GameServer and its clients on loopback, in this one thread, and checks
+that the copy of a client ends up the same as the game on the server: the deltas of
+encode_state applied by GameClient._apply, the welcome of a player who joins late, and
+the keyframe (GameClient._keyframe and BrickField.restore) that syncs a spectator.
+
+These tests need Kivy, NumPy and colormodel.  They have not been run yet: colormodel
+was not available where they were written.
+
+Run it from this folder with
+
+    python -m unittest test_network"""
+import struct
+import time
+import unittest
+import numpy as np
+from network import *
+
+
+#: the most seconds a test waits for the sockets
+WAIT = 5.0
+
+
+def pump(server, clients, done, seconds=WAIT):
+    """Returns: True if done() became True before the time was up
+
+    The server and the clients are polled in turn until then.
+
+    parameter server: the server
+    precondition: server is a GameServer
+    parameter clients: the clients of the server
+    precondition: clients is a list of GameClient
+    parameter done: the condition to wait for
+    precondition: done is a function with no arguments that returns a bool
+    parameter seconds: the most seconds to wait
+    precondition: seconds is a float > 0"""
+    end = time.time()+seconds
+    while time.time() < end:
+        server.poll(0.005)
+        for client in clients:
+            client.poll(0.005)
+        if done():
+            return True
+    return False
+
+
+class ProtocolTest(unittest.TestCase):
+    """The tests of the deltas, the welcome and the keyframes"""
+
+    def setUp(self):
+        """Starts a server for two players, with spectators, on free ports"""
+        self.server = GameServer(port=0,players=2,spectators=0)
+        self.clients = []
+
+    def tearDown(self):
+        """Closes the clients and the server"""
+        for client in self.clients:
+            client.close()
+        self.server.shutdown(0.0)
+
+    def connect(self, address):
+        """Returns: a new client of the server at address, once it has its welcome
+
+        parameter address: the (host, port) to connect to
+        precondition: address is a pair of a str and an int"""
+        client = GameClient(address)
+        self.clients.append(client)
+        self.assertTrue(pump(self.server,self.clients,lambda: not client._bricks is None))
+        return client
+
+    def hitBricks(self):
+        """Hits a few bricks of the game on the server, destroying some of them"""
+        bricks = self.server.getGame().getBricks()
+        for index in (0, 1, 1, bricks.getSize()-1):
+            bricks.hit(index)
+
+    def assertSynced(self, client):
+        """Fails unless the copy of client is the same as the game on the server
+
+        parameter client: the client to check
+        precondition: client is a synced GameClient"""
+        game = self.server.getGame()
+        self.assertTrue(client.isReady())
+        self.assertTrue(np.array_equal(client._bricks.getAlive(),game.getBricks().getAlive()))
+        self.assertTrue(np.array_equal(client._bricks.getHitPoints(),
+                                       game.getBricks().getHitPoints()))
+        self.assertEqual(client.getRemaining(),game.getRemaining())
+        self.assertEqual(client.getTries(),game.getTries())
+        self.assertEqual(len(client._paddles),len(game.getPaddles()))
+        for (mine, theirs) in zip(client._paddles,game.getPaddles()):
+            self.assertAlmostEqual(mine.x,theirs.x,places=3)
+            self.assertAlmostEqual(mine.width,theirs.width,places=3)
+        ball = game.getBall()
+        self.assertEqual(client.isServed(),not ball is None)
+        if client.isServed():
+            self.assertAlmostEqual(client._ball.x,ball.x,places=3)
+            self.assertAlmostEqual(client._ball.y,ball.y,places=3)
+            self.assertEqual(client._count,len(game.getExtraBalls()))
+
+    def step(self, count, move=1.0):
+        """Steps the server count times, moving the paddles toward each other
+
+        parameter count: the number of steps
+        precondition: count is an int >= 0
+        parameter move: the fraction of PADDLE_V each paddle moves
+        precondition: move is a float in [0,1]"""
+        self.server.setInput(0,move)
+        self.server.setInput(1,-move)
+        for ii in xrange(count):
+            self.server.step()
+
+    def testUnchanged(self):
+        """A state encoded against itself has no fields"""
+        state = self.server._snapshot()
+        body = encode_state(7,state,state,[])
+        self.assertEqual(len(body),struct.calcsize('<IH'))
+        self.assertEqual(struct.unpack('<IH',body),(7,0))
+
+    def testDeltas(self):
+        """The deltas of every step bring a player in step with the server"""
+        client = self.connect(self.server.getAddress())
+        self.assertSynced(client)
+        self.hitBricks()
+        self.step(3)
+        self.assertTrue(pump(self.server,self.clients,lambda: client.getTick() == 3))
+        self.assertSynced(client)
+        self.server.start()
+        self.step(5)
+        self.assertTrue(pump(self.server,self.clients,lambda: client.getTick() == 8))
+        self.assertSynced(client)
+
+    def testLateJoin(self):
+        """A player who joins late gets every hit so far in the welcome"""
+        first = self.connect(self.server.getAddress())
+        self.hitBricks()
+        self.step(3)
+        second = self.connect(self.server.getAddress())
+        self.assertSynced(second)
+        self.step(2)
+        self.assertTrue(pump(self.server,self.clients,
+                             lambda: first.getTick() == 5 and second.getTick() == 5))
+        self.assertSynced(first)
+        self.assertSynced(second)
+
+    def testKeyframe(self):
+        """A spectator is synced by a keyframe, and then kept in step by the deltas
+
+        The paddles stand still, so that nothing but the keyframe is sent until the
+        next hit."""
+        self.hitBricks()
+        self.step(1,0.0)
+        spectator = self.connect(self.server.getSpectators().getAddress())
+        self.assertTrue(spectator.isSpectator())
+        self.assertFalse(spectator.isReady())
+        self.step(NET_KEYFRAME,0.0)
+        self.assertTrue(pump(self.server,self.clients,spectator.isReady))
+        self.assertSynced(spectator)
+        self.server.getGame().getBricks().hit(2)
+        self.step(1,0.0)
+        self.assertTrue(pump(self.server,self.clients,
+                             lambda: spectator.getTick() == NET_KEYFRAME+2))
+        self.assertSynced(spectator)
+
+
+if __name__ == '__main__':
+    unittest.main()